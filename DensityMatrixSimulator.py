@@ -0,0 +1,683 @@
+from SEO_simulator import *
+import string
+
+
+class DensityMatrixSimulator(SEO_simulator):
+    """
+    This class is a child of class SEO_simulator. It reads the same English
+    files, but instead of storing the state as a dictionary of branch state
+    vectors (see SEO_simulator), it stores it as a single density matrix
+    rho, and evolves it as rho -> U rho U^dag for each gate U.
+
+    rho is stored in self.den_mat_arr, an array of shape [2]*(2*num_bits).
+    Axis k (resp., num_bits + k) of it is the ket (resp., bra) axis of
+    qubit k, in the ZF convention, just like the axes of StateVec.arr. So
+    den_mat_arr is the outer product of arr and conj(arr) if the state is
+    pure. A gate U acting on qubit k is applied to rho as two one bit gates,
+    U on ket axis k and conj(U) on bra axis num_bits + k, with each control
+    of U controlling both. Thus, all gate kernels act on tensor reshapes
+    (views) of den_mat_arr, and no 2^num_bits x 2^num_bits matrix is ever
+    formed.
+
+    MEAS of kind 0 (resp., 1) replaces rho by P_0 rho P_0 (resp., P_1 rho
+    P_1). MEAS of kind 2 replaces rho by P_0 rho P_0 + P_1 rho P_1,
+    i.e., it sets to zero the entries of rho whose ket and bra values of
+    the target bit differ. Hence, each kind 2 MEAS costs a single pass over
+    rho, and does not double the size of the state, as it does in
+    SEO_simulator. For circuits with m kind 2 MEAS on n qubits, rho has 4^n
+    entries, compared with 2^m*2^n for the branch state vectors, so this
+    class uses less memory when m > n.
+
+    After a kind 2 MEAS of qubit k, rho is block diagonal in qubit k, and
+    the block in which qubit k is 1 (resp., 0) is the branch of
+    SEO_simulator in which k was measured to be True (resp., False). So a
+    gate inside an IF_M block is applied to rho with the IF_M controls
+    added to its controls. This is only valid as long as the measured qubit
+    has not been changed by a later gate, so an IF_M block whose controls
+    mention such a qubit raises an error (the qubit may still be
+    changed, it just can't be used by IF_M anymore).
+
+    Batches of state vectors, threads and autograd are not supported.
+
+    Attributes
+    ----------
+    altered_measured_bits : set[int]
+        measured (kind 2) bits that have been changed by a gate after
+        being measured
+    den_mat_arr : np.ndarray
+        the density matrix rho, shape [2]*(2*num_bits). Its trace is
+        self.expected_tot_prob, except for round-off error.
+
+    """
+    # the state is not stored in self.br_arr, so loop bodies are
+    # never replaced by their matrix (see class SEO_simulator)
+    loop_mat_max_bits = 0
+
+    def __init__(self, file_prefix, num_bits, init_st_vec=None,
+                 init_den_mat=None, dtype=None, **kwargs):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_prefix : str
+        num_bits : int
+        init_st_vec : StateVec
+            initial pure state. Ignored if init_den_mat is not None. If
+            both are None, the ground state is used.
+        init_den_mat : np.ndarray
+            initial density matrix, shape=(dim, dim) where dim=2^num_bits,
+            indexed in ZL convention (like the output of
+            StateVec.get_den_mat())
+        dtype : np.dtype | None
+            np.complex128 or np.complex64. If None, the dtype of the
+            initial state is used.
+        kwargs : dict
+            key-word arguments of SEO_reader
+
+        Returns
+        -------
+
+        """
+        assert 'autograd.numpy' not in sys.modules, \
+            "DensityMatrixSimulator does not support autograd"
+        if init_den_mat is not None:
+            dim = 1 << num_bits
+            assert init_den_mat.shape == (dim, dim)
+            # ZL to ZF axes
+            perm = list(reversed(range(num_bits))) + \
+                list(reversed(range(num_bits, 2*num_bits)))
+            den_mat_arr = np.transpose(
+                init_den_mat.reshape([2]*(2*num_bits)), perm)
+        else:
+            if StateVec.is_zero(init_st_vec):
+                init_st_vec = StateVec.get_ground_st_vec(num_bits)
+            assert init_st_vec.get_batch_size() is None, \
+                "DensityMatrixSimulator does not support batches"
+            den_mat_arr = np.multiply.outer(init_st_vec.arr,
+                                            np.conj(init_st_vec.arr))
+        if dtype is None:
+            dtype = den_mat_arr.dtype
+        self.den_mat_arr = np.array(den_mat_arr, dtype=dtype)
+        self.dtype = self.den_mat_arr.dtype
+        self.num_bits = num_bits
+        self.expected_tot_prob = self.get_total_prob()
+        self.altered_measured_bits = set()
+        self.cached_sts = {}
+        # attributes of SEO_simulator that this class does not use
+        self.batch_size = None
+        self.cur_st_vec_dict = {}
+        self.inplace_kernel = False
+        self.num_threads = 1
+        self.thread_pool = None
+
+        SEO_reader.__init__(self, file_prefix, num_bits, **kwargs)
+
+    def get_total_prob(self):
+        """
+        Returns the trace of rho.
+
+        Returns
+        -------
+        float
+
+        """
+        return np.sum(np.real(self.get_den_mat_diag()), dtype=np.float64)
+
+    def get_den_mat_diag(self):
+        """
+        Returns the diagonal of rho, as an array of shape [2]*
+        num_bits indexed in the ZF convention (like StateVec.arr).
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        letters = string.ascii_letters[:self.num_bits]
+        return np.einsum(letters*2 + '->' + letters, self.den_mat_arr)
+
+    def get_den_mat(self):
+        """
+        Returns the density matrix rho, as an array of shape (dim, dim),
+        where dim=2^num_bits, indexed in the ZL convention and divided by
+        its trace, just like the output of StateVec.get_den_mat().
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        dim = 1 << self.num_bits
+        perm = list(reversed(range(self.num_bits))) + \
+            list(reversed(range(self.num_bits, 2*self.num_bits)))
+        den_mat = np.transpose(self.den_mat_arr, perm).reshape((dim, dim))
+        return den_mat/self.get_total_prob()
+
+    def get_partial_tr(self, traced_bits_set):
+        """
+        Returns the partial trace of rho over the qubits in the set
+        traced_bits_set, as an array of shape (dim, dim), where
+        dim=2^(num_bits - len(traced_bits_set)), indexed in the ZL
+        convention and with trace 1, just like the output of
+        StateVec.get_partial_tr(). It is calculated with a single
+        np.einsum() over den_mat_arr, without forming the full density
+        matrix.
+
+        Parameters
+        ----------
+        traced_bits_set : set[int]
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        assert set(range(self.num_bits)) > set(traced_bits_set)
+        num_bits = self.num_bits
+        ket_letters = list(string.ascii_letters[:num_bits])
+        bra_letters = list(string.ascii_letters[num_bits: 2*num_bits])
+        for bit in traced_bits_set:
+            bra_letters[bit] = ket_letters[bit]
+        # ZL convention for output, so kept bits in decreasing order
+        kept_bits = [bit for bit in reversed(range(num_bits))
+                     if bit not in traced_bits_set]
+        out_letters = [ket_letters[bit] for bit in kept_bits] + \
+            [bra_letters[bit] for bit in kept_bits]
+        dm = np.einsum(''.join(ket_letters + bra_letters) + '->' +
+                       ''.join(out_letters), self.den_mat_arr)
+        dim = 1 << len(kept_bits)
+        return dm.reshape((dim, dim))/self.get_total_prob()
+
+    def get_reduced_den_mat(self, kept_bits):
+        """
+        Returns get_partial_tr() over all the qubits not in kept_bits,
+        like StateVec.get_reduced_den_mat().
+
+        Parameters
+        ----------
+        kept_bits : list[int] | set[int]
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        return self.get_partial_tr(
+            set(range(self.num_bits)) - set(kept_bits))
+
+    def get_pd(self):
+        """
+        Returns the diagonal of rho divided by its trace, i.e., the
+        probability distribution of the measurement of all qubits,
+        as an array of shape (2^num_bits,) indexed in the ZL convention,
+        like StateVec.get_pd().
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        perm = list(reversed(range(self.num_bits)))
+        pd = np.real(np.transpose(self.get_den_mat_diag(), perm)).flatten()
+        return pd/np.sum(pd)
+
+    def get_norm_drift(self):
+        """
+        Returns the absolute value of the difference between the trace of
+        rho and self.expected_tot_prob.
+
+        Returns
+        -------
+        float
+
+        """
+        return abs(self.get_total_prob() - self.expected_tot_prob)
+
+    def describe_st_vec_dict(self, **kwargs):
+        """
+        This class has no state vector dictionary. Prints the probability
+        of each qubit instead, and rho itself if kwargs['print_st_vec'] is
+        True.
+
+        Parameters
+        ----------
+        kwargs : dict
+
+        Returns
+        -------
+        None
+
+        """
+        pd = self.get_pd()
+        print('trace of rho=', self.get_total_prob())
+        print('bit probs=', StateVec.get_bit_probs(self.num_bits, pd))
+        if kwargs.get('print_st_vec', False):
+            print('rho (ZL convention)=\n', self.get_den_mat())
+
+    def get_counts(self, num_shots, omit_zero_counts=True,
+                   use_bin_labels=True, rand_seed=None, use_int_keys=False):
+        """
+        Same as the method of the parent class, but sampling the diagonal
+        of rho.
+
+        Parameters
+        ----------
+        num_shots : int
+        omit_zero_counts : bool
+        use_bin_labels : bool
+        rand_seed : int
+        use_int_keys : bool
+
+        Returns
+        -------
+        OrderedDict[str | int, int]
+
+        """
+        obs_vec = StateVec.get_observations_vec(
+            self.num_bits, self.get_pd(), num_shots, rand_seed)
+        return StateVec.get_counts_from_obs_vec(self.num_bits, obs_vec,
+                        use_bin_labels, omit_zero_counts, use_int_keys)
+
+    def get_mcase_controls(self, controls, tar_bits):
+        """
+        Returns `controls` with the IF_M controls self.mcase_trols added to
+        it, if inside an IF_M block. Returns None if they contradict each
+        other (in which case the gate acts on no branch). tar_bits are the
+        target bits of the gate, which may not be IF_M bits.
+
+        Parameters
+        ----------
+        controls : Controls
+        tar_bits : list[int]
+
+        Returns
+        -------
+        Controls | None
+
+        """
+        if not self.mcase_trols:
+            return controls
+        trols = Controls.copy(controls)
+        for bit, kind in self.mcase_trols.bit_pos_to_kind.items():
+            assert bit not in tar_bits, \
+                "DensityMatrixSimulator does not support gates that " \
+                "target the IF_M() bits inside their IF_M block"
+            old_kind = controls.bit_pos_to_kind.get(bit)
+            if old_kind is None:
+                trols.set_control(bit, kind)
+            elif not isinstance(old_kind, bool):
+                assert False, "DensityMatrixSimulator does not support " \
+                    "IF_M() bits that are intrinsic controls of the gate"
+            elif old_kind != kind:
+                return None
+        trols.refresh_lists()
+        return trols
+
+    def note_altered_bits(self, bits):
+        """
+        Adds to self.altered_measured_bits those bits in `bits` that have
+        been measured.
+
+        Parameters
+        ----------
+        bits : list[int]
+
+        Returns
+        -------
+        None
+
+        """
+        for bit in bits:
+            if bit in self.measured_bits:
+                self.altered_measured_bits.add(bit)
+
+    def get_side_slicex(self, controls, side):
+        """
+        Returns a tuple slicex that fixes the T (resp., F) controls of
+        `controls` to 1 (resp., 0), on the ket axes (side=0) or the bra
+        axes (side=1) of den_mat_arr, and leaves all other axes whole. Also
+        returns the list, in increasing order, of the bits that are not T
+        or F controls. Bit `bit` labels axis side*num_bits +
+        free_bits.index(bit) of den_mat_arr[slicex].
+
+        Parameters
+        ----------
+        controls : Controls
+        side : int
+            0 for ket, 1 for bra
+
+        Returns
+        -------
+        tuple, list[int]
+
+        """
+        off = side*self.num_bits
+        slicex = [slice(None)]*(2*self.num_bits)
+        for bit, kind in controls.bit_pos_to_kind.items():
+            if isinstance(kind, bool):
+                slicex[off + bit] = 1 if kind else 0
+        free_bits = [bit for bit in range(self.num_bits)
+                     if not isinstance(slicex[off + bit], int)]
+        return tuple(slicex), free_bits
+
+    def pad_plexor_arr(self, arr, side):
+        """
+        Adds to arr, an output of get_plexor_arr() for one side of rho,
+        length 1 axes for the other side, so that it can be broadcast
+        against den_mat_arr[slicex].
+
+        Parameters
+        ----------
+        arr : np.ndarray
+        side : int
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        if side == 0:
+            return arr.reshape(arr.shape + (1,)*self.num_bits)
+        return arr.reshape((1,)*self.num_bits + arr.shape)
+
+    def evolve_by_controlled_bit_swap(self, bit1, bit2, controls):
+        """
+        Overrides the parent class method. Swaps bits bit1 and bit2 of
+        both the kets and the bras of rho.
+
+        Parameters
+        ----------
+        bit1 : int
+        bit2 : int
+        controls : Controls
+
+        Returns
+        -------
+        None
+
+        """
+        assert bit1 != bit2, "swapped bits must be different"
+        for bit in [bit1, bit2]:
+            assert -1 < bit < self.num_bits
+            assert bit not in controls.bit_pos
+        controls = self.get_mcase_controls(controls, [bit1, bit2])
+        if controls is None:
+            return
+        self.note_altered_bits([bit1, bit2])
+        for side in range(2):
+            slicex, free_bits = self.get_side_slicex(controls, side)
+            off = side*self.num_bits
+            sub_arr = self.den_mat_arr[slicex]
+            self.den_mat_arr[slicex] = np.swapaxes(
+                sub_arr, off + free_bits.index(bit1),
+                off + free_bits.index(bit2))
+
+    def evolve_by_controlled_one_bit_gate(self,
+                tar_bit_pos, controls, one_bit_gate):
+        """
+        Overrides the parent class method. Applies one_bit_gate to the
+        kets, and its complex conjugate to the bras, of rho.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        controls : Controls
+        one_bit_gate : np.ndarray
+
+        Returns
+        -------
+        None
+
+        """
+        assert -1 < tar_bit_pos < self.num_bits
+        controls = self.get_mcase_controls(controls, [tar_bit_pos])
+        if controls is None:
+            return
+        one_bit_gate = one_bit_gate.astype(self.dtype)
+        if one_bit_gate[0, 1] != 0 or one_bit_gate[1, 0] != 0:
+            self.note_altered_bits([tar_bit_pos])
+        for side, gate in enumerate([one_bit_gate, np.conj(one_bit_gate)]):
+            slicex, free_bits = self.get_side_slicex(controls, side)
+            tar_axis = side*self.num_bits + free_bits.index(tar_bit_pos)
+            sub_arr = self.den_mat_arr[slicex]
+            sub_arr = np.tensordot(gate, sub_arr, ([1], [tar_axis]))
+            self.den_mat_arr[slicex] = np.moveaxis(sub_arr, 0, tar_axis)
+
+    def use_DIAG(self, trols, rad_angles):
+        """
+        Overrides the parent class use_ function. Multiplies the kets (
+        resp., bras) of rho by the diagonal of the d-unitary, exp(1j*
+        rad_angles) (resp., its complex conjugate).
+
+        Parameters
+        ----------
+        trols : Controls
+        rad_angles : list[float]
+
+        Returns
+        -------
+        None
+
+        """
+        trols = self.get_mcase_controls(trols, [])
+        if trols is None:
+            return
+        for side, sign in enumerate([1, -1]):
+            slicex, free_bits = self.get_side_slicex(trols, side)
+            phases = self.pad_plexor_arr(self.get_plexor_arr(
+                trols, free_bits, np.exp(sign*1j*np.array(rad_angles))),
+                side)
+            self.den_mat_arr[slicex] *= phases.astype(self.dtype)
+
+    def use_IF_M_beg(self, controls):
+        """
+        Checks that the bits of the IF_M controls have not been changed
+        since they were measured.
+
+        Parameters
+        ----------
+        controls : Controls
+
+        Returns
+        -------
+        None
+
+        """
+        for bit in controls.bit_pos_to_kind:
+            assert bit not in self.altered_measured_bits, \
+                "DensityMatrixSimulator: IF_M() argument mentions a " \
+                "qubit that was changed after being measured"
+
+    def use_IF_M_end(self):
+        """
+        Do nothing.
+
+        Returns
+        -------
+        None
+
+        """
+        pass
+
+    def use_MEAS(self, tar_bit_pos, kind):
+        """
+        Overrides the parent class use_ function.
+
+        For kind 0 (resp., 1) measurements, it replaces rho by P_0 rho P_0
+        (resp., P_1 rho P_1). For kind 2 measurements, it replaces rho by
+        P_0 rho P_0 + P_1 rho P_1.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        kind : int
+
+        Returns
+        -------
+        None
+
+        """
+        ket_axis = tar_bit_pos
+        bra_axis = self.num_bits + tar_bit_pos
+        slicex = [slice(None)]*(2*self.num_bits)
+        if kind in [0, 1]:
+            # value of target bit that is discarded
+            b = 1 if kind == 0 else 0
+            slicex[ket_axis] = b
+            slicex[bra_axis] = b
+            x = self.den_mat_arr[tuple(slicex)]
+            letters = string.ascii_letters[:self.num_bits - 1]
+            self.expected_tot_prob -= np.real(
+                np.einsum(letters*2 + '->', x))
+            slicex[bra_axis] = slice(None)
+            self.den_mat_arr[tuple(slicex)] = 0
+            slicex[ket_axis] = slice(None)
+            slicex[bra_axis] = b
+            self.den_mat_arr[tuple(slicex)] = 0
+        elif kind == 2:
+            for b in range(2):
+                slicex[ket_axis] = b
+                slicex[bra_axis] = 1 - b
+                self.den_mat_arr[tuple(slicex)] = 0
+            self.altered_measured_bits.discard(tar_bit_pos)
+        else:
+            assert False, 'unsupported measurement kind'
+
+    def use_MP_Y(self, tar_bit_pos, trols, rad_angles):
+        """
+        Overrides the parent class use_ function. Applies the multiplexor
+        to the kets and the bras of rho (its rotations are real,
+        so the same rotations are applied to both).
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        trols : Controls
+        rad_angles : list[float]
+
+        Returns
+        -------
+        None
+
+        """
+        assert tar_bit_pos not in trols.bit_pos, \
+            "target bit cannot be a control bit"
+        trols = self.get_mcase_controls(trols, [tar_bit_pos])
+        if trols is None:
+            return
+        self.note_altered_bits([tar_bit_pos])
+        rads_arr = np.array(rad_angles)
+        real_ty = np.finfo(self.dtype).dtype
+        for side in range(2):
+            slicex, free_bits = self.get_side_slicex(trols, side)
+            cc = self.pad_plexor_arr(self.get_plexor_arr(
+                trols, free_bits, np.cos(rads_arr)), side).astype(real_ty)
+            ss = self.pad_plexor_arr(self.get_plexor_arr(
+                trols, free_bits, np.sin(rads_arr)), side).astype(real_ty)
+            tar_axis = side*self.num_bits + free_bits.index(tar_bit_pos)
+            sub_arr = self.den_mat_arr[slicex]
+            half_slicex = [slice(None)]*sub_arr.ndim
+            half_slicex[tar_axis] = slice(0, 1)
+            a0 = sub_arr[tuple(half_slicex)]
+            half_slicex[tar_axis] = slice(1, 2)
+            a1 = sub_arr[tuple(half_slicex)]
+            self.den_mat_arr[slicex] = np.concatenate(
+                [cc*a0 + ss*a1, -ss*a0 + cc*a1], axis=tar_axis)
+
+    def finalize_next_line(self):
+        """
+        Prints running documentary at the end of the reading of each line.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.verbose:
+            print('\n')
+            print(self.split_line)
+            print('line number = ', self.line_count)
+            print('operation = ', self.num_ops)
+            self.describe_st_vec_dict()
+
+    def use_PRINT(self, style, line_num):
+        """
+        Prints to screen a description of rho. For style "ALL",
+        it also stores a copy of get_den_mat() in self.cached_sts[line_num].
+
+        Parameters
+        ----------
+        style : str
+            style in which to print
+        line_num : int
+            line number in eng & pic files in which PRINT command appears
+
+        Returns
+        -------
+        None
+
+        """
+        print("\n*************************beginning PRINT output")
+        print("PRINT line number=" + str(line_num))
+        if style == "V1":
+            self.describe_st_vec_dict()
+        elif style == "ALL":
+            self.describe_st_vec_dict(print_st_vec=True)
+            self.cached_sts[line_num] = self.get_den_mat()
+        else:
+            assert False, "unsupported PRINT style"
+        print("****************************ending PRINT output")
+
+
+if __name__ == "__main__":
+    import time
+
+    def main():
+        # compare with density matrix of SEO_simulator branches
+        for file_prefix, num_bits in [('io_folder/sim_test1', 6),
+                                      ('io_folder/sim_test3', 4),
+                                      ('io_folder/teleportation-with-ifs',
+                                       3),
+                                      ('io_folder/plexor_test_one_line', 6),
+                                      ('io_folder/d_unitary_test_one_line',
+                                       6)]:
+            sim = DensityMatrixSimulator(file_prefix, num_bits)
+            sim0 = SEO_simulator(file_prefix, num_bits)
+            den_mat0 = StateVec.get_den_mat(num_bits, sim0.cur_st_vec_dict)
+            err = np.linalg.norm(sim.get_den_mat() - den_mat0)
+            traced_bits_set = set(range(num_bits//2))
+            err_tr = np.linalg.norm(
+                sim.get_partial_tr(traced_bits_set) -
+                StateVec.get_partial_tr(num_bits, den_mat0,
+                                        traced_bits_set))
+            print(file_prefix, ', num branches=',
+                  len(sim0.cur_st_vec_dict), ', error=', err,
+                  ', partial trace error=', err_tr)
+
+        # many kind 2 MEAS on few qubits
+        num_bits = 6
+        line_list = []
+        for k in range(num_bits):
+            line_list.append('HAD2\tAT\t' + str(k))
+        for k in range(num_bits):
+            line_list.append('SIGX\tAT\t' + str((k + 1) % num_bits) +
+                             '\tIF\t' + str(k) + 'T')
+            line_list.append('MEAS\t2\tAT\t' + str(k))
+            line_list.append('ROTY\t30.0\tAT\t' + str((k + 2) % num_bits))
+        ckt = SEO_CompiledCkt(None, num_bits, line_list=line_list)
+        start = time.time()
+        sim0 = SEO_simulator(None, num_bits, compiled_ckt=ckt)
+        pd0 = StateVec.get_den_mat_pd(
+            StateVec.get_den_mat(num_bits, sim0.cur_st_vec_dict))
+        secs0 = time.time() - start
+        start = time.time()
+        sim = DensityMatrixSimulator(None, num_bits, compiled_ckt=ckt)
+        pd = sim.get_pd()
+        secs = time.time() - start
+        print('num branches=', len(sim0.cur_st_vec_dict),
+              ', SEO_simulator secs=', '{:.3f}'.format(secs0),
+              ', DensityMatrixSimulator secs=', '{:.3f}'.format(secs),
+              ', pd error=', np.linalg.norm(pd - pd0))
+
+    main()
@@ -2,6 +2,8 @@ import sys
 if 'autograd.numpy' not in sys.modules:
     import numpy as np
 from BitVector import *
+from concurrent.futures import ThreadPoolExecutor
+import itertools as it
 
 
 class HadamardTransform:
@@ -12,7 +14,7 @@ class HadamardTransform:
     """
 
     @staticmethod
-    def ht(num_bits, in_arr):
+    def ht(num_bits, in_arr, in_place=False, num_threads=1):
         """
         This function calculates the Hadamard transform of in_arr. Let H be
         the 2 dimensional Hadamard matrix and let ht be the num_bit-fold
@@ -20,6 +22,16 @@ class HadamardTransform:
         ht*in_arr = out_arr. in_arr and out_arr both have the same shape (
         2^num_bits,).
 
+        in_arr may also be a batch of such vectors, of shape (...,
+        2^num_bits), in which case each vector is transformed. It may be
+        real or complex.
+
+        The transform is a fast Walsh-Hadamard transform: out_arr is viewed
+        as an array of shape [2]*num_bits (plus the batch axes) and the
+        butterfly of apply_to_axes() is applied to each of those num_bits
+        axes, in place, so the time is O(num_bits*2^num_bits) and no
+        temporary arrays are allocated.
+
         Parameters
         ----------
         num_bits : int
@@ -29,27 +41,111 @@ class HadamardTransform:
         in_arr : np.ndarray
             Input array.
 
+        in_place : bool
+            If True, in_arr (which must be a C contiguous float or complex
+            array) is overwritten by out_arr and returned. Otherwise,
+            in_arr is left unchanged.
+
+        num_threads : int
+            number of threads used. Each butterfly is split into
+            at least num_threads chunks.
+
         Returns
         -------
         np.ndarray
 
         """
         length = (1 << num_bits)
-        half_len = (length >> 1)
-        assert len(in_arr) == length, \
+        assert in_arr.shape[-1] == length, \
             "in_arr for Hadamard Transform has wrong length"
-        prev_arr = np.zeros(length, dtype=float)
-        root2 = np.sqrt(2)
-        out_arr = np.copy(in_arr)
-        for beta in range(num_bits):
-            prev_arr[:] = out_arr[:]
-            for k in range(half_len):
-                x = prev_arr[2*k]
-                y = prev_arr[2*k+1]
-                out_arr[k] = (x + y)/root2
-                out_arr[half_len+k] = (x - y)/root2
+        if in_place:
+            assert in_arr.flags['C_CONTIGUOUS'] and \
+                np.issubdtype(in_arr.dtype, np.inexact)
+            out_arr = in_arr
+        else:
+            out_arr = np.array(in_arr,
+                               dtype=np.result_type(in_arr.dtype, float))
+        # a view of out_arr
+        arr = out_arr.reshape(in_arr.shape[:-1] + (2,)*num_bits)
+        axes = list(range(arr.ndim - num_bits, arr.ndim))
+        if num_threads > 1:
+            with ThreadPoolExecutor(max_workers=num_threads) as pool:
+                HadamardTransform.apply_to_axes(arr, axes, pool,
+                                                num_threads)
+        else:
+            HadamardTransform.apply_to_axes(arr, axes)
         return out_arr
 
+    @staticmethod
+    def apply_to_axes(arr, axes, thread_pool=None, num_chunks=1):
+        """
+        Applies the 2 dim Hadamard matrix H to each axis in `axes` of arr,
+        in place. Each of those axes must have length 2. If arr is a state
+        vector array, this is the same as applying a HAD2 gate to each
+        qubit in axes. arr may be any view (e.g., a slice of a state
+        vector array), contiguous or not.
+
+        For each axis, the butterfly (x, y) -> ((x + y)/sqrt(2), (x -
+        y)/sqrt(2)) is done in place on the two halves x and y of arr
+        along that axis. If thread_pool is not None, each butterfly is
+        split into at least num_chunks chunks, along the leading axes of
+        the halves, which are done in parallel on the threads of
+        thread_pool.
+
+        Parameters
+        ----------
+        arr : np.ndarray
+            float or complex array
+        axes : list[int]
+        thread_pool : ThreadPoolExecutor | None
+        num_chunks : int
+
+        Returns
+        -------
+        None
+
+        """
+        root2_inv = 1/np.sqrt(2)
+
+        def butterfly(x, y):
+            x += y
+            x *= root2_inv
+            # (x - y)/sqrt(2) = new x - sqrt(2)*y
+            y *= -2*root2_inv
+            y += x
+
+        for ax in axes:
+            assert arr.shape[ax] == 2
+            slicex = [slice(None)]*arr.ndim
+            slicex[ax] = 0
+            x = arr[tuple(slicex)]
+            slicex[ax] = 1
+            y = arr[tuple(slicex)]
+            if thread_pool is None or num_chunks < 2:
+                butterfly(x, y)
+                continue
+            # split x and y along their leading axes
+            split_axes = []
+            num = 1
+            for k in range(x.ndim):
+                if num >= num_chunks:
+                    break
+                if x.shape[k] > 1:
+                    split_axes.append(k)
+                    num *= x.shape[k]
+            chunk_slicexes = []
+            for inds in it.product(*[range(x.shape[k])
+                                     for k in split_axes]):
+                chunk_slicex = [slice(None)]*x.ndim
+                for k, ind in zip(split_axes, inds):
+                    chunk_slicex[k] = ind
+                chunk_slicexes.append(tuple(chunk_slicex))
+            # list() makes any exception raised by a thread be raised here
+            list(thread_pool.map(
+                lambda chunk_slicex: butterfly(x[chunk_slicex],
+                                               y[chunk_slicex]),
+                chunk_slicexes))
+
     @staticmethod
     def hadamard_mat(num_bits, is_quantum=True):
         """
@@ -96,4 +192,21 @@ if __name__ == "__main__":
         print("error=", err)
 
         print(HadamardTransform.hadamard_mat(2))
+
+        # complex batch, compared with hadamard_mat()
+        num_bits = 4
+        in_arr = np.random.rand(3, 1 << num_bits) + \
+            1j*np.random.rand(3, 1 << num_bits)
+        out_arr = HadamardTransform.ht(num_bits, in_arr, num_threads=2)
+        mat = HadamardTransform.hadamard_mat(num_bits)
+        print("batch error=", np.linalg.norm(out_arr - in_arr.dot(mat.T)))
+
+        # timing for a large number of bits
+        import time
+        num_bits = 22
+        in_arr = np.random.rand(1 << num_bits)
+        start = time.time()
+        HadamardTransform.ht(num_bits, in_arr, in_place=True)
+        print("num_bits=", num_bits, ", secs=",
+              '{:.3f}'.format(time.time() - start))
     main()
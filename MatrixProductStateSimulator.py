@@ -0,0 +1,751 @@
+from SEO_simulator import *
+
+
+class MatrixProductStateSimulator(SEO_simulator):
+    """
+    This class is a child of class SEO_simulator. It reads the same English
+    files, but it stores the state as a matrix product state (MPS) instead
+    of a state vector. An MPS on n qubits is a chain of n tensors (sites)
+    self.site_tens[s], of shape (chi_left, 2, chi_right), where chi_left
+    and chi_right are the bond dimensions of the bonds to the left and
+    right neighbors of site s (1 at the ends of the chain). The amplitude
+    of a basis state is the product of the matrices site_tens[s][:, b_s,
+    :], where b_s is the value of the qubit at site s. The memory used is
+    O(n*chi^2) instead of O(2^n), where chi is the largest bond dimension,
+    so circuits with many qubits but modest entanglement can be simulated.
+
+    A one bit gate without controls is applied to the site of its target
+    bit alone. A gate that acts on m > 1 qubits (a gate with controls, a
+    DIAG or an MP_Y line) is applied to m contiguous sites: the m site
+    tensors are contracted, multiplied by the gate, and split back into m
+    site tensors by SVDs. Only the largest max_bond_dim singular values
+    (and only those > cutoff times the largest one) of each SVD are kept.
+    The sum of the squares of the singular values discarded, relative to
+    the total, is added to self.discarded_weight, so 1 -
+    self.discarded_weight estimates the fidelity of the final state. The
+    MPS is kept in mixed canonical form, with all sites left (resp.,
+    right) of site self.center_site being left (resp., right) isometries,
+    so that each SVD truncation is optimal.
+
+    Qubits are not tied to sites. A SWAP line without controls just swaps
+    the sites of its two qubits, in self.site_of_bit and self.bit_at_site,
+    at no cost. If the qubits of a gate are not at contiguous sites,
+    they are brought next to each other by swapping neighboring sites (
+    which is a 2 site gate), and left there afterwards. For circuits of
+    nearest neighbor gates, such as those for chips with a line or ladder
+    topology, few such swaps are needed.
+
+    As in class StabilizerSimulator, a MEAS of kind 2 does not create
+    branches. Its outcome is chosen at random (with the right probability)
+    and recorded in self.meas_outcomes, and gates inside an IF_M block are
+    applied iff the recorded outcomes satisfy its controls. A MEAS of kind
+    0 (resp., 1) projects on the outcome 0 (resp., 1), and multiplies
+    self.expected_tot_prob by its probability. The MPS is always
+    normalized.
+
+    Attributes
+    ----------
+    bit_at_site : list[int]
+        qubit at each site
+    center_site : int
+        orthogonality center of the MPS
+    cutoff : float
+        singular values smaller than cutoff times the largest one are
+        discarded
+    discarded_weight : float
+        total weight (squared singular values, relative to the total)
+        discarded by truncations so far
+    max_bond_dim : int
+        maximum bond dimension
+    mcase_is_on : bool
+        False iff inside an IF_M block whose controls are not satisfied by
+        self.meas_outcomes
+    meas_outcomes : dict[int, bool]
+        outcomes of the MEAS of kind 2 done so far
+    rng : np.random.Generator
+        random number generator of the outcomes of MEAS of kind 2
+    site_of_bit : list[int]
+        site of each qubit
+    site_tens : list[np.ndarray]
+        the site tensors, of shape (chi_left, 2, chi_right)
+
+    """
+    # the state is not stored in self.br_arr, so loop bodies are
+    # never replaced by their matrix (see class SEO_simulator)
+    loop_mat_max_bits = 0
+
+    def __init__(self, file_prefix, num_bits, init_st_vec=None,
+                 max_bond_dim=64, cutoff=1e-12, rand_seed=None, **kwargs):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_prefix : str
+        num_bits : int
+        init_st_vec : StateVec
+            initial state, converted to an MPS without truncation (so it
+            must fit in memory). The ground state is used if None.
+        max_bond_dim : int
+        cutoff : float
+        rand_seed : int
+            seed of the outcomes of MEAS of kind 2
+        kwargs : dict
+            key-word arguments of SEO_reader
+
+        Returns
+        -------
+
+        """
+        self.num_bits = num_bits
+        self.max_bond_dim = max_bond_dim
+        self.cutoff = cutoff
+        self.discarded_weight = 0.0
+        self.mcase_is_on = True
+        self.meas_outcomes = {}
+        self.expected_tot_prob = 1.0
+        self.site_of_bit = list(range(num_bits))
+        self.bit_at_site = list(range(num_bits))
+        if StateVec.is_zero(init_st_vec):
+            ground = np.array([1, 0], dtype=np.complex128)
+            self.site_tens = [ground.reshape((1, 2, 1)).copy()
+                              for bit in range(num_bits)]
+            self.center_site = 0
+        else:
+            self.set_st_vec(init_st_vec)
+        self.rng = StateVec.get_rng(rand_seed)
+        self.cached_sts = {}
+        # attributes of SEO_simulator that this class does not use
+        self.dtype = np.complex128
+        self.batch_size = None
+        self.cur_st_vec_dict = {}
+        self.inplace_kernel = False
+        self.num_threads = 1
+        self.thread_pool = None
+
+        SEO_reader.__init__(self, file_prefix, num_bits, **kwargs)
+
+    def set_st_vec(self, st_vec):
+        """
+        Sets the MPS to the normalized state vector st_vec, by successive
+        SVDs, without truncation.
+
+        Parameters
+        ----------
+        st_vec : StateVec
+
+        Returns
+        -------
+        None
+
+        """
+        assert st_vec.get_batch_size() is None, \
+            "MatrixProductStateSimulator does not support batches"
+        num_bits = self.num_bits
+        # bit k is at site k
+        theta = st_vec.arr.astype(np.complex128).reshape((1, -1))
+        theta = theta/np.linalg.norm(theta)
+        self.site_tens = []
+        for site in range(num_bits - 1):
+            chi_left = theta.shape[0]
+            mat = theta.reshape((chi_left*2, -1))
+            u, sv, vh = np.linalg.svd(mat, full_matrices=False)
+            keep = max(1, int(np.sum(sv > 1e-14*sv[0])))
+            self.site_tens.append(u[:, :keep].reshape((chi_left, 2, keep)))
+            theta = sv[:keep, np.newaxis]*vh[:keep]
+        self.site_tens.append(theta.reshape((theta.shape[0], 2, 1)))
+        self.center_site = num_bits - 1
+
+    def get_st_vec(self):
+        """
+        Returns the state vector of the MPS, as a StateVec. Only for small
+        numbers of qubits.
+
+        Returns
+        -------
+        StateVec
+
+        """
+        theta = self.site_tens[0]
+        for site in range(1, self.num_bits):
+            theta = np.tensordot(theta, self.site_tens[site], ([-1], [0]))
+        # axis 1 + s of theta is site s
+        arr = theta.reshape([2]*self.num_bits)
+        arr = np.transpose(arr, [self.site_of_bit[bit] for bit in
+                                 range(self.num_bits)])
+        return StateVec(self.num_bits, arr)
+
+    def get_pd(self):
+        """
+        Returns the probability distribution of the measurement of all
+        qubits, as an array of shape (2^num_bits,) indexed in the ZL
+        convention, like StateVec.get_pd(). Only for small numbers of
+        qubits.
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        return self.get_st_vec().get_pd()
+
+    def get_bit_probs(self):
+        """
+        Returns a list whose jth item is, for the jth qubit, the pair (p,
+        1-p), where p is the probability that the jth qubit is 0,
+        like StateVec.get_bit_probs(), but for any number of qubits. p is
+        calculated from the site tensor of the jth qubit, after moving the
+        orthogonality center to it.
+
+        Returns
+        -------
+        list[tuple[float, float]]
+
+        """
+        probs = []
+        for bit in range(self.num_bits):
+            site = self.site_of_bit[bit]
+            self.move_center(site)
+            tens = self.site_tens[site]
+            p0, p1 = np.sum(np.abs(tens)**2, axis=(0, 2))
+            probs.append((p0/(p0 + p1), p1/(p0 + p1)))
+        return probs
+
+    def get_bond_dims(self):
+        """
+        Returns the list of the num_bits - 1 bond dimensions of the MPS.
+
+        Returns
+        -------
+        list[int]
+
+        """
+        return [self.site_tens[site].shape[2]
+                for site in range(self.num_bits - 1)]
+
+    def move_center(self, site):
+        """
+        Moves the orthogonality center of the MPS to site `site`, by QR
+        decompositions.
+
+        Parameters
+        ----------
+        site : int
+
+        Returns
+        -------
+        None
+
+        """
+        tens = self.site_tens
+        while self.center_site < site:
+            s = self.center_site
+            chi_left, _, chi_right = tens[s].shape
+            q, r = np.linalg.qr(tens[s].reshape((chi_left*2, chi_right)))
+            tens[s] = q.reshape((chi_left, 2, q.shape[1]))
+            tens[s + 1] = np.tensordot(r, tens[s + 1], ([1], [0]))
+            self.center_site += 1
+        while self.center_site > site:
+            s = self.center_site
+            chi_left, _, chi_right = tens[s].shape
+            q, r = np.linalg.qr(
+                tens[s].reshape((chi_left, 2*chi_right)).conj().T)
+            tens[s] = q.conj().T.reshape((q.shape[1], 2, chi_right))
+            tens[s - 1] = np.tensordot(tens[s - 1], r.conj().T,
+                                       ([2], [0]))
+            self.center_site -= 1
+
+    def evolve_sites(self, site, gate_tens):
+        """
+        Applies to the m contiguous sites site, site + 1, ..., site + m - 1
+        the gate gate_tens, a tensor of shape [2]*(2*m) whose first
+        (resp., last) m axes are the output (resp., input) axes of the m
+        sites. The m site tensors are contracted, multiplied by the gate,
+        and split again by truncated SVDs.
+
+        Parameters
+        ----------
+        site : int
+        gate_tens : np.ndarray
+
+        Returns
+        -------
+        None
+
+        """
+        num_sites = gate_tens.ndim//2
+        tens = self.site_tens
+        self.move_center(site)
+        theta = tens[site]
+        for s in range(site + 1, site + num_sites):
+            theta = np.tensordot(theta, tens[s], ([-1], [0]))
+        theta = np.tensordot(gate_tens, theta,
+                             (list(range(num_sites, 2*num_sites)),
+                              list(range(1, num_sites + 1))))
+        theta = np.transpose(theta, [num_sites] + list(range(num_sites)) +
+                             [num_sites + 1])
+        for s in range(site, site + num_sites - 1):
+            chi_left = theta.shape[0]
+            mat = theta.reshape((chi_left*2, -1))
+            u, sv, vh = np.linalg.svd(mat, full_matrices=False)
+            tot = np.sum(sv**2)
+            keep = int(np.sum(sv > self.cutoff*sv[0]))
+            keep = max(1, min(keep, self.max_bond_dim))
+            kept = np.sum(sv[:keep]**2)
+            self.discarded_weight += (tot - kept)/tot
+            # renormalize so that the MPS stays normalized
+            sv = sv[:keep]*np.sqrt(tot/kept)
+            tens[s] = u[:, :keep].reshape((chi_left, 2, keep))
+            theta = (sv[:, np.newaxis]*vh[:keep]).reshape(
+                (keep,) + theta.shape[2:])
+        tens[site + num_sites - 1] = theta
+        self.center_site = site + num_sites - 1
+
+    def swap_sites(self, site):
+        """
+        Swaps the qubits at sites site and site + 1.
+
+        Parameters
+        ----------
+        site : int
+
+        Returns
+        -------
+        None
+
+        """
+        swap_tens = np.zeros([2]*4, dtype=np.complex128)
+        for b0, b1 in it.product([0, 1], repeat=2):
+            swap_tens[b1, b0, b0, b1] = 1
+        self.evolve_sites(site, swap_tens)
+        bit0, bit1 = self.bit_at_site[site], self.bit_at_site[site + 1]
+        self.bit_at_site[site], self.bit_at_site[site + 1] = bit1, bit0
+        self.site_of_bit[bit0], self.site_of_bit[bit1] = site + 1, site
+
+    def evolve_bits(self, bits, gate_tens):
+        """
+        Applies to the qubits `bits` the gate gate_tens, a tensor of shape
+        [2]*(2*m) whose first (resp., last) m axes are the output (resp.,
+        input) axes of the qubits in `bits`, in that order. If the qubits
+        are not at contiguous sites, they are first moved, by swaps,
+        next to the leftmost of them.
+
+        Parameters
+        ----------
+        bits : list[int]
+        gate_tens : np.ndarray
+
+        Returns
+        -------
+        None
+
+        """
+        num = len(bits)
+        sites = sorted(self.site_of_bit[bit] for bit in bits)
+        for k in range(1, num):
+            # move qubit at sites[k] to sites[0] + k
+            for s in reversed(range(sites[0] + k, sites[k])):
+                self.swap_sites(s)
+        window = [self.bit_at_site[sites[0] + k] for k in range(num)]
+        perm = [bits.index(bit) for bit in window]
+        gate_tens = np.transpose(gate_tens,
+                                 perm + [num + p for p in perm])
+        self.evolve_sites(sites[0], gate_tens)
+
+    @staticmethod
+    def get_controlled_gate_tens(kinds, block):
+        """
+        Returns the tensor of a gate that acts on len(kinds) control qubits
+        and on the target qubits of `block`, in that order. It applies
+        block to the targets iff control k is kinds[k] (True=1,
+        False=0) for all k, and it is the identity otherwise. block is a
+        tensor of shape [2]*(2*t) for t targets, with the output axes
+        first.
+
+        Parameters
+        ----------
+        kinds : list[bool]
+        block : np.ndarray
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        num_trols = len(kinds)
+        num = num_trols + block.ndim//2
+        gate_tens = np.eye(1 << num, dtype=np.complex128).reshape(
+            [2]*(2*num))
+        slicex = [slice(None)]*(2*num)
+        for k, kind in enumerate(kinds):
+            slicex[k] = int(kind)
+            slicex[num + k] = int(kind)
+        gate_tens[tuple(slicex)] = block
+        return gate_tens
+
+    def evolve_by_controlled_bit_swap(self, bit1, bit2, controls):
+        """
+        Overrides the parent class method. A swap without controls just
+        swaps the sites of its two qubits.
+
+        Parameters
+        ----------
+        bit1 : int
+        bit2 : int
+        controls : Controls
+
+        Returns
+        -------
+        None
+
+        """
+        assert bit1 != bit2, "swapped bits must be different"
+        if not self.mcase_is_on:
+            return
+        if not controls.bit_pos_to_kind:
+            site1, site2 = self.site_of_bit[bit1], self.site_of_bit[bit2]
+            self.site_of_bit[bit1], self.site_of_bit[bit2] = site2, site1
+            self.bit_at_site[site1], self.bit_at_site[site2] = bit2, bit1
+            return
+        swap_tens = np.zeros([2]*4, dtype=np.complex128)
+        for b0, b1 in it.product([0, 1], repeat=2):
+            swap_tens[b1, b0, b0, b1] = 1
+        trols = list(controls.bit_pos_to_kind.items())
+        self.evolve_bits([bit for bit, kind in trols] + [bit1, bit2],
+                         self.get_controlled_gate_tens(
+                             [kind for bit, kind in trols], swap_tens))
+
+    def evolve_by_controlled_one_bit_gate(self,
+                tar_bit_pos, controls, one_bit_gate):
+        """
+        Overrides the parent class method. A gate without controls is
+        applied to the site of its target alone.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        controls : Controls
+        one_bit_gate : np.ndarray
+
+        Returns
+        -------
+        None
+
+        """
+        if not self.mcase_is_on:
+            return
+        if not controls.bit_pos_to_kind:
+            site = self.site_of_bit[tar_bit_pos]
+            new_tens = np.tensordot(one_bit_gate, self.site_tens[site],
+                                    ([1], [1]))
+            self.site_tens[site] = np.transpose(new_tens, [1, 0, 2])
+            return
+        trols = list(controls.bit_pos_to_kind.items())
+        self.evolve_bits([bit for bit, kind in trols] + [tar_bit_pos],
+                         self.get_controlled_gate_tens(
+                             [kind for bit, kind in trols], one_bit_gate))
+
+    def use_DIAG(self, trols, rad_angles):
+        """
+        Overrides the parent class use_ function. Applies the d-unitary
+        as a gate on all the qubits of trols.
+
+        Parameters
+        ----------
+        trols : Controls
+        rad_angles : list[float]
+
+        Returns
+        -------
+        None
+
+        """
+        if not self.mcase_is_on:
+            return
+        bits = sorted(trols.bit_pos_to_kind.keys())
+        diag = np.ones([2]*len(bits), dtype=np.complex128)
+        slicex = [slice(None)]*len(bits)
+        for k, bit in enumerate(bits):
+            kind = trols.bit_pos_to_kind[bit]
+            if isinstance(kind, bool):
+                slicex[k] = int(kind)
+        free_bits = [bit for k, bit in enumerate(bits)
+                     if not isinstance(slicex[k], int)]
+        diag[tuple(slicex)] = self.get_plexor_arr(
+            trols, free_bits, np.exp(1j*np.array(rad_angles)))
+        gate_tens = np.diag(diag.reshape(-1)).reshape([2]*(2*len(bits)))
+        self.evolve_bits(bits, gate_tens)
+
+    def use_MP_Y(self, tar_bit_pos, trols, rad_angles):
+        """
+        Overrides the parent class use_ function. Applies the multiplexor
+        as a gate on all the qubits of trols and the target.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        trols : Controls
+        rad_angles : list[float]
+
+        Returns
+        -------
+        None
+
+        """
+        assert tar_bit_pos not in trols.bit_pos, \
+            "target bit cannot be a control bit"
+        if not self.mcase_is_on:
+            return
+        trol_bits = sorted(trols.bit_pos_to_kind.keys())
+        bits = trol_bits + [tar_bit_pos]
+        num = len(bits)
+        gate_tens = np.eye(1 << num, dtype=np.complex128).reshape(
+            [2]*(2*num))
+        MP_bits = [bit for bit in trol_bits if
+                   not isinstance(trols.bit_pos_to_kind[bit], bool)]
+        slicex = [slice(None)]*(2*num)
+        for k, bit in enumerate(trol_bits):
+            kind = trols.bit_pos_to_kind[bit]
+            if isinstance(kind, bool):
+                slicex[k] = slicex[num + k] = int(kind)
+        # the intrinsic control with the j'th smallest bit position is
+        # bit j of the index of rad_angles
+        for index, rads in enumerate(rad_angles):
+            for j, bit in enumerate(MP_bits):
+                k = trol_bits.index(bit)
+                slicex[k] = slicex[num + k] = (index >> j) & 1
+            cc, ss = np.cos(rads), np.sin(rads)
+            gate_tens[tuple(slicex)] = [[cc, ss], [-ss, cc]]
+        self.evolve_bits(bits, gate_tens)
+
+    def use_IF_M_beg(self, controls):
+        """
+        Sets self.mcase_is_on according to whether self.meas_outcomes
+        satisfy the IF_M controls.
+
+        Parameters
+        ----------
+        controls : Controls
+
+        Returns
+        -------
+        None
+
+        """
+        self.mcase_is_on = all(
+            self.meas_outcomes[bit] == kind for bit, kind in
+            controls.bit_pos_to_kind.items())
+
+    def use_IF_M_end(self):
+        """
+        Sets self.mcase_is_on to True.
+
+        Returns
+        -------
+        None
+
+        """
+        self.mcase_is_on = True
+
+    def use_MEAS(self, tar_bit_pos, kind):
+        """
+        Overrides the parent class use_ function.
+
+        For kind 0 (resp., 1) measurements, it projects on the outcome 0
+        (resp., 1) and multiplies self.expected_tot_prob by its
+        probability. For kind 2 measurements, it chooses the outcome at
+        random, projects on it and records it in self.meas_outcomes.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        kind : int
+
+        Returns
+        -------
+        None
+
+        """
+        assert kind in [0, 1, 2], 'unsupported measurement kind'
+        site = self.site_of_bit[tar_bit_pos]
+        self.move_center(site)
+        tens = self.site_tens[site]
+        probs = np.sum(np.abs(tens)**2, axis=(0, 2))
+        probs = probs/np.sum(probs)
+        if kind == 2:
+            val = int(self.rng.random() < probs[1])
+            self.meas_outcomes[tar_bit_pos] = bool(val)
+        else:
+            val = kind
+            assert probs[val] > 0, "MEAS of kind " + str(kind) + \
+                " projects the state to zero"
+            self.expected_tot_prob *= probs[val]
+        tens = tens.copy()
+        tens[:, 1 - val, :] = 0
+        self.site_tens[site] = tens/np.sqrt(probs[val])
+
+    def get_counts(self, num_shots, omit_zero_counts=True,
+                   use_bin_labels=True, rand_seed=None, use_int_keys=False):
+        """
+        Same as the method of the parent class, but the state names are
+        sorted and only those with nonzero counts are included (
+        omit_zero_counts must be True), because there are 2^num_bits
+        states. The outcomes are sampled site by site, from the MPS in
+        right canonical form, for all shots at once.
+
+        Parameters
+        ----------
+        num_shots : int
+        omit_zero_counts : bool
+        use_bin_labels : bool
+        rand_seed : int
+        use_int_keys : bool
+
+        Returns
+        -------
+        OrderedDict[str | int, int]
+
+        """
+        assert omit_zero_counts, "MatrixProductStateSimulator." \
+            "get_counts() only supports omit_zero_counts=True"
+        rng = StateVec.get_rng(rand_seed)
+        self.move_center(0)
+        outcomes = np.zeros((num_shots, self.num_bits), dtype=bool)
+        shots = np.arange(num_shots)
+        # env[shot] = left environment (a row vector) of the current site
+        env = np.ones((num_shots, 1), dtype=np.complex128)
+        for site in range(self.num_bits):
+            vecs = np.einsum('ka,abc->kbc', env, self.site_tens[site])
+            probs = np.sum(np.abs(vecs)**2, axis=2)
+            vals = (rng.random(num_shots) *
+                    np.sum(probs, axis=1) < probs[:, 1]).astype(int)
+            outcomes[:, self.bit_at_site[site]] = vals
+            env = vecs[shots, vals]/np.sqrt(
+                probs[shots, vals])[:, np.newaxis]
+        return StateVec.get_counts_from_bit_arr(outcomes, use_bin_labels,
+                                                use_int_keys)
+
+    def get_norm_drift(self):
+        """
+        Returns the absolute value of the difference between the norm
+        squared of the MPS and 1.
+
+        Returns
+        -------
+        float
+
+        """
+        tens = self.site_tens[self.center_site]
+        return abs(np.sum(np.abs(tens)**2) - 1)
+
+    def describe_st_vec_dict(self, **kwargs):
+        """
+        This class has no state vector dictionary. Prints the bond
+        dimensions and the discarded weight instead.
+
+        Parameters
+        ----------
+        kwargs : dict
+
+        Returns
+        -------
+        None
+
+        """
+        print('bond dims=', self.get_bond_dims())
+        print('qubit at each site=', self.bit_at_site)
+        print('discarded weight=', self.discarded_weight)
+        print('kind 2 MEAS outcomes=', self.meas_outcomes)
+
+    def finalize_next_line(self):
+        """
+        Prints running documentary at the end of the reading of each line.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.verbose:
+            print('\n')
+            print(self.split_line)
+            print('line number = ', self.line_count)
+            print('operation = ', self.num_ops)
+            self.describe_st_vec_dict()
+
+    def use_PRINT(self, style, line_num):
+        """
+        Prints to screen a description of the MPS. For style "ALL",
+        it also stores a copy of the site tensors in
+        self.cached_sts[line_num].
+
+        Parameters
+        ----------
+        style : str
+            style in which to print
+        line_num : int
+            line number in eng & pic files in which PRINT command appears
+
+        Returns
+        -------
+        None
+
+        """
+        print("\n*************************beginning PRINT output")
+        print("PRINT line number=" + str(line_num))
+        self.describe_st_vec_dict()
+        if style == "ALL":
+            self.cached_sts[line_num] = [tens.copy() for tens in
+                                         self.site_tens]
+        elif style != "V1":
+            assert False, "unsupported PRINT style"
+        print("****************************ending PRINT output")
+
+
+if __name__ == "__main__":
+    import time
+
+    def main():
+        # compare with SEO_simulator, without truncation
+        for file_prefix, num_bits in [('io_folder/sim_test1', 6),
+                                      ('io_folder/sim_test2', 4),
+                                      ('io_folder/plexor_test_one_line', 6),
+                                      ('io_folder/d_unitary_test_one_line',
+                                       6)]:
+            init_st_vec = StateVec.get_random_st_vec(num_bits, rand_seed=4)
+            sim = MatrixProductStateSimulator(
+                file_prefix, num_bits, init_st_vec=init_st_vec)
+            sim0 = SEO_simulator(file_prefix, num_bits,
+                                 init_st_vec=init_st_vec)
+            err = np.linalg.norm(sim.get_st_vec().arr -
+                                 sim0.cur_st_vec_dict['pure'].arr)
+            print(file_prefix, ', bond dims=', sim.get_bond_dims(),
+                  ', error=', err)
+
+        # shallow circuit of nearest neighbor gates on many qubits
+        num_bits = 80
+        rand = np.random.RandomState(123)
+        line_list = []
+        for layer in range(8):
+            for bit in range(num_bits):
+                line_list.append('ROTY\t' +
+                                 '{:.5f}'.format(rand.rand()*360) +
+                                 '\tAT\t' + str(bit))
+            for bit in range(layer % 2, num_bits - 1, 2):
+                line_list.append('SIGX\tAT\t' + str(bit + 1) +
+                                 '\tIF\t' + str(bit) + 'T')
+        ckt = SEO_CompiledCkt(None, num_bits, line_list=line_list)
+        for max_bond_dim in [4, 8, 16]:
+            start = time.time()
+            sim = MatrixProductStateSimulator(None, num_bits,
+                                              compiled_ckt=ckt,
+                                              max_bond_dim=max_bond_dim)
+            secs = time.time() - start
+            counts = sim.get_counts(100, rand_seed=5)
+            print('num_bits=', num_bits, ', max_bond_dim=', max_bond_dim,
+                  ', max bond dim used=', max(sim.get_bond_dims()),
+                  ', discarded weight=', sim.discarded_weight,
+                  ', secs=', '{:.3f}'.format(secs),
+                  ', num distinct outcomes in 100 shots=', len(counts))
+
+    main()
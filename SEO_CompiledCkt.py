@@ -0,0 +1,1117 @@
+from Controls import *
+from PlaceholderManager import *
+import copy as cp
+import os
+
+import sys
+if 'autograd.numpy' not in sys.modules:
+    import numpy as np
+else:
+    import autograd.numpy as np
+
+
+class SEO_CompiledCkt:
+    """
+    An object of this class is a compiled version of an English file. The
+    constructor reads an English file (or a list of its lines) a single
+    time, tokenizes and parses each line, and stores the result as a flat
+    list of operations self.ops. Thereafter, SEO_reader and all its
+    children (simulators, expanders, translators, etc.) can replay the
+    circuit by reading self.ops instead of the English file. Just pass the
+    compiled circuit into the constructor of the SEO_reader child via the
+    key-word argument `compiled_ckt`. This avoids opening, tokenizing and
+    parsing the same English file again and again, e.g., in a parameter
+    sweep.
+
+    Each item of self.ops is a tuple (line_name, split_line, args), where
+
+    * line_name is the first word of the line, e.g., 'ROTX'
+    * split_line is the list of tokens returned by line.split()
+    * args is a tuple of the parsed arguments of the line. Controls are
+    stored as objects of class Controls. Angles (we call them angle slots)
+    are stored as a float (in radians) if the English file gives a number
+    of degrees, and as the placeholder str verbatim if the English file
+    gives a legal placeholder variable name. Placeholders are resolved
+    into floats by the PlaceholderManager of the SEO_reader that replays
+    self.ops, not by this class, so the same compiled circuit can be
+    replayed with different values of its placeholder variables.
+
+    See the docstring of method SEO_reader.next_line() for the args of
+    each line_name.
+
+    The LOOP/NEXT structure is also stored. Loops are NOT unrolled. The
+    attributes loop_to_start_index, loop_to_start_line, loop_to_nreps
+    are analogous to the attributes of class SEO_pre_reader with the same
+    names, except that start offsets into the English file are replaced
+    by start indices into self.ops.
+
+    The compiler also records which ops have placeholder angle slots and
+    which var_nums and fun_names each of those ops depends on. Method
+    bind_vars() uses that info to produce, without any re-reading or
+    re-parsing, a new compiled circuit in which the placeholders have
+    been replaced by floats. Only the ops that contain placeholders are
+    rebuilt; all other ops are shared with self. This is the inner loop of
+    a variational (VQE) minimization. See class MeanHamil_native.
+
+    An English file can also be stored in a binary format, as an .npz file
+    with the same name as the English file except that it ends in
+    '_eng.npz' instead of '_eng.txt'. Methods write_bin_file() and
+    read_bin_file() write and read that format, and the static methods
+    eng_file_to_bin_file() and bin_file_to_eng_file() convert one format
+    into the other without changing the circuit. The text of the English
+    file is not kept verbatim, though: whitespace and keywords are
+    normalized the way SEO_writer writes them (e.g., a line `LOOP 20
+    REPS: 2` comes back as `LOOP 20 NREPS= 2`). The .npz file contains a
+    NumPy structured array with one record per line (opcode, 2 int slots
+    and the end offsets of the line's controls and angles), plus flat side
+    arrays holding the control bit positions and kinds, the angles in
+    degrees, the text of NOTA and PRINT lines, and a side table of the
+    placeholder strs (their angles are stored as NaN). See the docstring of
+    write_bin_file(). Reading an .npz file takes a single np.load() and
+    no parsing of text.
+
+    If the constructor finds no English file but finds an .npz file,
+    it reads the latter. Also, an object of this class behaves as a
+    writable text file (it has write(), close() and closed), so it can be
+    passed to SEO_writer as its english_out, in which case every line
+    written is compiled as soon as it is complete, and close() writes the
+    .npz file. That is how SEO_writer(..., bin_eng=True) writes the binary
+    format directly, without ever writing an English file.
+
+    Attributes
+    ----------
+    closed : bool
+        True after close() has been called
+    file_prefix : str | None
+        file prefix of English file that was compiled. None if the circuit
+        was compiled from a list of lines.
+    fun_name_to_op_indices : dict[str, list[int]]
+        a dictionary mapping function name TO indices in self.ops of the
+        ops that depend on that functional placeholder
+    line_buffer : str
+        incomplete line received by write(), still waiting for its '\\n'
+    loop_to_nreps : dict[int, int]
+        a dictionary mapping loop number TO total number of repetitions of
+        loop
+    loop_to_start_index : dict[int, int]
+        a dictionary mapping loop number TO index in self.ops of first
+        operation after LOOP line
+    loop_to_start_line : dict[int, int]
+        a dictionary mapping loop number TO loop line + 1
+    num_bits : int
+        number of qubits in whole circuit
+    open_loops : list[int]
+        loop numbers of the LOOP lines compiled so far that haven't been
+        closed yet by their NEXT line
+    ops : list[tuple[str, list[str], tuple]]
+        list of operations, one per line of the English file
+    placeholder_op_indices : list[int]
+        indices in self.ops of all ops that have at least one placeholder
+        angle slot
+    placeholder_to_parts : dict[str, tuple[int, float, str, list[int]]]
+        a dictionary mapping each distinct placeholder str TO the tuple
+        (sign, scale_fac, fun_name, var_nums) obtained by parsing it once
+        with the static methods of PlaceholderManager
+    tot_num_lines : int
+        number of lines in English file
+    var_num_to_op_indices : dict[int, list[int]]
+        a dictionary mapping variable number TO indices in self.ops of the
+        ops that depend on that variable
+
+    """
+    # opcodes of binary files are indices into this list
+    line_names = ["DIAG", "HAD2", "IF_M(", "}IF_M", "LOOP", "MEAS", "MP_Y",
+                  "NEXT", "NOTA", "PHAS", "P0PH", "P1PH", "PRINT", "ROTX",
+                  "ROTY", "ROTZ", "ROTN", "SIGX", "SIGY", "SIGZ", "SWAP",
+                  "SWAY", "U_2_"]
+    # dtype of the records of binary files, one record per line
+    bin_dtype = np.dtype([('opcode', np.uint8), ('int0', np.int32),
+                          ('int1', np.int32), ('trol_end', np.int32),
+                          ('ang_end', np.int32)])
+
+    def __init__(self, file_prefix, num_bits, line_list=None):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_prefix : str | None
+            English file read is file_prefix + '_' + num_bits + "_eng.txt".
+            Can be None if line_list is given.
+        num_bits : int
+        line_list : list[str] | None
+            If this is not None, the English file is not read. Instead,
+            the lines of this list are compiled. See class SEO_Lista. If
+            it is None and the English file does not exist, the binary
+            file file_prefix + '_' + num_bits + "_eng.npz" is read instead,
+            and FileNotFoundError is raised if neither file exists.
+
+        Returns
+        -------
+
+        """
+        self.file_prefix = file_prefix
+        self.num_bits = num_bits
+        self.ops = []
+        self.tot_num_lines = 0
+        self.loop_to_start_index = {}
+        self.loop_to_start_line = {}
+        self.loop_to_nreps = {}
+        self.placeholder_op_indices = []
+        self.placeholder_to_parts = {}
+        self.var_num_to_op_indices = {}
+        self.fun_name_to_op_indices = {}
+        self.open_loops = []
+        self.line_buffer = ''
+        self.closed = False
+
+        if line_list is None:
+            path = file_prefix + '_' + str(num_bits) + '_eng.txt'
+            if os.path.isfile(path):
+                with open(path, 'rt') as f:
+                    self.compile_lines(f)
+            else:
+                bin_path = SEO_CompiledCkt.get_bin_file_path(
+                    file_prefix, num_bits)
+                if not os.path.isfile(bin_path):
+                    raise FileNotFoundError('found neither ' + path +
+                                            ' nor ' + bin_path)
+                self.read_bin_file(bin_path)
+        else:
+            self.compile_lines(line_list)
+
+    def compile_lines(self, lines):
+        """
+        Parses each item of `lines` and appends the result to self.ops.
+        Like SEO_reader, it stops at the first empty line.
+
+        Parameters
+        ----------
+        lines : Iterable[str]
+
+        Returns
+        -------
+        None
+
+        """
+        for line in lines:
+            if not line.strip():
+                break
+            self.add_op(SEO_CompiledCkt.parse_line(self.num_bits, line))
+
+    def add_op(self, op):
+        """
+        Appends the already parsed op `op` to self.ops, and updates the
+        loop and placeholder info of self.
+
+        Parameters
+        ----------
+        op : tuple[str, list[str], tuple]
+
+        Returns
+        -------
+        None
+
+        """
+        self.ops.append(op)
+        self.tot_num_lines += 1
+        self.record_placeholders(len(self.ops) - 1)
+        line_name, split_line, args = op
+        if line_name == "LOOP":
+            loop_num, nreps = args
+            assert loop_num not in self.loop_to_nreps.keys(),\
+                "this loop number has occurred before"
+            self.loop_to_start_index[loop_num] = len(self.ops)
+            self.loop_to_start_line[loop_num] = self.tot_num_lines + 1
+            self.loop_to_nreps[loop_num] = nreps
+            self.open_loops.append(loop_num)
+        elif line_name == "NEXT":
+            loop_num = args[0]
+            if not self.open_loops:
+                assert False, "unmatched NEXT"
+            if loop_num == self.open_loops[-1]:
+                del self.open_loops[-1]
+            else:
+                assert False, "improperly nested loops"
+
+    def record_placeholders(self, op_index):
+        """
+        Records in the dictionaries self.placeholder_to_parts,
+        self.var_num_to_op_indices and self.fun_name_to_op_indices any
+        placeholders found in the angle slots of op self.ops[op_index].
+
+        Parameters
+        ----------
+        op_index : int
+
+        Returns
+        -------
+        None
+
+        """
+        slots = SEO_CompiledCkt.get_angle_slots(self.ops[op_index])
+        var_names = [x for x in slots if isinstance(x, str)]
+        if not var_names:
+            return
+        self.placeholder_op_indices.append(op_index)
+        for var_name in var_names:
+            if var_name not in self.placeholder_to_parts:
+                self.placeholder_to_parts[var_name] = (
+                    PlaceholderManager.get_leg_var_sign(var_name),
+                    PlaceholderManager.get_leg_var_scale_fac(var_name),
+                    PlaceholderManager.get_leg_var_fun_name(var_name),
+                    PlaceholderManager.get_leg_var_var_nums(var_name))
+            sign, scale_fac, fun_name, var_nums = \
+                self.placeholder_to_parts[var_name]
+            for var_num in var_nums:
+                indices = self.var_num_to_op_indices.setdefault(var_num, [])
+                if not indices or indices[-1] != op_index:
+                    indices.append(op_index)
+            if fun_name:
+                indices = self.fun_name_to_op_indices.setdefault(
+                    fun_name, [])
+                if not indices or indices[-1] != op_index:
+                    indices.append(op_index)
+
+    @staticmethod
+    def get_angle_slots(op):
+        """
+        Returns a list of the angle slots (float or placeholder str) of the
+        op `op`, in the order in which they appear in the English line.
+
+        Parameters
+        ----------
+        op : tuple[str, list[str], tuple]
+
+        Returns
+        -------
+        list[float | str]
+
+        """
+        line_name, split_line, args = op
+        if line_name == "DIAG":
+            return list(args[1])
+        elif line_name == "MP_Y":
+            return list(args[2])
+        elif line_name == "PHAS":
+            return [args[0]]
+        elif line_name in ["P0PH", "P1PH", "ROTX", "ROTY", "ROTZ"]:
+            return [args[1]]
+        elif line_name == "ROTN":
+            return list(args[0:3])
+        elif line_name == "SWAY":
+            return list(args[3])
+        elif line_name == "U_2_":
+            return list(args[0:4])
+        return []
+
+    @staticmethod
+    def get_op_with_new_angle_slots(op, fun):
+        """
+        Returns a new op which is the same as `op` except that each angle
+        slot x has been replaced by fun(x).
+
+        Parameters
+        ----------
+        op : tuple[str, list[str], tuple]
+        fun : function
+
+        Returns
+        -------
+        tuple[str, list[str], tuple]
+
+        """
+        line_name, split_line, args = op
+        if line_name == "DIAG":
+            args = (args[0], [fun(x) for x in args[1]])
+        elif line_name == "MP_Y":
+            args = args[0:2] + ([fun(x) for x in args[2]],)
+        elif line_name == "PHAS":
+            args = (fun(args[0]),) + args[1:]
+        elif line_name in ["P0PH", "P1PH", "ROTX", "ROTY", "ROTZ"]:
+            args = (args[0], fun(args[1])) + args[2:]
+        elif line_name == "ROTN":
+            args = tuple(fun(x) for x in args[0:3]) + args[3:]
+        elif line_name == "SWAY":
+            args = args[0:3] + ([fun(x) for x in args[3]],)
+        elif line_name == "U_2_":
+            args = tuple(fun(x) for x in args[0:4]) + args[4:]
+        return line_name, split_line, args
+
+    def bind_vars(self, var_num_to_rads, fun_name_to_fun=None):
+        """
+        Returns a new SEO_CompiledCkt which is the same as self except that
+        every placeholder angle slot that can be resolved using the
+        dictionaries var_num_to_rads and fun_name_to_fun has been replaced
+        by a float. Placeholders that can't be resolved are left as is (
+        they might be resolved later by the PlaceholderManager of the
+        SEO_reader that replays the circuit). The rules for resolving a
+        placeholder are the same as in PlaceholderManager.degs_str_to_rads(
+        ). Only the ops in self.placeholder_op_indices are rebuilt.
+
+        Parameters
+        ----------
+        var_num_to_rads : dict[int, float]
+        fun_name_to_fun : dict[str, function] | None
+
+        Returns
+        -------
+        SEO_CompiledCkt
+
+        """
+        if fun_name_to_fun is None:
+            fun_name_to_fun = {}
+
+        def resolve(x):
+            if not isinstance(x, str):
+                return x
+            sign, scale_fac, fun_name, var_nums = \
+                self.placeholder_to_parts[x]
+            if not all([var_num in var_num_to_rads for
+                        var_num in var_nums]):
+                return x
+            if not fun_name:
+                return sign*var_num_to_rads[var_nums[0]]*scale_fac
+            if fun_name not in fun_name_to_fun:
+                return x
+            fun = fun_name_to_fun[fun_name]
+            return sign*fun(*[var_num_to_rads[var_num]
+                              for var_num in var_nums])
+
+        bound_ckt = cp.copy(self)
+        bound_ckt.ops = list(self.ops)
+        for k in self.placeholder_op_indices:
+            bound_ckt.ops[k] = SEO_CompiledCkt.get_op_with_new_angle_slots(
+                self.ops[k], resolve)
+        bound_ckt.record_all_placeholders()
+        return bound_ckt
+
+    def get_sub_ckt(self, beg, end):
+        """
+        Returns a new SEO_CompiledCkt whose ops are self.ops[beg:end],
+        without any re-parsing. The ops are shared with self. The loop and
+        placeholder info of the loops and ops in that range is copied from
+        self, with indices shifted by -beg. The range must not cut any
+        loop, except that it may be the body of a loop (from the op after
+        its LOOP op to the op before its NEXT op).
+
+        Parameters
+        ----------
+        beg : int
+        end : int
+
+        Returns
+        -------
+        SEO_CompiledCkt
+
+        """
+        sub_ckt = SEO_CompiledCkt(self.file_prefix, self.num_bits,
+                                  line_list=[])
+        sub_ckt.ops = self.ops[beg:end]
+        sub_ckt.tot_num_lines = end - beg
+        for loop_num, start in self.loop_to_start_index.items():
+            # start - 1 is the index of the LOOP op
+            if beg <= start - 1 < end:
+                sub_ckt.loop_to_start_index[loop_num] = start - beg
+                sub_ckt.loop_to_start_line[loop_num] = \
+                    self.loop_to_start_line[loop_num] - beg
+                sub_ckt.loop_to_nreps[loop_num] = \
+                    self.loop_to_nreps[loop_num]
+        sub_ckt.placeholder_op_indices = [
+            k - beg for k in self.placeholder_op_indices if beg <= k < end]
+        sub_ckt.record_all_placeholders()
+        return sub_ckt
+
+    def record_all_placeholders(self):
+        """
+        Empties and then refills the placeholder dictionaries of self by
+        calling record_placeholders() for all the ops in
+        self.placeholder_op_indices.
+
+        Returns
+        -------
+        None
+
+        """
+        op_indices = self.placeholder_op_indices
+        self.placeholder_op_indices = []
+        self.placeholder_to_parts = {}
+        self.var_num_to_op_indices = {}
+        self.fun_name_to_op_indices = {}
+        for k in op_indices:
+            self.record_placeholders(k)
+
+    def write(self, s):
+        """
+        Makes self behave like a text file open for writing. s is
+        appended to self.line_buffer, and every complete line in the
+        buffer is compiled. Empty lines are ignored.
+
+        Parameters
+        ----------
+        s : str
+
+        Returns
+        -------
+        None
+
+        """
+        assert not self.closed
+        lines = (self.line_buffer + s).split('\n')
+        self.line_buffer = lines[-1]
+        for line in lines[:-1]:
+            if line.strip():
+                self.add_op(SEO_CompiledCkt.parse_line(self.num_bits, line))
+
+    def close(self):
+        """
+        Compiles whatever is left in self.line_buffer and then, if
+        self.file_prefix is not None, writes the binary file of self.
+        Closing a second time does nothing.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.closed:
+            return
+        self.write('\n')
+        self.closed = True
+        if self.file_prefix is not None:
+            self.write_bin_file()
+
+    @staticmethod
+    def get_bin_file_path(file_prefix, num_bits):
+        """
+        Returns path to binary version of English file.
+
+        Parameters
+        ----------
+        file_prefix : str
+        num_bits : int
+
+        Returns
+        -------
+        str
+
+        """
+        return file_prefix + '_' + str(num_bits) + '_eng.npz'
+
+    @staticmethod
+    def get_angle_tokens(op):
+        """
+        Returns the list of tokens of split_line that hold the angle
+        slots of op `op`, in the same order as get_angle_slots().
+
+        Parameters
+        ----------
+        op : tuple[str, list[str], tuple]
+
+        Returns
+        -------
+        list[str]
+
+        """
+        line_name, split_line, args = op
+        if line_name in ["DIAG", "MP_Y"]:
+            return split_line[split_line.index('BY') + 1:]
+        elif line_name in ["PHAS", "P0PH", "P1PH", "ROTX", "ROTY", "ROTZ"]:
+            return split_line[1:2]
+        elif line_name == "ROTN":
+            return split_line[1:4]
+        elif line_name == "SWAY":
+            return split_line[4:6]
+        elif line_name == "U_2_":
+            return split_line[1:5]
+        return []
+
+    def write_bin_file(self, path=None):
+        """
+        Writes self in binary format to a compressed .npz file. If
+        path is None, the path is
+        get_bin_file_path(self.file_prefix, self.num_bits).
+
+        The .npz file contains the following arrays:
+
+        * num_bits: scalar int
+        * ops: structured array with one record per line. Field opcode
+        is the index of the line name in SEO_CompiledCkt.line_names.
+        Fields int0 and int1 are the int arguments of the line (target
+        bit, swapped bits, loop number and nreps, kind of measurement,
+        index into strs of the text of a NOTA or PRINT line), or -1.
+        Fields trol_end and ang_end are the end offsets (as in a CSR
+        sparse matrix) of the controls and angles of the line.
+        * trol_bits, trol_kinds: bit position and kind of each control.
+        Kinds True and False are stored as -1 and -2, and int kinds (as
+        in 2:1) as themselves.
+        * angs: each angle slot, in degrees. It is exactly the float of
+        the token in the English file, so no round-off is introduced.
+        Placeholders are stored as NaN.
+        * ph_ang_indices, ph_strs: indices into angs of the placeholders,
+        and their strs
+        * strs: text of NOTA and PRINT lines
+
+        Parameters
+        ----------
+        path : str | None
+
+        Returns
+        -------
+        None
+
+        """
+        if path is None:
+            path = SEO_CompiledCkt.get_bin_file_path(
+                self.file_prefix, self.num_bits)
+        num_ops = len(self.ops)
+        recs = np.zeros(num_ops, dtype=SEO_CompiledCkt.bin_dtype)
+        opcodes = np.zeros(num_ops, dtype=np.uint8)
+        int0 = np.full(num_ops, -1, dtype=np.int32)
+        int1 = np.full(num_ops, -1, dtype=np.int32)
+        trol_ends = np.zeros(num_ops, dtype=np.int32)
+        ang_ends = np.zeros(num_ops, dtype=np.int32)
+        trol_bits = []
+        trol_kinds = []
+        angs = []
+        ph_ang_indices = []
+        ph_strs = []
+        strs = []
+        for k, op in enumerate(self.ops):
+            line_name, split_line, args = op
+            opcodes[k] = SEO_CompiledCkt.line_names.index(line_name)
+            if line_name in ["NOTA", "PRINT"]:
+                int0[k] = len(strs)
+                strs.append(args[0])
+            elif line_name in ["LOOP", "MEAS", "SWAP", "SWAY"]:
+                int0[k], int1[k] = args[0:2]
+            elif line_name == "NEXT":
+                int0[k] = args[0]
+            elif line_name in ["HAD2", "MP_Y"]:
+                int0[k] = args[0]
+            elif line_name in ["SIGX", "SIGY", "SIGZ"]:
+                int0[k] = args[1]
+            elif line_name in ["PHAS", "ROTN", "U_2_"]:
+                int0[k] = args[-2]
+            elif line_name in ["P0PH", "P1PH", "ROTX", "ROTY", "ROTZ"]:
+                int0[k] = args[2]
+            trols = [x for x in args if isinstance(x, Controls)]
+            if trols:
+                trol_bits += trols[0].bit_pos
+                trol_kinds += [(-1 if x else -2) if isinstance(x, bool)
+                               else x for x in trols[0].kinds]
+            trol_ends[k] = len(trol_bits)
+            for tok in SEO_CompiledCkt.get_angle_tokens(op):
+                if PlaceholderManager.is_legal_var_name(tok):
+                    ph_ang_indices.append(len(angs))
+                    ph_strs.append(tok)
+                    angs.append(np.nan)
+                else:
+                    angs.append(float(tok))
+            ang_ends[k] = len(angs)
+        recs['opcode'] = opcodes
+        recs['int0'] = int0
+        recs['int1'] = int1
+        recs['trol_end'] = trol_ends
+        recs['ang_end'] = ang_ends
+        np.savez_compressed(path,
+                 num_bits=np.array(self.num_bits),
+                 ops=recs,
+                 trol_bits=np.array(trol_bits, dtype=np.int16),
+                 trol_kinds=np.array(trol_kinds, dtype=np.int16),
+                 angs=np.array(angs, dtype=np.float64),
+                 ph_ang_indices=np.array(ph_ang_indices, dtype=np.int64),
+                 ph_strs=np.array(ph_strs, dtype=str),
+                 strs=np.array(strs, dtype=str))
+
+    def read_bin_file(self, path):
+        """
+        Reads, with a single np.load(), a binary file written by
+        write_bin_file(), and appends its ops to self.ops. The args of
+        each op are built directly from the arrays of the file, and its
+        split_line is rebuilt from them, so no text is parsed. Angles
+        are converted to radians exactly as parse_line() does.
+
+        Parameters
+        ----------
+        path : str
+
+        Returns
+        -------
+        None
+
+        """
+        with np.load(path) as npz:
+            assert int(npz['num_bits']) == self.num_bits, \
+                "binary file has wrong number of qubits"
+            recs = npz['ops']
+            trol_bits = npz['trol_bits'].tolist()
+            int_kinds = npz['trol_kinds'].tolist()
+            trol_kinds = [(x == -1) if x < 0 else x for x in int_kinds]
+            all_trol_toks = [str(bit) + ('T' if kind == -1 else 'F' if
+                                         kind == -2 else ':' + str(kind))
+                             for bit, kind in zip(trol_bits, int_kinds)]
+            degs = npz['angs']
+            ang_strs = [str(x) for x in degs.tolist()]
+            ang_slots = (degs*np.pi/180).tolist()
+            for k, x in zip(npz['ph_ang_indices'].tolist(),
+                            npz['ph_strs'].tolist()):
+                ang_strs[k] = x
+                ang_slots[k] = x
+            strs = npz['strs'].tolist()
+        num_bits = self.num_bits
+        line_names = SEO_CompiledCkt.line_names
+        trol_beg = 0
+        ang_beg = 0
+        for opcode, int0, int1, trol_end, ang_end in recs.tolist():
+            line_name = line_names[opcode]
+            # the controls were stored in the order given by
+            # Controls.refresh_lists(), so no need to call it again
+            trols = Controls(num_bits)
+            if trol_end > trol_beg:
+                trols.bit_pos = tuple(trol_bits[trol_beg:trol_end])
+                trols.kinds = tuple(trol_kinds[trol_beg:trol_end])
+                trols.bit_pos_to_kind = dict(zip(trols.bit_pos, trols.kinds))
+            trol_toks = all_trol_toks[trol_beg:trol_end]
+            if_toks = ['IF'] + trol_toks if trol_toks else []
+            slots = ang_slots[ang_beg:ang_end]
+            toks = ang_strs[ang_beg:ang_end]
+            trol_beg, ang_beg = trol_end, ang_end
+
+            if line_name == "DIAG":
+                split_line = ['DIAG', 'IF'] + trol_toks + ['BY'] + toks
+                args = (trols, slots)
+            elif line_name == "HAD2":
+                split_line = ['HAD2', 'AT', str(int0)] + if_toks
+                args = (int0, trols)
+            elif line_name == "IF_M(":
+                split_line = ['IF_M('] + trol_toks + ['){']
+                args = (trols,)
+            elif line_name == "}IF_M":
+                split_line = ['}IF_M']
+                args = ()
+            elif line_name == "LOOP":
+                split_line = ['LOOP', str(int0), 'NREPS=', str(int1)]
+                args = (int0, int1)
+            elif line_name == "MEAS":
+                split_line = ['MEAS', str(int0), 'AT', str(int1)]
+                args = (int0, int1)
+            elif line_name == "MP_Y":
+                split_line = ['MP_Y', 'AT', str(int0), 'IF'] + trol_toks +\
+                    ['BY'] + toks
+                args = (int0, trols, slots)
+            elif line_name == "NEXT":
+                split_line = ['NEXT', str(int0)]
+                args = (int0,)
+            elif line_name == "NOTA":
+                split_line = ['NOTA'] + strs[int0].split()
+                args = (strs[int0],)
+            elif line_name == "PHAS":
+                split_line = ['PHAS'] + toks + ['AT', str(int0)] + if_toks
+                args = (slots[0], int0, trols)
+            elif line_name in ["P0PH", "P1PH"]:
+                split_line = [line_name] + toks + ['AT', str(int0)] + if_toks
+                args = (0 if line_name == "P0PH" else 1, slots[0], int0,
+                        trols)
+            elif line_name == "PRINT":
+                split_line = ['PRINT', strs[int0]]
+                args = (strs[int0],)
+            elif line_name in ["ROTX", "ROTY", "ROTZ"]:
+                split_line = [line_name] + toks + ['AT', str(int0)] + if_toks
+                axis = {"ROTX": 1, "ROTY": 2, "ROTZ": 3}[line_name]
+                args = (axis, slots[0], int0, trols)
+            elif line_name == "ROTN":
+                split_line = ['ROTN'] + toks + ['AT', str(int0)] + if_toks
+                args = tuple(slots) + (int0, trols)
+            elif line_name in ["SIGX", "SIGY", "SIGZ"]:
+                split_line = [line_name, 'AT', str(int0)] + if_toks
+                axis = {"SIGX": 1, "SIGY": 2, "SIGZ": 3}[line_name]
+                args = (axis, int0, trols)
+            elif line_name == "SWAP":
+                split_line = ['SWAP', str(int0), str(int1)] + if_toks
+                args = (int0, int1, trols)
+            elif line_name == "SWAY":
+                split_line = ['SWAY', str(int0), str(int1), 'BY'] + toks +\
+                    if_toks
+                args = (int0, int1, trols, slots)
+            else:  # line_name == "U_2_"
+                split_line = ['U_2_'] + toks + ['AT', str(int0)] + if_toks
+                args = tuple(slots) + (int0, trols)
+            self.add_op((line_name, split_line, args))
+
+    def get_eng_lines(self):
+        """
+        Returns a list of the lines (without '\\n') of an English file
+        equivalent to self. Tokens are separated by tabs, and the lines
+        inside a loop are indented by 4 spaces per loop level, as
+        SEO_writer does. If self was read from a binary file, keywords
+        are normalized too, e.g., the third token of a LOOP line is always
+        'NREPS='.
+
+        Returns
+        -------
+        list[str]
+
+        """
+        lines = []
+        indentation = 0
+        for line_name, split_line, args in self.ops:
+            if line_name == "NEXT":
+                indentation -= 4
+            if line_name == "NOTA":
+                # keep the whitespace inside the note
+                lines.append(' '*indentation + 'NOTA\t' + args[0])
+            else:
+                lines.append(' '*indentation + '\t'.join(split_line))
+            if line_name == "LOOP":
+                indentation += 4
+        return lines
+
+    def write_eng_file(self, path=None):
+        """
+        Writes an English file equivalent to self. If path is None, the
+        path is file_prefix + '_' + num_bits + "_eng.txt".
+
+        Parameters
+        ----------
+        path : str | None
+
+        Returns
+        -------
+        None
+
+        """
+        if path is None:
+            path = self.file_prefix + '_' + str(self.num_bits) + '_eng.txt'
+        with open(path, 'wt') as f:
+            for line in self.get_eng_lines():
+                f.write(line + '\n')
+
+    @staticmethod
+    def eng_file_to_bin_file(file_prefix, num_bits):
+        """
+        Converts the English file with file prefix `file_prefix` into a
+        binary file with the same file prefix.
+
+        Parameters
+        ----------
+        file_prefix : str
+        num_bits : int
+
+        Returns
+        -------
+        None
+
+        """
+        path = file_prefix + '_' + str(num_bits) + '_eng.txt'
+        with open(path, 'rt') as f:
+            ckt = SEO_CompiledCkt(None, num_bits, line_list=f)
+        ckt.file_prefix = file_prefix
+        ckt.write_bin_file()
+
+    @staticmethod
+    def bin_file_to_eng_file(file_prefix, num_bits):
+        """
+        Converts the binary file with file prefix `file_prefix` into an
+        English file with the same file prefix. The English file has the
+        same ops as the one the binary file was made from, but its
+        whitespace and keywords are normalized (see get_eng_lines()).
+
+        Parameters
+        ----------
+        file_prefix : str
+        num_bits : int
+
+        Returns
+        -------
+        None
+
+        """
+        ckt = SEO_CompiledCkt(None, num_bits, line_list=[])
+        ckt.file_prefix = file_prefix
+        ckt.read_bin_file(
+            SEO_CompiledCkt.get_bin_file_path(file_prefix, num_bits))
+        ckt.write_eng_file()
+
+    @staticmethod
+    def degs_str_to_rads_slot(degs_str):
+        """
+        Returns degs_str unchanged if it is a legal placeholder variable
+        name, or else float(degs_str)*pi/180. This is the same value that
+        PlaceholderManager.degs_str_to_rads() returns for a non-variable.
+
+        Parameters
+        ----------
+        degs_str : str
+
+        Returns
+        -------
+        float | str
+
+        """
+        if PlaceholderManager.is_legal_var_name(degs_str):
+            return degs_str
+        try:
+            y = float(degs_str)*np.pi/180
+        except:
+            assert False, 'tried to convert ' + str(degs_str)\
+                + ' to a float'
+        return y
+
+    @staticmethod
+    def read_multi_controls(num_bits, tokens, allow_only_TF=False):
+        """
+        Given a list of tokens of the form:
+        * an int followed by either T or F,
+        * int, colon, int,
+
+        construct a control out of it.
+
+        Parameters
+        ----------
+        num_bits : int
+        tokens : list[str]
+        allow_only_TF : bool
+
+        Returns
+        -------
+        Controls
+
+        """
+        # safe to use when no "IF"
+        # when no "IF", will return controls with _numControls=0
+        controls = Controls(num_bits)
+        if tokens:
+            for t in tokens:
+                t_end = t[-1]
+                if allow_only_TF:
+                    assert t_end in ['T', 'F']
+                if t_end == 'T':
+                    controls.set_control(int(t[:-1]), True)
+                elif t_end == 'F':
+                    controls.set_control(int(t[:-1]), False)
+                else:
+                    k1, k2 = t.split(':')
+                    controls.set_control(int(k1), int(k2))
+            controls.refresh_lists()
+        return controls
+
+    @staticmethod
+    def parse_line(num_bits, line):
+        """
+        Parses one line of an English file and returns it as a tuple (
+        line_name, split_line, args). See class docstring.
+
+        Parameters
+        ----------
+        num_bits : int
+        line : str
+
+        Returns
+        -------
+        tuple[str, list[str], tuple]
+
+        """
+        split_line = line.split()
+        line_name = split_line[0]
+
+        def TF_trols(tokens):
+            return SEO_CompiledCkt.read_multi_controls(
+                num_bits, tokens, allow_only_TF=True)
+        slot = SEO_CompiledCkt.degs_str_to_rads_slot
+
+        if line_name == "DIAG":
+            # example:
+            # DIAG IF 2:1 1:0  0T BY 30.0 10.5 11.0 83.1
+
+            BY_pos = split_line.index('BY')
+            trols = SEO_CompiledCkt.read_multi_controls(
+                num_bits, split_line[2: BY_pos])
+            rad_angles = [slot(t) for t in split_line[BY_pos + 1:]]
+            args = (trols, rad_angles)
+
+        elif line_name == "HAD2":
+            # example:
+            # HAD2 AT 1 IF 3F 2T
+
+            args = (int(split_line[2]), TF_trols(split_line[4:]))
+
+        elif line_name == "IF_M(":
+            # example:
+            # IF_M( 3F 2T ){
+
+            args = (TF_trols(split_line[1:-1]),)
+
+        elif line_name == "}IF_M":
+            args = ()
+
+        elif line_name == "LOOP":
+            # example:
+            # LOOP 5 NREPS= 2
+
+            args = (int(split_line[1]), int(split_line[3]))
+
+        elif line_name == "MEAS":
+            # example:
+            # MEAS  2  AT  5
+
+            args = (int(split_line[1]), int(split_line[3]))
+
+        elif line_name == "MP_Y":
+            # example:
+            # MP_Y AT 3 IF 2:1 1:0  0T BY 30.0 10.5 11.0 83.1
+
+            BY_pos = split_line.index('BY')
+            trols = SEO_CompiledCkt.read_multi_controls(
+                num_bits, split_line[4: BY_pos])
+            rad_angles = [slot(t) for t in split_line[BY_pos + 1:]]
+            args = (int(split_line[2]), trols, rad_angles)
+
+        elif line_name == "NEXT":
+            # example:
+            # NEXT 5
+
+            args = (int(split_line[1]),)
+
+        elif line_name == 'NOTA':
+            # example:
+            # NOTA  "I love you Mary."
+
+            args = (line[4:].strip(),)
+
+        elif line_name == "PHAS":
+            # example:
+            # PHAS 42.7 AT 1 IF 3F 2T
+
+            args = (slot(split_line[1]), int(split_line[3]),
+                    TF_trols(split_line[5:]))
+
+        elif line_name in ["P0PH", "P1PH"]:
+            # example:
+            # P0PH 42.7 AT 1 IF 3F 2T
+
+            projection_bit = 0 if line_name == "P0PH" else 1
+            args = (projection_bit, slot(split_line[1]),
+                    int(split_line[3]), TF_trols(split_line[5:]))
+
+        elif line_name == "PRINT":
+            # example:
+            # PRINT V1
+            assert len(split_line) == 2, \
+                "PRINT line must contain style str"
+            args = (split_line[1],)
+
+        elif line_name in ["ROTX", "ROTY", "ROTZ"]:
+            # example:
+            # ROTX 42.7 AT 1 IF 3F 2T
+
+            axis = {"ROTX": 1, "ROTY": 2, "ROTZ": 3}[line_name]
+            args = (axis, slot(split_line[1]), int(split_line[3]),
+                    TF_trols(split_line[5:]))
+
+        elif line_name == "ROTN":
+            # example:
+            # ROTN 42.7 30.2 78.5 AT 1 IF 3F 2T
+
+            args = (slot(split_line[1]), slot(split_line[2]),
+                    slot(split_line[3]), int(split_line[5]),
+                    TF_trols(split_line[7:]))
+
+        elif line_name in ["SIGX", "SIGY", "SIGZ"]:
+            # example:
+            # SIGX AT 1 IF 3F 2T
+
+            axis = {"SIGX": 1, "SIGY": 2, "SIGZ": 3}[line_name]
+            args = (axis, int(split_line[2]), TF_trols(split_line[4:]))
+
+        elif line_name == "SWAP":
+            # example:
+            # SWAP 1 0 IF 3F 2T
+
+            args = (int(split_line[1]), int(split_line[2]),
+                    TF_trols(split_line[4:]))
+
+        elif line_name == "SWAY":
+            # example:
+            # SWAY 0 1 BY 25.1 42.7 IF 3F 2T
+
+            rads_list = [slot(split_line[k]) for k in range(4, 6)]
+            args = (int(split_line[1]), int(split_line[2]),
+                    TF_trols(split_line[7:]), rads_list)
+
+        elif line_name == "U_2_":
+            # example:
+            # U_2_  25.1 42.7 30.2 78.5 AT 1 IF 3F 2T
+
+            args = tuple(slot(split_line[k]) for k in range(1, 5)) + \
+                (int(split_line[6]), TF_trols(split_line[8:]))
+        else:
+            assert False, \
+                "reading an unsupported line kind: " + line_name
+
+        return line_name, split_line, args
+
+if __name__ == "__main__":
+    from SEO_simulator import *
+
+    def main():
+        # compile once, simulate twice, once with each of 2 initial states
+        file_prefix = 'io_folder/sim_test2'
+        num_bits = 4
+        ckt = SEO_CompiledCkt(file_prefix, num_bits)
+        print('number of ops=', len(ckt.ops))
+        print('loop_to_nreps=', ckt.loop_to_nreps)
+        for spin_dir_list in [[0, 0, 0, 0], [0, 1, 1, 0]]:
+            init_st_vec = StateVec.get_standard_basis_st_vec(spin_dir_list)
+            sim = SEO_simulator(file_prefix, num_bits,
+                                init_st_vec=init_st_vec, compiled_ckt=ckt)
+            sim1 = SEO_simulator(file_prefix, num_bits,
+                init_st_vec=StateVec.get_standard_basis_st_vec(
+                    spin_dir_list))
+            err = np.linalg.norm(sim.cur_st_vec_dict['pure'].arr -
+                                 sim1.cur_st_vec_dict['pure'].arr)
+            print('compiled vs file error=', err)
+
+        # compile a circuit with placeholders once, then bind its
+        # variables to new values many times without re-reading it
+        file_prefix = 'io_folder/placeholder_test'
+        num_bits = 4
+        ckt = SEO_CompiledCkt(file_prefix, num_bits)
+        print('var_num_to_op_indices=', ckt.var_num_to_op_indices)
+        print('fun_name_to_op_indices=', ckt.fun_name_to_op_indices)
+
+        def my_fun1(x):
+            return x*.5
+
+        def my_fun2(x, y):
+            return x + y
+        fun_name_to_fun = {'my_fun1': my_fun1, 'my_fun2': my_fun2}
+        for var_num_to_rads in [{1: .3, 2: .5, 3: .7},
+                                {1: -.1, 2: 1.2, 3: .4}]:
+            bound_ckt = ckt.bind_vars(var_num_to_rads, fun_name_to_fun)
+            assert not bound_ckt.placeholder_op_indices
+            sim = SEO_simulator(file_prefix, num_bits,
+                                compiled_ckt=bound_ckt)
+            vman = PlaceholderManager(var_num_to_rads=var_num_to_rads,
+                                      fun_name_to_fun=fun_name_to_fun)
+            sim1 = SEO_simulator(file_prefix, num_bits, vars_manager=vman)
+            err = np.linalg.norm(sim.cur_st_vec_dict['pure'].arr -
+                                 sim1.cur_st_vec_dict['pure'].arr)
+            print('bound vs file error=', err)
+
+        # convert an English file to binary format and back, and simulate
+        # the binary file
+        file_prefix = 'io_folder/sim_test2'
+        num_bits = 4
+        SEO_CompiledCkt.eng_file_to_bin_file(file_prefix, num_bits)
+        bin_ckt = SEO_CompiledCkt(None, num_bits, line_list=[])
+        bin_ckt.read_bin_file(
+            SEO_CompiledCkt.get_bin_file_path(file_prefix, num_bits))
+        print('\n'.join(bin_ckt.get_eng_lines()))
+        sim = SEO_simulator(file_prefix, num_bits, compiled_ckt=bin_ckt)
+        sim1 = SEO_simulator(file_prefix, num_bits)
+        err = np.linalg.norm(sim.cur_st_vec_dict['pure'].arr -
+                             sim1.cur_st_vec_dict['pure'].arr)
+        print('binary vs file error=', err)
+        os.remove(SEO_CompiledCkt.get_bin_file_path(file_prefix, num_bits))
+    main()
@@ -0,0 +1,375 @@
+import os
+import sys
+if 'autograd.numpy' not in sys.modules:
+    import numpy as np
+else:
+    import autograd.numpy as np
+
+
+class SEO_LineIndex:
+    """
+    An object of this class is an index of an English file. It is built
+    by scanning the English file once, and it is saved, as an .npz file,
+    next to the English file (a sidecar file), with the same name as the
+    English file except that it ends in '_eng_idx.npz' instead of
+    '_eng.txt'. Thereafter, the constructor loads the sidecar file instead
+    of scanning the English file again, unless the English file has been
+    modified since the index was built (its modification time in ns or its
+    size differ from the ones stored in the sidecar file), in which case
+    the index is rebuilt and saved again.
+
+    The index holds
+
+    * the byte offset of the beginning of every line, so any line can be
+    read directly with a seek() (see read_lines())
+    * the LOOP/NEXT structure, with the same dictionaries as
+    class SEO_pre_reader, and the loop depth of every line
+    * the number of lines of each kind (HAD2, ROTX, etc.)
+    * how many lines use (as target or control) each qubit
+
+    so circuit stats are available without reading the English file (see
+    describe()), and the English file can be split into chunks, at line
+    boundaries outside any loop, that can be compiled or translated in
+    parallel (see get_chunk_line_ranges()).
+
+    Lines are labelled by their index k = 0, 1, 2, ..., which is 1 less
+    than their line number in the log files of SEO_reader. Like
+    SEO_reader, the scan stops at the first empty line.
+
+    Class SEO_pre_reader uses this class, instead of scanning the English
+    file itself, when the English file is at least min_file_size bytes
+    long. Smaller English files are scanned without leaving a sidecar file.
+
+    Attributes
+    ----------
+    bit_num_uses : np.ndarray
+        int array of shape (num_bits,). Entry bit is the number of lines
+        that have qubit bit as a target or a control. Qubits with 0 uses
+        are idle.
+    eng_mtime_ns : int
+        modification time in ns of the English file when the index was
+        built
+    eng_size : int
+        size in bytes of the English file when the index was built
+    file_prefix : str
+    line_depths : np.ndarray
+        int array of shape (tot_num_lines,). Entry k is the number of
+        loops that are open when line k is reached (so a NEXT line is
+        inside its own loop but a LOOP line isn't)
+    line_name_to_count : dict[str, int]
+        dictionary mapping line name (first word of line) TO number of
+        lines with that name
+    line_offsets : np.ndarray
+        int array of shape (tot_num_lines + 1,). Entry k is the byte offset
+        of the beginning of line k. The last entry is the offset of the
+        end of the last line.
+    loop_to_nreps : dict[int, int]
+        a dictionary mapping loop number TO total number of repetitions of
+        loop
+    loop_to_start_line : dict[int, int]
+        a dictionary mapping loop number TO loop line + 1
+    loop_to_start_offset : dict[int, int]
+        a dictionary mapping loop number TO byte offset of loop's start
+    num_bits : int
+    tot_num_lines : int
+        number of lines in English file
+
+    """
+    # SEO_pre_reader only uses an index for English files at least this
+    # many bytes long
+    min_file_size = 1 << 20
+
+    def __init__(self, file_prefix, num_bits, rebuild=False):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_prefix : str
+        num_bits : int
+        rebuild : bool
+            if True, the index is rebuilt and saved even if the sidecar
+            file is up to date
+
+        Returns
+        -------
+
+        """
+        self.file_prefix = file_prefix
+        self.num_bits = num_bits
+        stat = os.stat(self.get_eng_file_path())
+        self.eng_mtime_ns = stat.st_mtime_ns
+        self.eng_size = stat.st_size
+        if rebuild or not self.load():
+            self.build()
+            self.save()
+
+    def get_eng_file_path(self):
+        """
+        Returns path to English file
+
+        Returns
+        -------
+        str
+
+        """
+        return self.file_prefix + '_' + str(self.num_bits) + '_eng.txt'
+
+    def get_idx_file_path(self):
+        """
+        Returns path to sidecar file of index
+
+        Returns
+        -------
+        str
+
+        """
+        return self.file_prefix + '_' + str(self.num_bits) + '_eng_idx.npz'
+
+    @staticmethod
+    def get_used_bits(split_line):
+        """
+        Returns a list of the qubits that are used, as target or control,
+        by the English line whose tokens are split_line.
+
+        Parameters
+        ----------
+        split_line : list[str]
+
+        Returns
+        -------
+        list[int]
+
+        """
+        line_name = split_line[0]
+        if line_name in ["HAD2", "MP_Y", "SIGX", "SIGY", "SIGZ"]:
+            tars = [split_line[2]]
+        elif line_name in ["MEAS", "PHAS", "P0PH", "P1PH",
+                           "ROTX", "ROTY", "ROTZ"]:
+            tars = [split_line[3]]
+        elif line_name == "ROTN":
+            tars = [split_line[5]]
+        elif line_name == "U_2_":
+            tars = [split_line[6]]
+        elif line_name in ["SWAP", "SWAY"]:
+            tars = split_line[1:3]
+        else:
+            tars = []
+
+        if line_name == "IF_M(":
+            trols = split_line[1:-1]
+        elif 'IF' in split_line:
+            trols = split_line[split_line.index('IF') + 1:]
+            if 'BY' in trols:
+                trols = trols[:trols.index('BY')]
+        else:
+            trols = []
+        return [int(t) for t in tars] +\
+            [int(t.rstrip('TF').split(':')[0]) for t in trols]
+
+    def build(self):
+        """
+        Builds the index by scanning the English file once.
+
+        Returns
+        -------
+        None
+
+        """
+        line_offsets = [0]
+        line_depths = []
+        self.line_name_to_count = {}
+        self.loop_to_start_offset = {}
+        self.loop_to_start_line = {}
+        self.loop_to_nreps = {}
+        bit_num_uses = [0]*self.num_bits
+        loop_queue = []
+        with open(self.get_eng_file_path(), 'rb') as f:
+            for line in f:
+                split_line = line.decode().split()
+                if not split_line:
+                    break
+                line_name = split_line[0]
+                line_depths.append(len(loop_queue))
+                if line_name == "NEXT":
+                    loop_num = int(split_line[1])
+                    assert loop_queue, "unmatched NEXT"
+                    assert loop_num == loop_queue[-1], \
+                        "improperly nested loops"
+                    del loop_queue[-1]
+                line_offsets.append(line_offsets[-1] + len(line))
+                self.line_name_to_count[line_name] = \
+                    self.line_name_to_count.get(line_name, 0) + 1
+                if line_name == "LOOP":
+                    # example:
+                    # LOOP 5 NREPS= 2
+                    loop_num = int(split_line[1])
+                    assert loop_num not in self.loop_to_nreps.keys(), \
+                        "this loop number has occurred before"
+                    self.loop_to_start_offset[loop_num] = line_offsets[-1]
+                    self.loop_to_start_line[loop_num] = len(line_depths) + 1
+                    self.loop_to_nreps[loop_num] = int(split_line[3])
+                    loop_queue.append(loop_num)
+                elif line_name != "NOTA":
+                    for bit in set(SEO_LineIndex.get_used_bits(split_line)):
+                        bit_num_uses[bit] += 1
+        self.line_offsets = np.array(line_offsets, dtype=np.int64)
+        self.line_depths = np.array(line_depths, dtype=np.int32)
+        self.bit_num_uses = np.array(bit_num_uses, dtype=np.int64)
+        self.tot_num_lines = len(line_depths)
+
+    def save(self):
+        """
+        Saves the index in its sidecar file. If the sidecar file can't be
+        written (e.g., the folder is read only), the index is just not
+        saved.
+
+        Returns
+        -------
+        None
+
+        """
+        loop_nums = sorted(self.loop_to_nreps.keys())
+        try:
+            np.savez(self.get_idx_file_path(),
+                     num_bits=np.array(self.num_bits),
+                     eng_mtime_ns=np.array(self.eng_mtime_ns),
+                     eng_size=np.array(self.eng_size),
+                     line_offsets=self.line_offsets,
+                     line_depths=self.line_depths,
+                     bit_num_uses=self.bit_num_uses,
+                     line_names=np.array(
+                         list(self.line_name_to_count.keys()), dtype=str),
+                     line_counts=np.array(
+                         list(self.line_name_to_count.values()),
+                         dtype=np.int64),
+                     loop_nums=np.array(loop_nums, dtype=np.int64),
+                     loop_start_offsets=np.array(
+                         [self.loop_to_start_offset[k] for k in loop_nums],
+                         dtype=np.int64),
+                     loop_start_lines=np.array(
+                         [self.loop_to_start_line[k] for k in loop_nums],
+                         dtype=np.int64),
+                     loop_nreps=np.array(
+                         [self.loop_to_nreps[k] for k in loop_nums],
+                         dtype=np.int64))
+        except OSError:
+            pass
+
+    def load(self):
+        """
+        Loads the index from its sidecar file. Returns False, without
+        loading anything, if the sidecar file doesn't exist or is out of
+        date.
+
+        Returns
+        -------
+        bool
+
+        """
+        path = self.get_idx_file_path()
+        if not os.path.isfile(path):
+            return False
+        with np.load(path) as npz:
+            if int(npz['num_bits']) != self.num_bits or\
+                    int(npz['eng_mtime_ns']) != self.eng_mtime_ns or\
+                    int(npz['eng_size']) != self.eng_size:
+                return False
+            self.line_offsets = npz['line_offsets']
+            self.line_depths = npz['line_depths']
+            self.bit_num_uses = npz['bit_num_uses']
+            self.line_name_to_count = dict(zip(
+                npz['line_names'].tolist(), npz['line_counts'].tolist()))
+            loop_nums = npz['loop_nums'].tolist()
+            self.loop_to_start_offset = dict(zip(
+                loop_nums, npz['loop_start_offsets'].tolist()))
+            self.loop_to_start_line = dict(zip(
+                loop_nums, npz['loop_start_lines'].tolist()))
+            self.loop_to_nreps = dict(zip(
+                loop_nums, npz['loop_nreps'].tolist()))
+        self.tot_num_lines = len(self.line_depths)
+        return True
+
+    def read_lines(self, beg, end):
+        """
+        Returns the list of lines k of the English file with beg <= k <
+        end, read with a single seek().
+
+        Parameters
+        ----------
+        beg : int
+        end : int
+
+        Returns
+        -------
+        list[str]
+
+        """
+        beg_offset = int(self.line_offsets[beg])
+        end_offset = int(self.line_offsets[end])
+        with open(self.get_eng_file_path(), 'rb') as f:
+            f.seek(beg_offset)
+            text = f.read(end_offset - beg_offset).decode()
+        return text.splitlines()
+
+    def get_chunk_line_ranges(self, num_chunks):
+        """
+        Splits the lines of the English file into at most num_chunks
+        chunks of consecutive lines, with about the same number of bytes
+        each, and returns a list of the (beg, end) line index ranges of
+        those chunks. Chunks only begin at lines that are outside all
+        loops, so each chunk is an English file on its own (read it with
+        read_lines()).
+
+        Parameters
+        ----------
+        num_chunks : int
+
+        Returns
+        -------
+        list[tuple[int, int]]
+
+        """
+        begs = np.flatnonzero(self.line_depths == 0)
+        targets = np.arange(1, num_chunks)*(
+            self.line_offsets[-1]/num_chunks)
+        cuts = begs[np.searchsorted(self.line_offsets[begs], targets)
+                    .clip(0, len(begs) - 1)]
+        bounds = sorted(set([0] + cuts.tolist() + [self.tot_num_lines]))
+        return [(bounds[k], bounds[k+1]) for k in range(len(bounds) - 1)
+                if bounds[k] < bounds[k+1]]
+
+    def describe(self):
+        """
+        Prints stats of the circuit, without reading the English file.
+
+        Returns
+        -------
+        None
+
+        """
+        print('English file:', self.get_eng_file_path())
+        print('number of lines =', self.tot_num_lines)
+        print('number of bytes =', int(self.line_offsets[-1]))
+        print('line name to count =', dict(sorted(
+            self.line_name_to_count.items())))
+        print('loop number to nreps =', self.loop_to_nreps)
+        print('qubit to number of uses =', self.bit_num_uses.tolist())
+        print('idle qubits =',
+              np.flatnonzero(self.bit_num_uses == 0).tolist())
+
+if __name__ == "__main__":
+    from SEO_CompiledCkt import *
+
+    def main():
+        file_prefix = 'io_folder/sim_test2'
+        num_bits = 4
+        idx = SEO_LineIndex(file_prefix, num_bits)
+        idx.describe()
+        print('lines 3 to 5:', idx.read_lines(3, 6))
+        for beg, end in idx.get_chunk_line_ranges(3):
+            ckt = SEO_CompiledCkt(None, num_bits,
+                                  line_list=idx.read_lines(beg, end))
+            print('chunk', (beg, end), 'has', len(ckt.ops), 'ops')
+        os.remove(idx.get_idx_file_path())
+    main()
@@ -146,13 +146,31 @@ class SEO_Lista:
         SEO_Lista.line_list_to_eng_and_pic_files(
             self.line_list, file_prefix, self.num_bits)
 
+    def compile(self):
+        """
+        This method returns an object of SEO_CompiledCkt obtained by
+        compiling self.line_list. No file is read or written.
+
+        Returns
+        -------
+        SEO_CompiledCkt
+
+        """
+        return SEO_CompiledCkt(None, self.num_bits, line_list=self.line_list)
+
     def simulate(self, init_st_vec=None, **kwargs):
         """
-        This method creates temporary English and Picture file from self,
-        and uses those to create an object of SEO_simulator called sim. This
-        has the effect of evolving the state vector to its final state. The
-        method ends by deleting the temporary files, and returning sim. The
-        output sim can be used to access the final state vector, etc.
+        This method compiles self in memory (see compile()) and uses the
+        compiled circuit to create an object of SEO_simulator called sim.
+        This has the effect of evolving the state vector to its final
+        state. The method returns sim, which can be used to access the
+        final state vector, etc.
+
+        Instead of writing temporary English and Picture files and having
+        the simulator read them, as was done in a previous version of this
+        function, the simulator replays the compiled circuit. No files are
+        involved at any time, so this method can be called concurrently,
+        e.g., by parallel workers in the same folder.
 
         Parameters
         ----------
@@ -165,13 +183,8 @@ class SEO_Lista:
         SEO_simulator
 
         """
-        file_prefix = '610935122304'
-        self.write_eng_and_pic_files(file_prefix)
-        sim = SEO_simulator(file_prefix, self.num_bits,
-                init_st_vec=init_st_vec, **kwargs)
-        import os
-        os.remove(ug.get_eng_file_path(file_prefix, self.num_bits))
-        os.remove(ug.get_pic_file_path(file_prefix, self.num_bits))
+        sim = SEO_simulator(None, self.num_bits, init_st_vec=init_st_vec,
+                            compiled_ckt=self.compile(), **kwargs)
         return sim
 
     def print(self):
@@ -57,18 +57,17 @@ class SEO_MatrixProduct:
     file.
 
     In order to accomplish this goal, this class calls SEO_simulalor_mp
-    repeatedly using as initial state vector all the standard basis vectors
-    (2^num_bits of them). Then the class assembles the product matrix that
-    we seek by stacking on top of each other all the 2^num_bits final
-    evolved state vectors. Admittedly, this is a very slow, inefficient way
-    of finding the sought for matrix product. However, it works fine for a
-    small number of qubits. It can be used to check that gate expansions
-    agree with what they are supposed to be an expansion of.
-
-    Though slow, the strategy used by this class has the advantages that it
-    was very easy to code, and that every time it is shown to work,
-    SEO_simulator is shown to work too, 2^num_bit times. This strategy is
-    also easier to parallelize if the need for that arises at some later date.
+    once, using as initial state vector a batch (see class StateVec)
+    containing all the standard basis vectors (2^num_bits of them). All
+    the basis vectors are evolved together, in a single pass over the
+    English file. Then the class assembles the product matrix that we seek
+    by stacking on top of each other all the 2^num_bits final evolved state
+    vectors. The batch has 4^num_bits complex entries, so this works fine
+    only for a small number of qubits. It can be used to check that gate
+    expansions agree with what they are supposed to be an expansion of.
+
+    Every time this class is shown to work, SEO_simulator is shown to work
+    too, 2^num_bit times.
 
     Attributes
     ----------
@@ -78,7 +77,7 @@ class SEO_MatrixProduct:
 
     """
 
-    def __init__(self, file_prefix, num_bits):
+    def __init__(self, file_prefix, num_bits, **kwargs):
         """
         Constructor
 
@@ -88,6 +87,8 @@ class SEO_MatrixProduct:
             Prefix of English file being read
         num_bits : int
             number of bits in English file begin read.
+        kwargs : dict
+            key-word arguments of SEO_simulator
 
         Returns
         -------
@@ -97,23 +98,14 @@ class SEO_MatrixProduct:
 
         self.prod_arr = None
 
-        num_comps = 1 << num_bits
-        fin_list = []
-        for s in range(num_comps):
-            spin_dir_list = [(s >> bpos) & 1 for bpos in
-                             reversed(range(num_bits))]
-            init_st_vec = StateVec.get_standard_basis_st_vec(
-                spin_dir_list, ZL=True)
-            # print("---", spin_dir_list)
-            # print(init_st_vec)
-            sim = SEO_simulator_mp(file_prefix, num_bits,
-                                   init_st_vec=init_st_vec)
-            fin_st_vec = sim.cur_st_vec_dict["pure"]
-            fin = StateVec.get_traditional_st_vec(fin_st_vec)
-            fin_list.append(fin)
-            # print(fin_st_vec)
-            # print(fin)
-        self.prod_arr = np.vstack(fin_list).transpose()
+        # batch member s is the s'th standard basis vector
+        init_st_vec = StateVec.get_standard_basis_batch_st_vec(num_bits)
+        sim = SEO_simulator_mp(file_prefix, num_bits,
+                               init_st_vec=init_st_vec, **kwargs)
+        fin_st_vec = sim.cur_st_vec_dict["pure"]
+        # row s of fin is the evolved s'th standard basis vector
+        fin = StateVec.get_traditional_st_vec(fin_st_vec)
+        self.prod_arr = fin.transpose()
         # print(self.prod_arr)
 
 if __name__ == "__main__":
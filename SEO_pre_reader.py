@@ -1,3 +1,5 @@
+from SEO_LineIndex import *
+import os
 
 
 class SEO_pre_reader:
@@ -10,13 +12,29 @@ class SEO_pre_reader:
 
     See docstring for class SEO_writer for more info about English files.
 
+    If a compiled circuit (an object of class SEO_CompiledCkt) is given to
+    the constructor, the English file is not scanned. Instead, the loop
+    info is copied from the compiled circuit, and loop start offsets
+    become indices into the list compiled_ckt.ops.
+
+    If the English file is at least SEO_LineIndex.min_file_size bytes
+    long, the English file is not scanned either. Instead, the loop info
+    is copied from its index (an object of class SEO_LineIndex), which is
+    built only the first time a big English file is pre-read, and is
+    loaded from a sidecar file thereafter.
+
     Attributes
     ----------
+    compiled_ckt : SEO_CompiledCkt | None
+        compiled version of the English file, or None
     english_in : _io.TextIOWrapper
         file object for input text file that stores English description of
         circuit
     file_prefix : str
         beginning of the name of English file being scanned
+    line_index : SEO_LineIndex | None
+        index of the English file, or None if the English file was
+        scanned by this class (or self.compiled_ckt is not None)
     loop_queue : list[int]
         a queue of loops labelled by their id number
     loop_to_nreps : dict[int, int]
@@ -25,7 +43,9 @@ class SEO_pre_reader:
     loop_to_start_line : dict[int, int]
         a dictionary mapping loop number TO loop line + 1
     loop_to_start_offset : dict[int, int]
-        a dictionary mapping loop number TO offset of loop's start
+        a dictionary mapping loop number TO offset of loop's start. If
+        self.compiled_ckt is not None, the offset is an index into
+        self.compiled_ckt.ops
     num_bits : int
         number of qubits in whole circuit
     split_line : list[str]
@@ -35,7 +55,7 @@ class SEO_pre_reader:
 
     """
 
-    def __init__(self, file_prefix, num_bits):
+    def __init__(self, file_prefix, num_bits, compiled_ckt=None):
         """
         Constructor
 
@@ -45,6 +65,7 @@ class SEO_pre_reader:
             file must be called file_prefix + '_' + num_bits + "_eng.txt"
         num_bits : int
             total number of qubits of circuit.
+        compiled_ckt : SEO_CompiledCkt | None
 
         Returns
         -------
@@ -52,15 +73,39 @@ class SEO_pre_reader:
         """
         self.file_prefix = file_prefix
         self.num_bits = num_bits
-        self.english_in = open(
-            file_prefix + '_' + str(num_bits) + '_eng.txt', 'rt')
+        self.compiled_ckt = compiled_ckt
         self.split_line = None
+        self.loop_queue = []
+
+        self.line_index = None
+
+        if compiled_ckt is not None:
+            self.english_in = None
+            self.tot_num_lines = compiled_ckt.tot_num_lines
+            self.loop_to_start_offset = dict(
+                compiled_ckt.loop_to_start_index)
+            self.loop_to_start_line = dict(compiled_ckt.loop_to_start_line)
+            self.loop_to_nreps = dict(compiled_ckt.loop_to_nreps)
+            return
+
+        path = file_prefix + '_' + str(num_bits) + '_eng.txt'
+        if os.path.getsize(path) >= SEO_LineIndex.min_file_size:
+            self.line_index = SEO_LineIndex(file_prefix, num_bits)
+            self.english_in = None
+            self.tot_num_lines = self.line_index.tot_num_lines
+            self.loop_to_start_offset = dict(
+                self.line_index.loop_to_start_offset)
+            self.loop_to_start_line = dict(
+                self.line_index.loop_to_start_line)
+            self.loop_to_nreps = dict(self.line_index.loop_to_nreps)
+            return
+
+        self.english_in = open(path, 'rt')
 
         self.tot_num_lines = 0
         self.loop_to_start_offset = {}
         self.loop_to_start_line = {}
         self.loop_to_nreps = {}
-        self.loop_queue = []
 
         while not self.english_in.closed:
             self.scan_next_line()
@@ -1,8 +1,10 @@
 from Controls import *
 from SEO_pre_reader import *
+from SEO_CompiledCkt import *
 from PlaceholderManager import *
 from LoopyPlaceholderManager import *
 
+import os
 import sys
 if 'autograd.numpy' not in sys.modules:
     import numpy as np
@@ -29,11 +31,27 @@ class SEO_reader(SEO_pre_reader):
     number of lines, its number of elementary ops, its number of CNOT
     operations (SIGX with one control), etc.
 
+    Instead of reading an English file, an object of this class can
+    replay a circuit that has been compiled beforehand by class
+    SEO_CompiledCkt. To do so, pass the compiled circuit into the
+    constructor via the argument `compiled_ckt`. This avoids re-reading and
+    re-parsing the English file every time the same circuit is used. When
+    an English file is read, the lines outside loops are read and parsed
+    one at a time, as usual, but each outermost loop (from its LOOP line to
+    its matching NEXT line) is read once and compiled into a small
+    SEO_CompiledCkt of its own, so that the body of each loop is parsed
+    only once, no matter how many times it is repeated. If there is no
+    English file but there is a binary one (see class SEO_CompiledCkt),
+    the constructor reads the binary file instead.
+
     Attributes
     ----------
-    english_in : _io.TextIOWrapper
+    compiled_ckt : SEO_CompiledCkt | None
+        if not None, the ops of this compiled circuit are used instead of
+        the lines of the English file
+    english_in : _io.TextIOWrapper | None
         file object for input text file that stores English description of
-        circuit
+        circuit. None if self.compiled_ckt is not None
     line_count : int
     loop_to_cur_rep : dict[int, int]
         a dictionary mapping loop number TO current repetition
@@ -44,6 +62,14 @@ class SEO_reader(SEO_pre_reader):
         haven't been reset to |0> or |1>
     num_cnots : int
     num_ops : int
+    op_index : int
+        index in self.replay_ckt.ops of the next op to be used. Not used
+        if self.replay_ckt is None
+    replay_ckt : SEO_CompiledCkt | None
+        compiled circuit whose ops are being replayed. It is
+        self.compiled_ckt if that is not None. Otherwise, it is the
+        compiled version of the outermost loop being replayed, or None if
+        the line being read is outside all loops.
     split_line : list[str]
     vars_manager : PlaceholderManager
         handles variables indicated by #int in the English file being read
@@ -67,7 +93,8 @@ class SEO_reader(SEO_pre_reader):
     """
 
     def __init__(self, file_prefix, num_bits, vars_manager=None,
-                 verbose=False, write_log=False, xfile_num=-1):
+                 verbose=False, write_log=False, xfile_num=-1,
+                 compiled_ckt=None):
         """
         Constructor
 
@@ -79,12 +106,18 @@ class SEO_reader(SEO_pre_reader):
         verbose : bool
         write_log : bool
         xfile_num : int
+        compiled_ckt : SEO_CompiledCkt | None
 
         Returns
         -------
 
         """
-        SEO_pre_reader.__init__(self, file_prefix, num_bits)
+        if compiled_ckt is None and not os.path.isfile(
+                file_prefix + '_' + str(num_bits) + '_eng.txt'):
+            # read the binary version of the English file
+            compiled_ckt = SEO_CompiledCkt(file_prefix, num_bits)
+        SEO_pre_reader.__init__(self, file_prefix, num_bits,
+                                compiled_ckt=compiled_ckt)
         self.split_line = None
         self.vars_manager = vars_manager
         if vars_manager is None:
@@ -104,8 +137,14 @@ class SEO_reader(SEO_pre_reader):
         self.measured_bits = []
         self.mcase_trols = None
 
-        self.english_in = open(
-            file_prefix + '_' + str(num_bits) + '_eng.txt', 'rt')
+        self.op_index = 0
+        self.replay_ckt = compiled_ckt
+        if compiled_ckt is None:
+            self.english_in = open(
+                file_prefix + '_' + str(num_bits) + '_eng.txt', 'rt')
+        else:
+            assert compiled_ckt.num_bits == num_bits
+            self.english_in = None
 
         self.loop_to_cur_rep = {loop_num: 0 for
                                 loop_num in self.loop_to_nreps.keys()}
@@ -114,8 +153,12 @@ class SEO_reader(SEO_pre_reader):
         self.num_cnots = 0
         self.line_count = 0
 
-        while not self.english_in.closed:
-            self.next_line()
+        if compiled_ckt is None:
+            while not self.english_in.closed:
+                self.next_line()
+        else:
+            while self.op_index < len(compiled_ckt.ops):
+                self.next_line()
 
         if write_log:
             self.do_log()
@@ -256,11 +299,48 @@ class SEO_reader(SEO_pre_reader):
         # print(var_num_to_hist)
         # print(fun_name_to_hist)
 
+    def compile_loop(self, loop_line):
+        """
+        Reads from the English file all the lines that follow the LOOP line
+        loop_line, up to and including its matching NEXT line, and returns
+        the compiled version of the loop (LOOP and NEXT lines included).
+        The English file is left positioned at the line that follows the
+        NEXT line.
+
+        Parameters
+        ----------
+        loop_line : str
+
+        Returns
+        -------
+        SEO_CompiledCkt
+
+        """
+        lines = [loop_line]
+        depth = 1
+        while depth > 0:
+            line = self.english_in.readline()
+            if not line.strip():
+                break
+            line_name = line.split()[0]
+            if line_name == "LOOP":
+                depth += 1
+            elif line_name == "NEXT":
+                depth -= 1
+            lines.append(line)
+        return SEO_CompiledCkt(None, self.num_bits, line_list=lines)
+
     def next_line(self):
         """
         Analyze the inputted line. Send info to use_ methods labelled by
         first four letters of line) for further use.
 
+        If self.replay_ckt is None, the next line is read from the English
+        file and parsed. If that line is a LOOP line, all the lines up to
+        its matching NEXT line are read too, and compiled into
+        self.replay_ckt. Otherwise, the next line is the already parsed
+        operation self.replay_ckt.ops[self.op_index].
+
         Parameters
         ----------
 
@@ -269,48 +349,49 @@ class SEO_reader(SEO_pre_reader):
         None
 
         """
-        line = self.english_in.readline()
-        if not line or not line.strip():
-            self.english_in.close()
-            return
+        if self.compiled_ckt is None and self.replay_ckt is not None and\
+                self.op_index == len(self.replay_ckt.ops):
+            # end of outermost loop, back to reading the English file
+            self.replay_ckt = None
+        if self.replay_ckt is None:
+            line = self.english_in.readline()
+            if not line or not line.strip():
+                self.english_in.close()
+                return
+            if line.split()[0] == "LOOP":
+                self.replay_ckt = self.compile_loop(line)
+                op = self.replay_ckt.ops[0]
+                self.op_index = 1
+            else:
+                op = SEO_CompiledCkt.parse_line(self.num_bits, line)
+        else:
+            op = self.replay_ckt.ops[self.op_index]
+            self.op_index += 1
 
-        self.split_line = line.split()
-        line_name = self.split_line[0]
+        line_name, self.split_line, args = op
         self.num_ops += 1
         self.line_count += 1
 
+        def rads(x):
+            # angle slots that are str are placeholders
+            if isinstance(x, str):
+                return self.degs_str_to_rads(x)
+            return x
+
         if line_name == "DIAG":
-            # example:
-            # DIAG IF 2:1 1:0  0T BY 30.0 10.5 11.0 83.1
-
-            BY_pos = -1
-            for k in range(len(self.split_line)):
-                if self.split_line[k] == 'BY':
-                    BY_pos = k
-                    break
-            trol_tokens = self.split_line[2: BY_pos]
-            ang_tokens = self.split_line[BY_pos + 1: len(self.split_line)]
-            trols = self.read_multi_controls(trol_tokens)
-            rad_angles = [self.degs_str_to_rads(ang_tokens[k])
-                          for k in range(len(ang_tokens))]
+            trols, ang_slots = args
+            rad_angles = [rads(x) for x in ang_slots]
             self.use_DIAG(trols, rad_angles)
 
         elif line_name == "HAD2":
-            # example:
-            # HAD2 AT 1 IF 3F 2T
-
-            tar_bit_pos = int(self.split_line[2])
-            controls = self.read_TF_controls(self.split_line[4:])
+            tar_bit_pos, controls = args
             self.use_HAD2(tar_bit_pos, controls)
 
         elif line_name == "IF_M(":
             # don't count IF_M(<controls>){ as operation
             self.num_ops -= 1
 
-            # example:
-            # IF_M( 3F 2T ){
-            self.mcase_trols = self.read_TF_controls(
-                self.split_line[1:-1])
+            self.mcase_trols = args[0]
             for bit in self.mcase_trols.bit_pos:
                 assert bit in self.measured_bits, \
                     "IF_M() argument mentions a qubit that" \
@@ -326,22 +407,11 @@ class SEO_reader(SEO_pre_reader):
         elif line_name == "LOOP":
             # don't count LOOP as operation
             self.num_ops -= 1
-
-            # example:
-            # LOOP 5 NREPS= 2
-
-            loop_num = int(self.split_line[1])
-            nreps = int(self.split_line[3])
+            loop_num, nreps = args
             self.use_LOOP(loop_num, nreps)
 
         elif line_name == "MEAS":
-            # example:
-            # MEAS  0  AT  5
-            # MEAS  1  AT  5
-            # MEAS  2  AT  5
-
-            kind = int(self.split_line[1])
-            tar_bit_pos = int(self.split_line[3])
+            kind, tar_bit_pos = args
             if kind == 2:
                 # don't measure same bit twice
                 assert tar_bit_pos not in self.measured_bits,\
@@ -350,119 +420,63 @@ class SEO_reader(SEO_pre_reader):
             self.use_MEAS(tar_bit_pos, kind)
 
         elif line_name == "MP_Y":
-            # example:
-            # MP_Y AT 3 IF 2:1 1:0  0T BY 30.0 10.5 11.0 83.1
-
-            tar_bit_pos = int(self.split_line[2])
-            BY_pos = -1
-            for k in range(len(self.split_line)):
-                if self.split_line[k] == 'BY':
-                    BY_pos = k
-                    break
-            trol_tokens = self.split_line[4: BY_pos]
-            ang_tokens = self.split_line[BY_pos + 1: len(self.split_line)]
-            trols = self.read_multi_controls(trol_tokens)
-            rad_angles = [self.degs_str_to_rads(ang_tokens[k])
-                for k in range(len(ang_tokens))]
+            tar_bit_pos, trols, ang_slots = args
+            rad_angles = [rads(x) for x in ang_slots]
             self.use_MP_Y(tar_bit_pos, trols, rad_angles)
 
         elif line_name == "NEXT":
             # don't count NEXT as operation
             self.num_ops -= 1
-
-            # example:
-            # NEXT 5
-
-            loop_num = int(self.split_line[1])
-            self.use_NEXT(loop_num)
+            self.use_NEXT(args[0])
 
         elif line_name == 'NOTA':
             # don't count NOTA as operation
             self.num_ops -= 1
-
-            # example:
-            # NOTA  "I love you Mary."
-
-            self.use_NOTA(line[4:].strip())
+            self.use_NOTA(args[0])
 
         elif line_name == "PHAS":
-            # example:
-            # PHAS 42.7 AT 1 IF 3F 2T
+            angle_slot, tar_bit_pos, controls = args
+            self.use_PHAS(rads(angle_slot), tar_bit_pos, controls)
 
-            angle_rads = self.degs_str_to_rads(self.split_line[1])
-            tar_bit_pos = int(self.split_line[3])
-            controls = self.read_TF_controls(self.split_line[5:])
-            self.use_PHAS(angle_rads, tar_bit_pos, controls)
-
-        elif line_name == "P0PH":
-            self.read_P_phase_factor(0)
-        elif line_name == "P1PH":
-            self.read_P_phase_factor(1)
+        elif line_name in ["P0PH", "P1PH"]:
+            projection_bit, angle_slot, tar_bit_pos, controls = args
+            self.use_P_PH(projection_bit,
+                          rads(angle_slot), tar_bit_pos, controls)
 
         elif line_name == "PRINT":
             # don't count PRINT as operation
             self.num_ops -= 1
+            self.use_PRINT(args[0], self.line_count)
+
+        elif line_name in ["ROTX", "ROTY", "ROTZ"]:
+            axis, angle_slot, tar_bit_pos, controls = args
+            self.use_ROTA(axis, rads(angle_slot), tar_bit_pos, controls)
 
-            # example:
-            # PRINT V1
-            assert len(self.split_line) == 2, \
-                "PRINT line must contain style str"
-            self.use_PRINT(self.split_line[1], self.line_count)
-
-        elif line_name == "ROTX":
-            self.read_ROT(1)
-        elif line_name == "ROTY":
-            self.read_ROT(2)
-        elif line_name == "ROTZ":
-            self.read_ROT(3)
         elif line_name == "ROTN":
-            # example:
-            # ROTN 42.7 30.2 78.5 AT 1 IF 3F 2T
-
-            angle_x_rads = self.degs_str_to_rads(self.split_line[1])
-            angle_y_rads = self.degs_str_to_rads(self.split_line[2])
-            angle_z_rads = self.degs_str_to_rads(self.split_line[3])
-            tar_bit_pos = int(self.split_line[5])
-            controls = self.read_TF_controls(self.split_line[7:])
-            self.use_ROTN(angle_x_rads, angle_y_rads, angle_z_rads,
-                             tar_bit_pos, controls)
-        elif line_name == "SIGX":
-            self.read_SIG(1)
-        elif line_name == "SIGY":
-            self.read_SIG(2)
-        elif line_name == "SIGZ":
-            self.read_SIG(3)
+            ax_slot, ay_slot, az_slot, tar_bit_pos, controls = args
+            self.use_ROTN(rads(ax_slot), rads(ay_slot), rads(az_slot),
+                          tar_bit_pos, controls)
 
-        elif line_name == "SWAP":
-            # example:
-            # SWAP 1 0 IF 3F 2T
+        elif line_name in ["SIGX", "SIGY", "SIGZ"]:
+            axis, tar_bit_pos, controls = args
+            if axis == 1 and len(controls.bit_pos) == 1:
+                self.num_cnots += 1
+            self.use_SIG(axis, tar_bit_pos, controls)
 
-            bit1 = int(self.split_line[1])
-            bit2 = int(self.split_line[2])
-            controls = self.read_TF_controls(self.split_line[4:])
+        elif line_name == "SWAP":
+            bit1, bit2, controls = args
             self.use_SWAP(bit1, bit2, controls)
+
         elif line_name == "SWAY":
-            # example:
-            # SWAY 0 1 BY 25.1 42.7 IF 3F 2T
-
-            bit1 = int(self.split_line[1])
-            bit2 = int(self.split_line[2])
-            rads_list = [self.degs_str_to_rads(self.split_line[k])
-                                               for k in range(4, 6)]
-            controls = self.read_TF_controls(self.split_line[7:])
+            bit1, bit2, controls, rads_slots = args
+            rads_list = [rads(x) for x in rads_slots]
             self.use_SWAY(bit1, bit2, controls, rads_list)
+
         elif line_name == "U_2_":
-            # example:
-            # U_2_  25.1 42.7 30.2 78.5 AT 1 IF 3F 2T
-
-            rads0 = self.degs_str_to_rads(self.split_line[1])
-            rads1 = self.degs_str_to_rads(self.split_line[2])
-            rads2 = self.degs_str_to_rads(self.split_line[3])
-            rads3 = self.degs_str_to_rads(self.split_line[4])
-            tar_bit_pos = int(self.split_line[6])
-            controls = self.read_TF_controls(self.split_line[8:])
+            *rads_slots, tar_bit_pos, controls = args
+            rads0, rads1, rads2, rads3 = [rads(x) for x in rads_slots]
             self.use_U_2_(rads0, rads1, rads2, rads3,
-                             tar_bit_pos, controls)
+                          tar_bit_pos, controls)
         else:
             assert False, \
                 "reading an unsupported line kind: " + line_name
@@ -482,11 +496,7 @@ class SEO_reader(SEO_pre_reader):
 
     def read_multi_controls(self, tokens, allow_only_TF=False):
         """
-        Given a list of tokens of the form:
-        * an int followed by either T or F,
-        * int, colon, int,
-
-        construct a control out of it.
+        Wrapper for function of same name in SEO_CompiledCkt
 
         Parameters
         ----------
@@ -498,23 +508,8 @@ class SEO_reader(SEO_pre_reader):
         Controls
 
         """
-        # safe to use when no "IF"
-        # when no "IF", will return controls with _numControls=0
-        controls = Controls(self.num_bits)
-        if tokens:
-            for t in tokens:
-                t_end = t[-1]
-                if allow_only_TF:
-                    assert t_end in ['T', 'F']
-                if t_end == 'T':
-                    controls.set_control(int(t[:-1]), True)
-                elif t_end == 'F':
-                    controls.set_control(int(t[:-1]), False)
-                else:
-                    k1, k2 = t.split(':')
-                    controls.set_control(int(k1), int(k2))
-            controls.refresh_lists()
-        return controls
+        return SEO_CompiledCkt.read_multi_controls(
+            self.num_bits, tokens, allow_only_TF)
 
     def read_TF_controls(self, tokens):
         """
@@ -534,7 +529,9 @@ class SEO_reader(SEO_pre_reader):
     def read_P_phase_factor(self, projection_bit):
         """
         Collect useful info from P0PH or P1PH split_line and forward it to
-        use_ method.
+        use_ method. next_line() no longer calls this, because it gets the
+        same info from the op parsed by SEO_CompiledCkt, but it is kept for
+        subclasses and other callers.
 
         Parameters
         ----------
@@ -552,12 +549,13 @@ class SEO_reader(SEO_pre_reader):
         controls = self.read_TF_controls(self.split_line[5:])
         assert projection_bit in [0, 1]
         self.use_P_PH(projection_bit,
-                          angle_rads, tar_bit_pos, controls)
+                      angle_rads, tar_bit_pos, controls)
 
     def read_ROT(self, axis):
         """
         Collect useful info from ROTX, ROTY, or ROTZ split_line and forward
-        it to use_ method.
+        it to use_ method. Kept for the same reason as
+        read_P_phase_factor().
 
         Parameters
         ----------
@@ -581,7 +579,8 @@ class SEO_reader(SEO_pre_reader):
     def read_SIG(self, axis):
         """
         Collect useful info from SIGX, SIGY, or SIGZ split_line and forward
-        it to use_ method.
+        it to use_ method. Kept for the same reason as
+        read_P_phase_factor().
 
         Parameters
         ----------
@@ -746,7 +745,7 @@ class SEO_reader(SEO_pre_reader):
         """
         cur_rep = self.loop_to_cur_rep[loop_num]
         if cur_rep < self.loop_to_nreps[loop_num]-1:
-            self.english_in.seek(self.loop_to_start_offset[loop_num])
+            self.op_index = self.replay_ckt.loop_to_start_index[loop_num]
             self.line_count = self.loop_to_start_line[loop_num] - 1
             self.loop_to_cur_rep[loop_num] += 1
 
@@ -1,8 +1,11 @@
 import copy as cp
+import itertools as it
+from concurrent.futures import ThreadPoolExecutor
 # import pprint as pp
 from SEO_reader import *
 from OneBitGates import *
 from StateVec import *
+from HadamardTransform import *
 # import utilities_gen as ut
 
 import sys
@@ -48,8 +51,86 @@ class SEO_simulator(SEO_reader):
     An item of cur_st_vec_dict may be key=some string, value=None. This
     means the state vector of that branch is zero.
 
+    The arrays of the nonzero branches are stored stacked in a single array
+    self.br_arr, with a leading branch axis, and the values of
+    cur_st_vec_dict are views of the slices of br_arr. The measured bit
+    values that define each branch are stored as rows of an int array
+    self.br_trol_vals. At the beginning of an IF_M block, a boolean mask of
+    the branches that satisfy the IF_M controls is calculated from
+    br_trol_vals, once. Each gate is then applied once, to all the
+    branches that must evolve, by a single vectorized call, instead of
+    looping over the branches and parsing their branch keys.
+
+    If inplace_kernel=True, controlled one bit gates are applied by
+    updating the two target bit half-slices of the state vector in place,
+    as a0' = g00*a0 + g01*a1 and a1' = g10*a0 + g11*a1, block by block,
+    using two small scratch buffers that are allocated only once. If
+    inplace_kernel=False, they are applied using np.tensordot() followed
+    by np.transpose(), which allocates 2 temporary arrays per gate. Both
+    kernels calculate the same BLAS matrix product, so their results
+    agree to round-off (see evolve_sub_arr_in_place()).
+
+    Whatever the kernel, HAD2 gates are applied by the in place butterfly
+    of HadamardTransform.apply_to_axes(), so a layer of HAD2 gates on
+    every qubit costs the same as a fast Walsh-Hadamard transform of the
+    state vector, and diagonal gates are applied by an element-wise
+    multiplication.
+
+    Loop bodies (LOOP/NEXT blocks) are parsed only once (see class
+    SEO_reader). Furthermore, if num_bits <= self.loop_mat_max_bits and a
+    loop body has no measurements, IF_M blocks or PRINT lines, the
+    unitary matrix of the body can be calculated, by simulating the body
+    once for a batch containing the standard basis, and its nreps'th
+    power, calculated by repeated squaring, can be applied to the state
+    in a single step. This is done only when it is clearly cheaper than
+    replaying the body nreps times (see get_loop_pow_mat()), which
+    requires a body with many ops, or many repetitions, compared to
+    2^num_bits. Placeholders in the body don't change across
+    repetitions, except when a loop xfile is used (xfile_num >= 0), in
+    which case the body is always replayed rep by rep.
+
+    The initial state vector may also be a batch of state vectors,
+    i.e., a StateVec whose arr has shape [batch_size] + [2]*num_bits (see
+    class StateVec). In that case, all the state vectors in the batch are
+    evolved together, in a single pass over the circuit, with every gate
+    broadcast over the batch axis (axis 0). This is how SEO_MatrixProduct
+    computes the matrix of a circuit with a single simulation. Methods
+    that calculate probabilities (get_counts(), etc.) do not support
+    batches.
+
+    The state vectors are stored with the dtype of the initial state vector
+    (np.complex128 by default). To simulate in single precision,
+    which halves the memory used, set dtype=np.complex64 in the
+    constructor. All gates are then cast to single precision before being
+    applied. Round-off errors accumulate faster in single precision, so the
+    simulator keeps track of the total probability that the state should
+    have (it decreases only when a MEAS of kind 0 or 1 discards part of
+    the state) and get_norm_drift() returns how far the actual total
+    probability has drifted from it.
+
+    If num_threads > 1, gates (except SWAP) are applied in parallel by a
+    pool of num_threads threads. The (sub)array of the state vector that a
+    gate acts on is split into chunks along its leading axes (those with
+    the largest strides), excluding the target axis, and the gate kernel
+    is applied to each chunk by a different thread. NumPy releases the GIL
+    during element-wise operations, so this scales with the number of
+    cores for large numbers of qubits. See benchmark in main().
+
     Attributes
     ----------
+    batch_size : int | None
+        number of state vectors in the batch being evolved, or None if a
+        single state vector is being evolved
+    br_arr : np.ndarray | None
+        the arrays of the nonzero branches of self.cur_st_vec_dict,
+        stacked along axis 0. None if all branches are zero.
+    br_keys : list[str]
+        branch keys of the slices of self.br_arr
+    br_trol_vals : np.ndarray
+        int array of shape (len(br_keys), num_bits). Entry [k, bit] is 1 (
+        resp., 0) if bit has been measured to be True (resp. False) in
+        branch br_keys[k], and -1 if bit has not been measured in that
+        branch.
     cached_sts : dict[int, dict(str, StateVec)]
         A dictionary mapping an int to past values of self.cur_st_vec_dict.
         Used by use_PRINT() sometimes.
@@ -61,14 +142,57 @@ class SEO_simulator(SEO_reader):
         uniquely characterizes the measured controls. For example, if it has
         been measured previously (type 2 measurement only) that qubit 2 is
         True and qubit 4 is False, the branch key will be '4F2T'.
+    dtype : np.dtype
+        dtype of the state vector arrays, either np.complex128 or
+        np.complex64
+    evolving_br_mask : np.ndarray | None
+        bool array of length len(br_keys). Inside an IF_M block, entry k is
+        True iff branch br_keys[k] satisfies self.mcase_trols. None outside
+        IF_M blocks.
+    expected_tot_prob : float
+        total probability, summed over all branches (and over the batch,
+        if there is one), that the state would have in exact arithmetic
+    kernel_block_len : int
+        class attribute. Maximum number of entries of the half-slices of
+        the blocks into which evolve_sub_arr_in_place() and
+        evolve_sub_arr_by_plexor_y() split a sub-array
+    inplace_kernel : bool
+        True iff controlled one bit gates are applied in place, with the
+        scratch buffers self.scratch_bufs
+    loop_mat_max_bits : int
+        class attribute. Loop bodies are replaced by their matrix only if
+        num_bits <= loop_mat_max_bits. Children of this class that don't
+        store the state in self.br_arr set it to 0.
+    loop_op_overhead : int
+        class attribute. Python overhead of replaying one op, in units of
+        the cost of applying a gate to one amplitude. Used by
+        get_loop_pow_mat() to estimate the cost of replaying a loop body.
+    loop_to_pow_mat : dict[int, tuple[np.ndarray, int, int]]
+        dictionary mapping a loop number to the output of
+        get_loop_pow_mat() for that loop
+    num_threads : int
+        number of threads used to apply each gate
+    scratch_bufs : list[np.ndarray]
+        two flat arrays used by the in place kernel, with one region of
+        2*min(kernel_block_len, br_arr.size//2) entries per chunk (see
+        get_scratch_bufs()). Empty list until the in place kernel is first
+        used.
+    thread_pool : ThreadPoolExecutor | None
+        pool of threads used while the circuit is being simulated, if
+        num_threads > 1. None otherwise, and after the simulation ends.
 
     """
 
     # rrtucci: combines my java classes:
     # LineList, UnitaryMat, SEO_readerMu
 
+    loop_mat_max_bits = 10
+    kernel_block_len = 1 << 16
+    loop_op_overhead = 1 << 13
+
     def __init__(self, file_prefix, num_bits,
-                 init_st_vec=None, **kwargs):
+                 init_st_vec=None, inplace_kernel=False, dtype=None,
+                 num_threads=1, **kwargs):
         """
         Constructor
 
@@ -78,18 +202,53 @@ class SEO_simulator(SEO_reader):
         num_bits : int
         init_st_vec : StateVec
             get this using the functions StateVec.get_ground_st_vec() or
-            StateVec.get_standard_basis_st_vec().
+            StateVec.get_standard_basis_st_vec(). Can be a batch of state
+            vectors.
+        inplace_kernel : bool
+            ignored (tensordot kernel used instead) if autograd is on
+        dtype : np.dtype | None
+            np.complex128 or np.complex64. If None, the dtype of
+            init_st_vec is used (np.complex128 if init_st_vec is None).
+            Otherwise, init_st_vec is converted to this dtype.
+        num_threads : int
+            ignored (1 thread used instead) if autograd is on
 
         Returns
         -------
 
         """
         if StateVec.is_zero(init_st_vec):
-            init_st_vec = StateVec.get_ground_st_vec(num_bits)
-        self.cur_st_vec_dict = {"pure": init_st_vec}
+            init_st_vec = StateVec.get_ground_st_vec(
+                num_bits, np.complex128 if dtype is None else dtype)
+        elif dtype is not None and init_st_vec.arr.dtype != dtype:
+            init_st_vec.arr = init_st_vec.arr.astype(dtype)
+        self.dtype = init_st_vec.arr.dtype
+        self.expected_tot_prob = init_st_vec.get_total_prob()
+        self.batch_size = init_st_vec.get_batch_size()
+        self.num_bits = num_bits
+        self.measured_bits = []
+        self.mcase_trols = None
+        self.set_cur_st_vec_dict({"pure": init_st_vec})
         self.cached_sts = {}
-
-        SEO_reader.__init__(self, file_prefix, num_bits, **kwargs)
+        self.inplace_kernel = inplace_kernel
+        if 'autograd.numpy' in sys.modules:
+            self.inplace_kernel = False
+        self.scratch_bufs = []
+        self.num_threads = num_threads
+        if 'autograd.numpy' in sys.modules:
+            self.num_threads = 1
+        self.thread_pool = None
+        self.loop_to_pow_mat = {}
+        if self.num_threads > 1:
+            self.thread_pool = ThreadPoolExecutor(
+                max_workers=self.num_threads)
+
+        try:
+            SEO_reader.__init__(self, file_prefix, num_bits, **kwargs)
+        finally:
+            if self.thread_pool is not None:
+                self.thread_pool.shutdown()
+                self.thread_pool = None
 
     @staticmethod
     def branch_is_part_of_mcase(br_trols, case_trols):
@@ -185,6 +344,375 @@ class SEO_simulator(SEO_reader):
             new_br_key = br_key + x
         return new_br_key
 
+    def set_cur_st_vec_dict(self, st_vec_dict):
+        """
+        Sets self.cur_st_vec_dict to st_vec_dict, and sets self.br_arr,
+        self.br_keys, self.br_trol_vals and self.evolving_br_mask
+        accordingly. The arrays of the nonzero branches of st_vec_dict are
+        stacked into self.br_arr (without copying if there is only one),
+        and replaced by views of self.br_arr.
+
+        Parameters
+        ----------
+        st_vec_dict : dict[str, StateVec]
+
+        Returns
+        -------
+        None
+
+        """
+        self.cur_st_vec_dict = st_vec_dict
+        self.br_keys = [br_key for br_key, st_vec in st_vec_dict.items()
+                        if not StateVec.is_zero(st_vec)]
+        self.br_trol_vals = np.full((len(self.br_keys), self.num_bits), -1,
+                                    dtype=np.int8)
+        for k, br_key in enumerate(self.br_keys):
+            if br_key != "pure":
+                br_trols = self.get_controls_from_br_key(br_key)
+                for bit, kind in br_trols.bit_pos_to_kind.items():
+                    self.br_trol_vals[k, bit] = int(kind)
+        if not self.br_keys:
+            self.br_arr = None
+        elif len(self.br_keys) == 1:
+            arr = st_vec_dict[self.br_keys[0]].arr
+            if self.batch_size is not None and \
+                    'autograd.numpy' not in sys.modules:
+                # so that branch and batch axes can be merged into one
+                arr = np.ascontiguousarray(arr)
+            self.br_arr = arr[np.newaxis]
+        else:
+            self.br_arr = np.stack([st_vec_dict[br_key].arr
+                                    for br_key in self.br_keys])
+        self.refresh_cur_st_vec_dict()
+        self.refresh_evolving_br_mask()
+
+    def refresh_cur_st_vec_dict(self):
+        """
+        Makes the arr of each nonzero branch of self.cur_st_vec_dict a view
+        of the corresponding slice of self.br_arr.
+
+        Returns
+        -------
+        None
+
+        """
+        for k, br_key in enumerate(self.br_keys):
+            self.cur_st_vec_dict[br_key].arr = self.br_arr[k]
+
+    def refresh_evolving_br_mask(self):
+        """
+        Sets self.evolving_br_mask from self.mcase_trols and
+        self.br_trol_vals.
+
+        Returns
+        -------
+        None
+
+        """
+        if not self.measured_bits or not self.mcase_trols:
+            self.evolving_br_mask = None
+            return
+        bits = list(self.mcase_trols.bit_pos_to_kind.keys())
+        vals = [int(kind) for kind in
+                self.mcase_trols.bit_pos_to_kind.values()]
+        self.evolving_br_mask = np.all(
+            self.br_trol_vals[:, bits] == vals, axis=1)
+
+    def get_br_probs(self, tar_bit_pos=None, val=None):
+        """
+        Returns an array with the total probability of each branch of
+        self.br_arr (summed over the batch, if there is one). If
+        tar_bit_pos is not None, only the half of each branch in which
+        bit tar_bit_pos equals val is summed over.
+
+        The real and imaginary parts are summed over separately, as views,
+        so that no temporary array the size of self.br_arr is allocated.
+
+        Parameters
+        ----------
+        tar_bit_pos : int | None
+        val : int | None
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        slicex = [slice(None)]*self.br_arr.ndim
+        if tar_bit_pos is not None:
+            slicex[self.br_arr.ndim - self.num_bits + tar_bit_pos] = val
+        x = self.br_arr[tuple(slicex)]
+        # e.g., 'abcd,abcd->a' if x.ndim=4
+        subs = ''.join(chr(ord('a') + k) for k in range(x.ndim))
+        subs = subs + ',' + subs + '->a'
+        return sum(np.einsum(subs, y, y, dtype=np.float64)
+                   for y in [np.real(x), np.imag(x)])
+
+    def drop_zero_brs(self, br_probs):
+        """
+        br_probs[k] is the total probability of branch br_keys[k]. This
+        method removes from self.br_arr the branches with total
+        probability < 1e-8, sets them to None in self.cur_st_vec_dict,
+        and subtracts their probability from self.expected_tot_prob.
+
+        Parameters
+        ----------
+        br_probs : np.ndarray
+
+        Returns
+        -------
+        None
+
+        """
+        is_zero = br_probs < 1e-8
+        if not np.any(is_zero):
+            return
+        self.expected_tot_prob -= np.sum(br_probs[is_zero])
+        for k in np.flatnonzero(is_zero):
+            self.cur_st_vec_dict[self.br_keys[k]].arr = None
+        keep = np.logical_not(is_zero)
+        self.br_keys = [br_key for br_key, kept in
+                        zip(self.br_keys, keep) if kept]
+        self.br_trol_vals = self.br_trol_vals[keep]
+        self.br_arr = self.br_arr[keep] if self.br_keys else None
+        self.refresh_cur_st_vec_dict()
+        self.refresh_evolving_br_mask()
+
+    def resize_br_arr(self, num_rows):
+        """
+        Changes the number of rows (branches, axis 0) of self.br_arr to
+        num_rows, keeping the first rows. New rows are zero. The arr of
+        each nonzero branch of self.cur_st_vec_dict is set to None, so
+        refresh_cur_st_vec_dict() must be called afterwards.
+
+        If nothing else refers to the memory block that holds self.br_arr,
+        the block is resized in place by ndarray.resize(). This calls
+        realloc(), which, for a big block, remaps its pages instead of
+        copying them, so the peak memory is the larger of the old and new
+        sizes. Otherwise, a new array is allocated and the rows are copied
+        into it.
+
+        Parameters
+        ----------
+        num_rows : int
+
+        Returns
+        -------
+        None
+
+        """
+        old_shape = self.br_arr.shape
+        shape = (num_rows,) + old_shape[1:]
+        owner = self.br_arr if self.br_arr.base is None else \
+            self.br_arr.base
+        can_resize = isinstance(owner, np.ndarray) and\
+            owner.flags.owndata and owner.flags.c_contiguous and\
+            self.br_arr.flags.c_contiguous and\
+            owner.ctypes.data == self.br_arr.ctypes.data
+        if not can_resize:
+            owner = self.br_arr
+        # drop all other references to owner so that
+        # ndarray.resize() can check that there are none left
+        self.br_arr = None
+        for br_key in self.br_keys:
+            self.cur_st_vec_dict[br_key].arr = None
+        if can_resize:
+            try:
+                owner.resize(shape)
+                self.br_arr = owner
+                return
+            except ValueError:
+                pass
+        old_arr = owner.reshape(-1)[:int(np.prod(old_shape))].\
+            reshape(old_shape)
+        self.br_arr = np.zeros(shape, dtype=old_arr.dtype)
+        num_copied = min(num_rows, old_shape[0])
+        self.br_arr[:num_copied] = old_arr[:num_copied]
+
+    def get_evolving_rows(self):
+        """
+        Returns the rows (indices along axis 0) of self.br_arr of the
+        branches that must be evolved by the current line, as a slice if
+        they are consecutive, or else as an int array. Returns None if
+        there are none. A branch is evolved iff its state vector is not
+        zero, and the current line is (1) outside of any IF_M block, or (2)
+        it is inside such a block and the branch satisfies
+        self.mcase_trols.
+
+        Returns
+        -------
+        slice | np.ndarray | None
+
+        """
+        if self.br_arr is None:
+            return None
+        if self.evolving_br_mask is None:
+            return slice(None)
+        rows = np.flatnonzero(self.evolving_br_mask)
+        if len(rows) == 0:
+            return None
+        if rows[-1] - rows[0] + 1 == len(rows):
+            return slice(int(rows[0]), int(rows[-1]) + 1)
+        return rows
+
+    def get_evolving_br_keys(self):
+        """
+        Returns a list of the keys of those branches of cur_st_vec_dict
+        that must be evolved by the current line (see get_evolving_rows()).
+
+        Returns
+        -------
+        list[str]
+
+        """
+        rows = self.get_evolving_rows()
+        if rows is None:
+            return []
+        return list(np.array(self.br_keys)[rows])
+
+    def get_evolving_arr(self):
+        """
+        Returns an array ev_arr with the stacked arrays of the branches
+        that must be evolved by the current line, and the rows of
+        self.br_arr that they came from (see get_evolving_rows()). The
+        branch axis and the batch axis (if there is one) are merged into
+        axis 0 of ev_arr, so ev_arr always has num_bits + 1 axes. ev_arr
+        is a view of self.br_arr, except when rows is an int array. In
+        that case, or if autograd is on, put_evolving_arr() must be called
+        after changing ev_arr. Returns None, None if no branch must be
+        evolved.
+
+        Returns
+        -------
+        np.ndarray | None, slice | np.ndarray | None
+
+        """
+        rows = self.get_evolving_rows()
+        if rows is None:
+            return None, None
+        ev_arr = self.br_arr[rows]
+        if self.batch_size is not None:
+            ev_arr = ev_arr.reshape((-1,) + ev_arr.shape[-self.num_bits:])
+        return ev_arr, rows
+
+    def put_evolving_arr(self, ev_arr, rows):
+        """
+        Stores in self.br_arr the new values ev_arr of the branches in
+        `rows`, where ev_arr, rows are outputs of get_evolving_arr(). Does
+        nothing if ev_arr is a view of self.br_arr.
+
+        Parameters
+        ----------
+        ev_arr : np.ndarray
+        rows : slice | np.ndarray
+
+        Returns
+        -------
+        None
+
+        """
+        ev_arr = ev_arr.reshape((-1,) + self.br_arr.shape[1:])
+        if 'autograd.numpy' in sys.modules:
+            # can't do array assignments with autograd
+            if isinstance(rows, slice) and rows == slice(None):
+                self.br_arr = ev_arr
+            else:
+                row_to_new = dict(zip(np.arange(len(self.br_keys))[rows],
+                                      range(len(ev_arr))))
+                self.br_arr = np.stack([
+                    ev_arr[row_to_new[k]] if k in row_to_new
+                    else self.br_arr[k] for k in range(len(self.br_keys))])
+            self.refresh_cur_st_vec_dict()
+        elif not isinstance(rows, slice):
+            self.br_arr[rows] = ev_arr
+
+    def prepend_batch_axis(self, slicex):
+        """
+        Returns slicex, a tuple that slices the qubit axes of a state
+        vector array, with slice(None) prepended to it, so that it slices
+        the output of get_evolving_arr(), whose axis 0 is the branch axis
+        merged with the batch axis (if there is one).
+
+        Parameters
+        ----------
+        slicex : tuple
+
+        Returns
+        -------
+        tuple
+
+        """
+        return (slice(None),) + tuple(slicex)
+
+    def get_TF_slicex_and_free_bits(self, controls):
+        """
+        Returns a tuple slicex that fixes the T (resp., F) controls of
+        `controls` to 1 (resp., 0), and leaves all other axes of a state
+        vector array whole. Also returns the list, in increasing order,
+        of the bits that are not T or F controls. Those bits label the axes
+        of arr[slicex] if arr is a state vector array (after the batch
+        axis, if there is one). Controls of int kind (intrinsic controls
+        of DIAG and MP_Y) are not fixed.
+
+        Parameters
+        ----------
+        controls : Controls
+
+        Returns
+        -------
+        tuple, list[int]
+
+        """
+        slicex = [slice(None)]*self.num_bits
+        for bit, kind in controls.bit_pos_to_kind.items():
+            # bool is subclass of int
+            # so isinstance(x, int) will be true if x is bool!
+            if isinstance(kind, bool):
+                slicex[bit] = 1 if kind else 0
+        free_bits = [bit for bit in range(self.num_bits)
+                     if not isinstance(slicex[bit], int)]
+        return self.prepend_batch_axis(slicex), free_bits
+
+    def get_plexor_arr(self, controls, free_bits, vals):
+        """
+        DIAG and MP_Y lines have a list of 2^k values (angles), one for each
+        state of their k intrinsic (int kind) controls. This method
+        reshapes that list into an array that can be broadcast against
+        arr[slicex], where slicex and free_bits are the outputs of
+        get_TF_slicex_and_free_bits(controls). The axis of the output for
+        an intrinsic control has length 2 and all other axes have length 1.
+
+        Just as in the expanders DiagUnitaryExpander and
+        MultiplexorExpander, the intrinsic control with the j'th smallest
+        bit position is bit j of the index of vals.
+
+        Parameters
+        ----------
+        controls : Controls
+        free_bits : list[int]
+        vals : np.ndarray
+            shape=(2^k,) where k = number of intrinsic controls
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        MP_bpos = sorted([bit for bit, kind in
+                          controls.bit_pos_to_kind.items()
+                          if not isinstance(kind, bool)])
+        num_MP_trols = len(MP_bpos)
+        assert len(vals) == (1 << num_MP_trols), \
+            "wrong number of angles for intrinsic controls"
+        if num_MP_trols == 0:
+            return vals.reshape([1]*len(free_bits))
+        # C order reshape puts bit num_MP_trols - 1 of index first,
+        # so reverse axes to get them in increasing bit position order
+        arr = vals.reshape([2]*num_MP_trols)
+        arr = np.transpose(arr, list(reversed(range(num_MP_trols))))
+        shape = [2 if bit in MP_bpos else 1 for bit in free_bits]
+        return arr.reshape(shape)
+
     def evolve_by_controlled_bit_swap(self, bit1, bit2, controls):
         """
         Evolve each branch of cur_st_vec_dict by controlled bit swap iff the
@@ -216,10 +744,11 @@ class SEO_simulator(SEO_reader):
                 slicex[controls.bit_pos[k]] = 1
             else:  # it's False
                 slicex[controls.bit_pos[k]] = 0
-        slicex = tuple(slicex)
+        slicex = self.prepend_batch_axis(slicex)
 
-        # components that are fixed are no longer axes
-        scout = 0
+        # components that are fixed are no longer axes.
+        # batch axis, if any, is axis 0
+        scout = len(slicex) - self.num_bits
         for bit in range(self.num_bits):
             if bit == bit1:
                 new1 = scout
@@ -233,29 +762,21 @@ class SEO_simulator(SEO_reader):
         perm = list(range(perm_len))
         perm[new1], perm[new2] = perm[new2], perm[new1]
 
-        # br = branch
-        for br_key in self.cur_st_vec_dict.keys():
-            if StateVec.is_zero(self.cur_st_vec_dict[br_key]):
-                continue
-            evolve_br = False
-            if not self.measured_bits or not self.mcase_trols:
-                evolve_br = True
-            else:
-                br_trols = self.get_controls_from_br_key(br_key)
-                if SEO_simulator.branch_is_part_of_mcase(
-                        br_trols, self.mcase_trols):
-                    evolve_br = True
-            if evolve_br:
-                sub_arr = self.cur_st_vec_dict[br_key].arr[slicex]
-                sub_arr = sub_arr.transpose(tuple(perm))
+        # all evolving branches at once
+        ev_arr, rows = self.get_evolving_arr()
+        if ev_arr is None:
+            return
+        sub_arr = ev_arr[slicex]
+        sub_arr = sub_arr.transpose(tuple(perm))
 
-                # can't do array assignments with autograd so
-                # achieve same result with other allowed tensor ops
-                if 'autograd.numpy' in sys.modules:
-                    self.do_autograd_ruse(br_key, slicex, sub_arr)
-                    return
+        # can't do array assignments with autograd so
+        # achieve same result with other allowed tensor ops
+        if 'autograd.numpy' in sys.modules:
+            self.do_autograd_ruse(ev_arr, rows, slicex, sub_arr)
+            return
 
-                self.cur_st_vec_dict[br_key].arr[slicex] = sub_arr
+        ev_arr[slicex] = sub_arr
+        self.put_evolving_arr(ev_arr, rows)
 
     def evolve_by_controlled_one_bit_gate(self,
                 tar_bit_pos, controls, one_bit_gate):
@@ -288,10 +809,11 @@ class SEO_simulator(SEO_reader):
                 vec_slicex[controls.bit_pos[k]] = 1
             else:  # it's False
                 vec_slicex[controls.bit_pos[k]] = 0
-        vec_slicex = tuple(vec_slicex)
+        vec_slicex = self.prepend_batch_axis(vec_slicex)
 
-        # components that are fixed are no longer axes
-        scout = 0
+        # components that are fixed are no longer axes.
+        # batch axis, if any, is axis 0
+        scout = len(vec_slicex) - self.num_bits
         for bit in range(self.num_bits):
             if bit == tar_bit_pos:
                 new_tar = scout
@@ -311,47 +833,426 @@ class SEO_simulator(SEO_reader):
         perm = list(range(1, new_tar+1)) + [0]
         perm += list(range(new_tar+1, perm_len))
 
-        # br = branch
+        # HAD2 gates are applied as an in place butterfly (see
+        # HadamardTransform.apply_to_axes()). A layer of HAD2 on every
+        # qubit is thus a fast Walsh-Hadamard transform.
+        is_had2 = 'autograd.numpy' not in sys.modules and \
+            np.array_equal(one_bit_gate, OneBitGates.had2())
+
+        if 'autograd.numpy' not in sys.modules and \
+                one_bit_gate.dtype != self.dtype:
+            one_bit_gate = one_bit_gate.astype(self.dtype)
+
+        # diagonal gates (PHAS, SIGZ, ROTZ, P0PH, P1PH, etc.) are applied
+        # as an element-wise multiplication, in place
+        is_diag = 'autograd.numpy' not in sys.modules and \
+            one_bit_gate[0, 1] == 0 and one_bit_gate[1, 0] == 0
+
         assert not(self.mcase_trols and not self.measured_bits)
-        for br_key in self.cur_st_vec_dict.keys():
-            if StateVec.is_zero(self.cur_st_vec_dict[br_key]):
-                continue
-            evolve_br = False
-            if not self.measured_bits or not self.mcase_trols:
-                evolve_br = True
-            else:
+        # all evolving branches at once
+        ev_arr, rows = self.get_evolving_arr()
+        if ev_arr is None:
+            return
+        sub_arr = ev_arr[vec_slicex]
+        # sub_arr is a view so changing it in place changes ev_arr too
+        if is_diag:
+            self.run_on_chunks(sub_arr, [new_tar],
+                lambda chunk, chunk_num:
+                self.evolve_sub_arr_by_diag_gate(
+                    chunk, new_tar, one_bit_gate))
+        elif is_had2:
+            self.run_on_chunks(sub_arr, [new_tar],
+                lambda chunk, chunk_num:
+                HadamardTransform.apply_to_axes(chunk, [new_tar]))
+        elif self.inplace_kernel:
+            self.run_on_chunks(sub_arr, [new_tar],
+                lambda chunk, chunk_num:
+                self.evolve_sub_arr_in_place(
+                    chunk, new_tar, one_bit_gate, chunk_num),
+                uses_scratch=True)
+        elif self.thread_pool is not None:
+            self.run_on_chunks(sub_arr, [new_tar],
+                lambda chunk, chunk_num:
+                self.evolve_sub_arr_by_tensordot(
+                    chunk, new_tar, one_bit_gate, perm))
+        else:
+            # Axes 1 of one_bit_gate and new_tar of vec are summed over.
+            #  Axis 0 of one_bit_gate goes to the front of all the axes
+            # of new vec. Use transpose() to realign axes.
+            sub_arr = np.tensordot(one_bit_gate, sub_arr, ([1], [new_tar]))
+            sub_arr = np.transpose(sub_arr, axes=perm)
+
+            # can't do array assignments with autograd so
+            # achieve same result with other allowed tensor ops
+            if 'autograd.numpy' in sys.modules:
+                self.do_autograd_ruse(ev_arr, rows, vec_slicex, sub_arr)
+                return
+
+            # original, if autograd is not being used
+            ev_arr[vec_slicex] = sub_arr
+        self.put_evolving_arr(ev_arr, rows)
 
-                br_trols = self.get_controls_from_br_key(br_key)
-                if SEO_simulator.branch_is_part_of_mcase(
-                        br_trols, self.mcase_trols):
-                    evolve_br = True
-            if evolve_br:
-                sub_arr = self.cur_st_vec_dict[br_key].arr[vec_slicex]
-                # Axes 1 of one_bit_gate and new_tar of vec are summed over.
-                #  Axis 0 of one_bit_gate goes to the front of all the axes
-                # of new vec. Use transpose() to realign axes.
-                sub_arr = np.tensordot(one_bit_gate, sub_arr, ([1], [new_tar]))
-                sub_arr = np.transpose(sub_arr, axes=perm)
-
-                # can't do array assignments with autograd so
-                # achieve same result with other allowed tensor ops
-                if 'autograd.numpy' in sys.modules:
-                    self.do_autograd_ruse(br_key, vec_slicex, sub_arr)
-                    return
-
-                # original, if autograd is not being used
-                self.cur_st_vec_dict[br_key].arr[vec_slicex] = sub_arr
-
-    def do_autograd_ruse(self, br_key, slicex, sub_arr):
+    @staticmethod
+    def evolve_sub_arr_by_diag_gate(sub_arr, tar_axis, one_bit_gate):
+        """
+        Applies the 2 dim diagonal matrix one_bit_gate to axis tar_axis of
+        sub_arr, overwriting sub_arr. This is just an element-wise
+        multiplication of the two target bit half-slices of sub_arr by the
+        two diagonal entries of one_bit_gate.
+
+        Parameters
+        ----------
+        sub_arr : np.ndarray
+            a view of (part of) a state vector array
+        tar_axis : int
+            axis of sub_arr that corresponds to the target bit
+        one_bit_gate : np.ndarray
+            diagonal 2 dim matrix
+
+        Returns
+        -------
+        None
+
+        """
+        g00, g11 = one_bit_gate[0, 0], one_bit_gate[1, 1]
+        if g00 == g11:
+            sub_arr *= g00
+            return
+        slicex = [slice(None)]*sub_arr.ndim
+        slicex[tar_axis] = slice(0, 1)
+        sub_arr[tuple(slicex)] *= g00
+        slicex[tar_axis] = slice(1, 2)
+        sub_arr[tuple(slicex)] *= g11
+
+    @staticmethod
+    def evolve_sub_arr_by_tensordot(sub_arr, tar_axis, one_bit_gate, perm):
+        """
+        Applies the 2 dim matrix one_bit_gate to axis tar_axis of sub_arr,
+        overwriting sub_arr, using np.tensordot() followed by
+        np.transpose(perm). This is what evolve_by_controlled_one_bit_gate(
+        ) does when the gate is not diagonal and the in place kernel is not
+        used, except that it is done here on a chunk of a state vector
+        array.
+
+        Parameters
+        ----------
+        sub_arr : np.ndarray
+            a view of (part of) a state vector array
+        tar_axis : int
+            axis of sub_arr that corresponds to the target bit
+        one_bit_gate : np.ndarray
+        perm : list[int]
+            permutation that moves axis 0 of the tensordot back to tar_axis
+
+        Returns
+        -------
+        None
+
+        """
+        sub_arr[...] = np.transpose(
+            np.tensordot(one_bit_gate, sub_arr, ([1], [tar_axis])),
+            axes=perm)
+
+    def get_chunk_slicexes(self, shape, fixed_axes):
+        """
+        Returns a list of tuples, each of which slices a chunk out of an
+        array of shape `shape`. The chunks partition the array and are all of
+        the same size. The array is split along its leading axes (the ones
+        with the largest strides), skipping the axes in fixed_axes,
+        until there are at least self.num_threads chunks. Slices of length
+        1 are used instead of ints, so that the chunks have the same number
+        of axes as the array.
+
+        Parameters
+        ----------
+        shape : tuple[int]
+        fixed_axes : list[int]
+            axes that must not be split, e.g., the target axis of a gate
+
+        Returns
+        -------
+        list[tuple]
+
+        """
+        split_axes = []
+        num_chunks = 1
+        for ax in range(len(shape)):
+            if num_chunks >= self.num_threads:
+                break
+            if ax not in fixed_axes and shape[ax] > 1:
+                split_axes.append(ax)
+                num_chunks *= shape[ax]
+        slicexes = []
+        for inds in it.product(*[range(shape[ax]) for ax in split_axes]):
+            slicex = [slice(None)]*len(shape)
+            for ax, k in zip(split_axes, inds):
+                slicex[ax] = slice(k, k+1)
+            slicexes.append(tuple(slicex))
+        return slicexes
+
+    def get_block_slicexes(self, shape, tar_axis):
+        """
+        Returns a list of tuples, each of which slices a block out of an
+        array of shape `shape`. The blocks partition the array. Each block
+        contains the whole axis tar_axis, and its half-slices (with
+        tar_axis fixed) have at most self.kernel_block_len entries. The
+        array is split along its leading axes, skipping tar_axis, and
+        blocks are as large as possible. Slices of length 1 are used
+        instead of ints, so that the blocks have the same number of axes
+        as the array.
+
+        Parameters
+        ----------
+        shape : tuple[int]
+        tar_axis : int
+
+        Returns
+        -------
+        list[tuple]
+
+        """
+        other_axes = [ax for ax in range(len(shape)) if ax != tar_axis]
+        # other_axes[k:] are not split
+        k = len(other_axes)
+        inner_len = 1
+        while k > 0 and \
+                inner_len*shape[other_axes[k-1]] <= self.kernel_block_len:
+            k -= 1
+            inner_len *= shape[other_axes[k]]
+        if k == 0:
+            return [(slice(None),)*len(shape)]
+        # axis other_axes[k-1] is cut into slices of length step, and
+        # the axes before it into slices of length 1
+        cut_ax = other_axes[k-1]
+        step = max(self.kernel_block_len // inner_len, 1)
+        split_axes = other_axes[:k-1]
+        slicexes = []
+        for inds in it.product(*[range(shape[ax]) for ax in split_axes]):
+            slicex = [slice(None)]*len(shape)
+            for ax, j in zip(split_axes, inds):
+                slicex[ax] = slice(j, j+1)
+            for beg in range(0, shape[cut_ax], step):
+                slicex[cut_ax] = slice(beg, beg + step)
+                slicexes.append(tuple(slicex))
+        return slicexes
+
+    @staticmethod
+    def get_bcast_chunk(arr, slicex):
+        """
+        Returns the part of arr that broadcasts against the chunk
+        sub_arr[slicex] of an array sub_arr that arr broadcasts against.
+        The axes of arr are aligned with the last axes of sub_arr, and arr
+        is sliced only along its axes that are not of length 1.
+
+        Parameters
+        ----------
+        arr : np.ndarray
+        slicex : tuple
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        offset = len(slicex) - arr.ndim
+        return arr[tuple(slicex[ax + offset] if arr.shape[ax] > 1
+                         else slice(None) for ax in range(arr.ndim))]
+
+    def run_on_chunks(self, sub_arr, fixed_axes, fun, bcast_arrs=(),
+                      uses_scratch=False):
+        """
+        If self.thread_pool is None, this just calls fun(sub_arr, 0,
+        *bcast_arrs). Otherwise, it splits sub_arr into the chunks given by
+        get_chunk_slicexes(sub_arr.shape, fixed_axes), and calls fun(chunk,
+        chunk_num, *bcast_chunks) for each chunk, in parallel, on the
+        threads of self.thread_pool. It returns when all chunks are done.
+
+        The arrays in bcast_arrs are arrays that broadcast against sub_arr (
+        e.g., the output of get_plexor_arr()). They are sliced into chunks
+        along the same axes as sub_arr, wherever they are not of length 1.
+
+        If uses_scratch is True, the scratch buffers that fun gets from
+        get_scratch_bufs() are allocated here, one region per chunk, before
+        the threads start.
+
+        Parameters
+        ----------
+        sub_arr : np.ndarray
+            a view of (part of) a state vector array
+        fixed_axes : list[int]
+        fun : function
+            a function that changes its first argument in place
+        bcast_arrs : tuple[np.ndarray]
+        uses_scratch : bool
+            True iff fun uses the scratch buffers
+
+        Returns
+        -------
+        None
+
+        """
+        if self.thread_pool is None:
+            fun(sub_arr, 0, *bcast_arrs)
+            return
+        slicexes = self.get_chunk_slicexes(sub_arr.shape, fixed_axes)
+        if uses_scratch:
+            # allocate scratch buffers now, not inside the threads
+            self.get_scratch_bufs((0,), sub_arr.dtype, 0, len(slicexes))
+
+        def do_chunk(chunk_num):
+            slicex = slicexes[chunk_num]
+            bcast_chunks = [SEO_simulator.get_bcast_chunk(arr, slicex)
+                            for arr in bcast_arrs]
+            fun(sub_arr[slicex], chunk_num, *bcast_chunks)
+
+        # list() makes any exception raised by a thread be raised here
+        list(self.thread_pool.map(do_chunk, range(len(slicexes))))
+
+    def get_scratch_bufs(self, shape, dtype, chunk_num=0, num_chunks=1):
+        """
+        Returns two contiguous arrays of shape `shape` that are views of the
+        flat arrays in self.scratch_bufs. Each chunk of a gate applied by
+        run_on_chunks() is given its own region of the flat arrays, the one
+        starting at chunk_num*region_len, where region_len = 2*min(
+        self.kernel_block_len, self.br_arr.size//2) is the largest number
+        of entries that evolve_sub_arr_in_place() needs for one block. The
+        flat arrays are allocated the first time this method is called (or
+        if dtype changes, or if they are too short for num_chunks chunks)
+        and reused thereafter.
+
+        Parameters
+        ----------
+        shape : tuple[int]
+            shape of the returned arrays. Must have at most region_len
+            entries.
+        dtype : np.dtype
+        chunk_num : int
+        num_chunks : int
+            number of chunks whose regions must fit in the flat arrays
+
+        Returns
+        -------
+        np.ndarray, np.ndarray
+
+        """
+        region_len = 2*min(self.kernel_block_len, self.br_arr.size // 2)
+        size = int(np.prod(shape))
+        assert size <= region_len
+        buf_len = max(num_chunks, chunk_num + 1)*region_len
+        if not self.scratch_bufs or self.scratch_bufs[0].dtype != dtype or \
+                len(self.scratch_bufs[0]) < buf_len:
+            self.scratch_bufs = [np.empty(buf_len, dtype=dtype)
+                                 for k in range(2)]
+        beg = chunk_num*region_len
+        return tuple(buf[beg: beg + size].reshape(shape)
+                     for buf in self.scratch_bufs)
+
+    def evolve_sub_arr_in_place(self, sub_arr, tar_axis, one_bit_gate,
+                                chunk_num=0):
+        """
+        Applies the 2 dim matrix one_bit_gate to axis tar_axis of sub_arr,
+        overwriting sub_arr. If a0 and a1 are the half-slices of sub_arr
+        with tar_axis equal to 0 and 1, this replaces them by
+
+        a0' = g00*a0 + g01*a1
+        a1' = g10*a0 + g11*a1
+
+        where g = one_bit_gate.
+
+        The np.tensordot() of the other kernel is the BLAS matrix product
+        of g and the 2 x N matrix whose rows are a0 and a1 (flattened).
+        Here, the same matrix product is calculated block by block (see
+        get_block_slicexes()). Each block is copied into one of the scratch
+        buffers returned by get_scratch_bufs(), multiplied by g into the
+        other one, and copied back into sub_arr, so no temporary array is
+        allocated. The result matches that of the tensordot kernel to
+        round-off.
+
+        Parameters
+        ----------
+        sub_arr : np.ndarray
+            a view of (part of) a state vector array
+        tar_axis : int
+            axis of sub_arr that corresponds to the target bit
+        one_bit_gate : np.ndarray
+        chunk_num : int
+            see get_scratch_bufs()
+
+        Returns
+        -------
+        None
+
+        """
+        for slicex in self.get_block_slicexes(sub_arr.shape, tar_axis):
+            # vec[b] is the half-slice of the block with target bit b
+            vec = np.moveaxis(sub_arr[slicex], tar_axis, 0)
+            s0, s1 = self.get_scratch_bufs(
+                (2, vec.size // 2), sub_arr.dtype, chunk_num)
+            np.copyto(s0.reshape(vec.shape), vec)
+            np.dot(one_bit_gate, s0, out=s1)
+            np.copyto(vec, s1.reshape(vec.shape))
+
+    def evolve_sub_arr_by_plexor_y(self, sub_arr, tar_axis, cc, ss):
+        """
+        Applies the y multiplexor rotation [[cc, ss], [-ss, cc]] to axis
+        tar_axis of sub_arr, overwriting sub_arr. cc and ss are arrays that
+        broadcast against the target bit half-slices a0 and a1 of sub_arr,
+        as returned by get_plexor_arr(). This replaces a0 and a1 by
+
+        a0' = cc*a0 + ss*a1
+        a1' = -ss*a0 + cc*a1
+
+        The update is done block by block (see get_block_slicexes()), so
+        the temporary arrays ss*a0 and ss*a1 are never larger than a
+        block, whatever the size of sub_arr.
+
+        Parameters
+        ----------
+        sub_arr : np.ndarray
+            a view of (part of) a state vector array
+        tar_axis : int
+            axis of sub_arr that corresponds to the target bit
+        cc : np.ndarray
+        ss : np.ndarray
+
+        Returns
+        -------
+        None
+
+        """
+        for slicex in self.get_block_slicexes(sub_arr.shape, tar_axis):
+            block = sub_arr[slicex]
+            cc1 = SEO_simulator.get_bcast_chunk(cc, slicex)
+            ss1 = SEO_simulator.get_bcast_chunk(ss, slicex)
+            # use length 1 slices so that a0, a1 are views that
+            # broadcast against cc1 and ss1
+            half_slicex = [slice(None)]*block.ndim
+            half_slicex[tar_axis] = slice(0, 1)
+            a0 = block[tuple(half_slicex)]
+            half_slicex[tar_axis] = slice(1, 2)
+            a1 = block[tuple(half_slicex)]
+
+            s0 = ss1*a1
+            s1 = ss1*a0
+            # a1' = -ss*a0 + cc*a1
+            a1 *= cc1
+            a1 -= s1
+            # a0' = cc*a0 + ss*a1
+            a0 *= cc1
+            a0 += s0
+
+    def do_autograd_ruse(self, ev_arr, rows, slicex, sub_arr):
         """
         internal function used in evolve_ methods iff autograd is on. Should
         have same effect as
 
-        self.cur_st_vec_dict[br_key].arr[slicex] = sub_arr
+        ev_arr[slicex] = sub_arr
+        self.put_evolving_arr(ev_arr, rows)
 
         Parameters
         ----------
-        br_key : str
+        ev_arr : np.ndarray
+        rows : slice | np.ndarray
         slicex : tuple
         sub_arr : np.ndarray
 
@@ -361,7 +1262,7 @@ class SEO_simulator(SEO_reader):
 
         """
         test = False
-        arr = self.cur_st_vec_dict[br_key].arr
+        arr = ev_arr
         if test:
             arr1 = cp.copy(arr)
             # print('arr1 bef', arr1)
@@ -369,7 +1270,8 @@ class SEO_simulator(SEO_reader):
             # print('arr1 aft', arr1)
         on_slicex = np.full(arr.shape, False)
         on_slicex[slicex] = True
-        bigger_shape = [1]*self.num_bits # slicex is num_bits long
+        # slicex is num_bits long, plus 1 for the branch (and batch) axis
+        bigger_shape = [1]*len(slicex)
         k = 0
         # print('wwwww', sub_arr.shape, slicex)
         for bit, type in enumerate(slicex):
@@ -380,7 +1282,7 @@ class SEO_simulator(SEO_reader):
         arr = \
             arr*np.logical_not(on_slicex).astype(int)\
             + sub_arr*on_slicex.astype(int)
-        self.cur_st_vec_dict[br_key].arr = arr
+        self.put_evolving_arr(arr, rows)
         if test:
             # print('arr aft', arr)
             print('testing simulator with autograd on')
@@ -405,6 +1307,26 @@ class SEO_simulator(SEO_reader):
                                           # print_st_vec=True,
                                           show_probs=True)
 
+    def get_norm_drift(self):
+        """
+        Returns the absolute value of the difference between the total
+        probability of the current state (summed over all branches, and over
+        the batch if there is one) and self.expected_tot_prob. This is the
+        accumulated round-off error in the norm of the state, a good
+        indicator of the accuracy of a simulation, especially a single
+        precision (complex64) one.
+
+        Returns
+        -------
+        float
+
+        """
+        tot_prob = 0
+        for st_vec in self.cur_st_vec_dict.values():
+            if not StateVec.is_zero(st_vec):
+                tot_prob += st_vec.get_total_prob()
+        return abs(tot_prob - self.expected_tot_prob)
+
     def describe_st_vec_dict(self, **kwargs):
         """
         Calls method with same name in class StateVec. It prints a
@@ -424,20 +1346,99 @@ class SEO_simulator(SEO_reader):
         return StateVec.describe_st_vec_dict(self.cur_st_vec_dict,
                                              **kwargs)
 
+    def get_pd(self):
+        """
+        Returns the probability distribution (indexed in ZL convention) of
+        the current state. If there are several branches, this is the
+        diagonal of the density matrix of self.cur_st_vec_dict,
+        normalized to 1. It is calculated directly as the sum over
+        branches of the |amplitudes|^2, without building the density
+        matrix (see StateVec.get_st_vec_dict_pd()).
+
+        Returns
+        -------
+        np.ndarray
+            shape (2^num_bits,)
+
+        """
+        assert self.batch_size is None, \
+            "get_pd() does not support batches of state vectors"
+        x = self.br_arr
+        # sum over axis 0 (branches), real and imaginary parts separately
+        pd = sum(np.einsum('a...,a...->...', y, y, dtype=np.float64)
+                 for y in [np.real(x), np.imag(x)])
+        # ZF to ZL
+        pd = np.transpose(pd, list(reversed(range(self.num_bits))))
+        pd = pd.reshape(-1)
+        tot_prob = np.sum(pd)
+        assert tot_prob > 1e-6
+        return pd/tot_prob
+
+    def get_reduced_den_mat(self, kept_bits):
+        """
+        Returns the reduced density matrix of the qubits in kept_bits for
+        the current state (summed over branches, and divided by its trace),
+        indexed in ZL convention, like StateVec.get_reduced_den_mat(). It
+        is calculated with a single np.tensordot() of self.br_arr with
+        its complex conjugate over the branch axis and the traced axes.
+
+        Parameters
+        ----------
+        kept_bits : list[int] | set[int]
+
+        Returns
+        -------
+        np.ndarray
+            shape=(dim, dim) where dim=2^len(kept_bits)
+
+        """
+        assert self.batch_size is None, "get_reduced_den_mat() does " \
+            "not support batches of state vectors"
+        kept_bits = sorted(kept_bits)
+        assert set(kept_bits) <= set(range(self.num_bits))
+        # axis 0 of br_arr is the branch axis, axis bit + 1 is qubit bit
+        traced_axes = [0] + [bit + 1 for bit in range(self.num_bits)
+                             if bit not in kept_bits]
+        num_kept = len(kept_bits)
+        dm = np.tensordot(self.br_arr, np.conj(self.br_arr),
+                          (traced_axes, traced_axes))
+        # ZF to ZL
+        perm = list(reversed(range(num_kept))) + \
+            list(reversed(range(num_kept, 2*num_kept)))
+        dim = 1 << num_kept
+        den_mat = np.transpose(dm, perm).reshape((dim, dim))
+        return den_mat/np.trace(den_mat)
+
+    def get_bit_probs(self):
+        """
+        Returns StateVec.get_bit_probs() of self.get_pd(), the list of
+        the probabilities (p, 1-p) that each qubit is 0 or 1.
+
+        Returns
+        -------
+        list[tuple[float, float]]
+
+        """
+        return StateVec.get_bit_probs(self.num_bits, self.get_pd())
+
     def get_counts(self, num_shots, omit_zero_counts=True,
-                   use_bin_labels=True, rand_seed=None):
+                   use_bin_labels=True, rand_seed=None, use_int_keys=False):
         """
         This method calculates a probability distribution that we call pd
         from the current state vector if it is pure. (If the state vec is
-        not pure, it calculates a density matrix from the
-        self.cur_st_vec_dict. Then it extracts the diagonal of that density
-        matrix. That diagonal must be a probability distribution that we
-        call pd.) Then the method samples pd, num_shots times. The method
+        not pure, pd is the diagonal of the density matrix of
+        self.cur_st_vec_dict, calculated without building that matrix. See
+        get_pd().) Then the method samples pd, num_shots times. The method
         returns the result of that sampling as an OrderedDict
         state_name_to_counts. Depending on the value of the flag
         use_bin_labels, the state names are a string '0', '1', '2', etc,
         or their binary representations followed by 'ZL', because the ZL
-        convention is assumed.
+        convention is assumed. If use_int_keys=True, the state names are
+        the ints 0, 1, 2, etc. instead.
+
+        See StateVec.get_observations_vec() and
+        StateVec.get_counts_from_obs_vec() for how the sampling and the
+        counting are done.
 
         Parameters
         ----------
@@ -445,29 +1446,117 @@ class SEO_simulator(SEO_reader):
         omit_zero_counts : bool
         use_bin_labels : bool
         rand_seed : int
+        use_int_keys : bool
 
         Returns
         -------
-        OrderedDict[str, int]
+        OrderedDict[str | int, int]
 
         """
-        if len(self.cur_st_vec_dict) == 1:
-            # print('..,,mm', 'was here')
-            pd = self.cur_st_vec_dict['pure'].get_pd()
-        else:
-            den_mat = StateVec.get_den_mat(self.num_bits, self.cur_st_vec_dict)
-            pd = StateVec.get_den_mat_pd(den_mat)
-        # print('....,,,', pd.shape)
+        assert self.batch_size is None, \
+            "get_counts() does not support batches of state vectors"
+        pd = self.get_pd()
         obs_vec = StateVec.get_observations_vec(
             self.num_bits, pd, num_shots, rand_seed)
 
         return StateVec.get_counts_from_obs_vec(self.num_bits, obs_vec,
-                        use_bin_labels, omit_zero_counts)
+                        use_bin_labels, omit_zero_counts, use_int_keys)
+
+    def get_loop_pow_mat(self, loop_num, nreps):
+        """
+        This method returns None if the body of loop loop_num can't be (or
+        is not worth being) replaced by a matrix. Otherwise, it returns a
+        triple (pow_mat, body_num_ops, body_num_cnots), where pow_mat is
+        the nreps'th power, calculated by repeated squaring, of the
+        transpose of the unitary matrix U of the loop body, in the ZF flat
+        index convention, and body_num_ops, body_num_cnots are the number
+        of ops and CNOTs in one repetition of the body. The triple is
+        cached in self.loop_to_pow_mat.
+
+        U is obtained by simulating the body once, with a plain
+        SEO_simulator, for a batch of dim = 2^num_bits state vectors,
+        namely the standard basis.
+
+        If the body has n ops (counting the ops of nested loops as many
+        times as they are repeated) and c = self.loop_op_overhead, in
+        units of the cost of applying a gate to one amplitude, replaying
+        the body costs about
+
+        nreps*n*(dim + c)
+
+        whereas the matrix costs about
+
+        n*(dim^2 + c) + dim^3*log2(nreps)/8
+
+        (a complex multiply-add of a BLAS matrix product costs much less
+        than applying a gate to one amplitude). The matrix is used only if
+        the former is more than twice the latter.
+
+        Parameters
+        ----------
+        loop_num : int
+        nreps : int
+
+        Returns
+        -------
+        tuple[np.ndarray, int, int] | None
+
+        """
+        if loop_num in self.loop_to_pow_mat:
+            return self.loop_to_pow_mat[loop_num]
+        num_bits = self.num_bits
+        dim = 1 << num_bits
+        if num_bits > self.loop_mat_max_bits or\
+                'autograd.numpy' in sys.modules or\
+                self.xfile_num >= 0 or self.mcase_trols is not None or\
+                self.replay_ckt is None:
+            return None
+        ops = self.replay_ckt.ops
+        beg = self.replay_ckt.loop_to_start_index[loop_num]
+        end = beg
+        num_ops = 0
+        reps = 1
+        reps_stack = []
+        while ops[end][0] != 'NEXT' or ops[end][2][0] != loop_num:
+            line_name = ops[end][0]
+            # measurements and printing can't be done by a matrix
+            if line_name in ['MEAS', 'IF_M(', '}IF_M', 'PRINT']:
+                return None
+            if line_name == 'LOOP':
+                reps_stack.append(reps)
+                reps *= ops[end][2][1]
+            elif line_name == 'NEXT':
+                reps = reps_stack.pop()
+            else:
+                num_ops += reps
+            end += 1
+        c = self.loop_op_overhead
+        replay_cost = nreps*num_ops*(dim + c)
+        mat_cost = num_ops*(dim*dim + c) + dim**3*np.log2(nreps)/8
+        if replay_cost <= 2*mat_cost:
+            return None
+        basis = StateVec(num_bits, np.eye(dim, dtype=self.dtype).
+                         reshape([dim] + [2]*num_bits))
+        sim = SEO_simulator(None, num_bits, init_st_vec=basis,
+                            vars_manager=self.vars_manager,
+                            compiled_ckt=self.replay_ckt.get_sub_ckt(
+                                beg, end))
+        # row s of mat is U applied to the basis vector s, i.e.,
+        # mat = U^T
+        mat = sim.cur_st_vec_dict['pure'].arr.reshape((dim, dim))
+        pow_mat = np.linalg.matrix_power(mat, nreps)
+        self.loop_to_pow_mat[loop_num] = \
+            (pow_mat, sim.num_ops, sim.num_cnots)
+        return self.loop_to_pow_mat[loop_num]
 
     def use_DIAG(self, trols, rad_angles):
         """
-        This method should not be called. If called, it explains why it
-        shouldn't be called.
+        Overrides the parent class use_ function. Multiplies each evolving
+        branch of cur_st_vec_dict, restricted to the subspace allowed by
+        the T and F controls of trols, by the diagonal of the d-unitary,
+        exp(1j*rad_angles), broadcast over the intrinsic controls of trols.
+        Hence, there is no need to expand DIAG lines with the
+        DiagUnitaryExpander class before simulating them.
 
         Parameters
         ----------
@@ -476,13 +1565,25 @@ class SEO_simulator(SEO_reader):
 
         Returns
         -------
+        None
 
         """
-        assert False, \
-            "This class cannot simulate a circuit containing " \
-            "raw diagonal unitaries DIAG. Work around: use first our" \
-            "DiagUnitaryExpander class to expand " \
-            "DIAGs into simpler gates."
+        slicex, free_bits = self.get_TF_slicex_and_free_bits(trols)
+        phases = self.get_plexor_arr(trols, free_bits,
+                                     np.exp(1j*np.array(rad_angles)))
+        if 'autograd.numpy' not in sys.modules:
+            phases = phases.astype(self.dtype, copy=False)
+        ev_arr, rows = self.get_evolving_arr()
+        if ev_arr is None:
+            return
+        sub_arr = ev_arr[slicex]
+        if 'autograd.numpy' in sys.modules:
+            self.do_autograd_ruse(ev_arr, rows, slicex, sub_arr*phases)
+            return
+        self.run_on_chunks(sub_arr, [],
+            lambda chunk, chunk_num, ph:
+            np.multiply(chunk, ph, out=chunk), (phases,))
+        self.put_evolving_arr(ev_arr, rows)
 
     def use_HAD2(self, tar_bit_pos, controls):
         """
@@ -505,7 +1606,8 @@ class SEO_simulator(SEO_reader):
 
     def use_IF_M_beg(self, controls):
         """
-        Do nothing.
+        Calculates the mask self.evolving_br_mask of the branches that
+        satisfy the IF_M controls.
 
         Parameters
         ----------
@@ -516,11 +1618,11 @@ class SEO_simulator(SEO_reader):
         None
 
         """
-        pass
+        self.refresh_evolving_br_mask()
 
     def use_IF_M_end(self):
         """
-        Do nothing.
+        Resets the mask self.evolving_br_mask to None.
 
         Parameters
         ----------
@@ -530,7 +1632,46 @@ class SEO_simulator(SEO_reader):
         None
 
         """
-        pass
+        self.refresh_evolving_br_mask()
+
+    def use_LOOP(self, loop_num, nreps):
+        """
+        If get_loop_pow_mat() returns a matrix for this loop, this method
+        applies it to all the branches, i.e., it applies the loop body
+        nreps times in one step, and then skips to the op that follows
+        the NEXT of this loop. Otherwise, it does nothing, and the body is
+        replayed nreps times from its already parsed ops.
+
+        Parameters
+        ----------
+        loop_num : int
+        nreps : int
+
+        Returns
+        -------
+        None
+
+        """
+        if self.loop_mat_max_bits < self.num_bits or self.br_arr is None:
+            return
+        info = self.get_loop_pow_mat(loop_num, nreps)
+        if info is None:
+            return
+        pow_mat, body_num_ops, body_num_cnots = info
+        dim = 1 << self.num_bits
+        shape = self.br_arr.shape
+        self.br_arr[...] = np.dot(self.br_arr.reshape((-1, dim)),
+                                  pow_mat).reshape(shape)
+
+        ops = self.replay_ckt.ops
+        beg = self.replay_ckt.loop_to_start_index[loop_num]
+        end = beg
+        while ops[end][0] != 'NEXT' or ops[end][2][0] != loop_num:
+            end += 1
+        self.op_index = end + 1
+        self.line_count = self.loop_to_start_line[loop_num] + end - beg
+        self.num_ops += nreps*body_num_ops
+        self.num_cnots += nreps*body_num_cnots
 
     def use_MEAS(self, tar_bit_pos, kind):
         """
@@ -539,10 +1680,20 @@ class SEO_simulator(SEO_reader):
         For kind 0 (resp., 1) measurements, it applies |0><0| (resp.,
         |1><1|) to each branch of cur_st_vec_dict.
 
-        For kind 2 measurements, it first doubles the number of branches in
-        cur_st_vec_dict by adding a deep copy of each branch. Next,
-        it applies P_0 to half of the branches of the dict and P_1 to the
-        other half.
+        For kind 2 measurements, it replaces each branch of cur_st_vec_dict
+        by two branches, P_1 (T) and P_0 (F) times the branch. The
+        probabilities of the two halves of each branch are computed first,
+        and a child branch with probability < 1e-8 is not stored at all.
+        The first kept child of each branch is obtained in place, by
+        zeroing the other half of its parent's row of self.br_arr. Only
+        the second kept child, if any, needs a new row, which is appended
+        to self.br_arr with resize_br_arr() and into which the child's half
+        of the parent is copied. Thus, no temporary copies of the branches
+        are made, and the peak memory is the size of the new self.br_arr,
+        i.e., twice the size of the old one if every branch keeps both
+        children (as long as resize_br_arr() can resize self.br_arr in
+        place; if, e.g., the caller still holds the initial state vector
+        array, self.br_arr is copied once into a bigger array instead).
 
         Parameters
         ----------
@@ -554,63 +1705,112 @@ class SEO_simulator(SEO_reader):
         None
 
         """
+        if self.br_arr is None:
+            return
         # slicex = slice index
-        slicex = [slice(None)]*self.num_bits
+        # slices self.br_arr, whose axis 0 is the branch axis and
+        # axis 1 the batch axis, if there is one
+        slicex = [slice(None)]*self.br_arr.ndim
+        tar_axis = self.br_arr.ndim - self.num_bits + tar_bit_pos
         # br = branch
         if kind in [0, 1]:
-            b = 1 if kind == 0 else 0
-            for br_key in self.cur_st_vec_dict:
-                st_vec = self.cur_st_vec_dict[br_key]
-                if not StateVec.is_zero(st_vec):
-                    slicex[tar_bit_pos] = b
-                    # set projection |b=0><b=0| to zero for kind=1
-                    st_vec.arr[tuple(slicex)] = 0
-                    tot_prob = st_vec.get_total_prob()
-                    if tot_prob < 1e-8:
-                        # this didn't work
-                        # st_vec.arr = None
-                        self.cur_st_vec_dict[br_key].arr = None
-                    slicex[tar_bit_pos] = slice(None)
-                # self.cur_st_vec_dict[br_key].arr = st_vec.arr
+            # set projection |b=0><b=0| to zero for kind=1
+            slicex[tar_axis] = 1 if kind == 0 else 0
+            x = self.br_arr[tuple(slicex)]
+            # probability discarded by projection
+            self.expected_tot_prob -= np.sum(np.real(np.conj(x)*x))
+            self.br_arr[tuple(slicex)] = 0
         elif kind == 2:
-            old_st_vec_dict = cp.deepcopy(self.cur_st_vec_dict)
-            self.cur_st_vec_dict = {}
-            for br_key in old_st_vec_dict.keys():
-                new_T_key = self.get_br_key_with_new_link(br_key,
-                        tar_bit_pos, True)
-                new_F_key = self.get_br_key_with_new_link(br_key,
-                        tar_bit_pos, False)
-                # print('new keys=', new_F_key,',', new_T_key)
-
-                self.cur_st_vec_dict[new_T_key] = \
-                    cp.deepcopy(old_st_vec_dict[br_key])
-                self.cur_st_vec_dict[new_F_key] = \
-                    cp.deepcopy(old_st_vec_dict[br_key])
-
-                for b, new_key in enumerate([new_T_key, new_F_key]):
-                    # set projection |b=0><b=0| to zero for T key
-                    st_vec = self.cur_st_vec_dict[new_key]
-                    # print("b, newkey=" + str(b) + "," + new_key)
-                    if not StateVec.is_zero(st_vec):
-                        slicex[tar_bit_pos] = b
-                        st_vec.arr[tuple(slicex)] = 0
-                        tot_prob = st_vec.get_total_prob()
-                        # print('tot_prob=', tot_prob)
-                        if tot_prob < 1e-8:
-                            # this didn't work
-                            # st_vec.arr = None
-                            self.cur_st_vec_dict[new_key].arr = None
-                        slicex[tar_bit_pos] = slice(None)
-                    # print(st_vec)
-
-            # print(self.cur_st_vec_dict)
+            # half_probs[b][k] = probability of half b of branch k
+            half_probs = [self.get_br_probs(tar_bit_pos, b) for b in range(2)]
+            new_st_vec_dict = {}
+            # list of (old row, b) of the children that are kept
+            children = []
+            row_of_key = {br_key: k for k, br_key in enumerate(self.br_keys)}
+            for br_key in self.cur_st_vec_dict.keys():
+                k = row_of_key.get(br_key)
+                for new_kind in [True, False]:
+                    new_key = self.get_br_key_with_new_link(
+                        br_key, tar_bit_pos, new_kind)
+                    new_st_vec_dict[new_key] = StateVec(self.num_bits)
+                    if k is None:
+                        continue
+                    b = int(new_kind)
+                    if half_probs[b][k] < 1e-8:
+                        self.expected_tot_prob -= half_probs[b][k]
+                    else:
+                        children.append((k, b))
+            # the first kept child of row k is stored in row k, in place
+            # of its parent, and the second one in a new row
+            row_to_first_b = {}
+            extras = []
+            for k, b in children:
+                if k in row_to_first_b:
+                    extras.append((k, b))
+                else:
+                    row_to_first_b[k] = b
+            children = sorted(row_to_first_b.items()) + extras
+            if not children:
+                new_br_arr = None
+            elif 'autograd.numpy' in sys.modules:
+                # can't do array assignments with autograd
+                mask_shape = [1]*(self.br_arr.ndim - 1)
+                mask_shape[tar_axis - 1] = 2
+                masks = [np.reshape(np.array([1 - b, b]), mask_shape)
+                         for b in range(2)]
+                new_br_arr = np.stack([self.br_arr[k]*masks[b]
+                                       for k, b in children])
+            else:
+                num_rows = self.br_arr.shape[0]
+                if extras:
+                    self.resize_br_arr(num_rows + len(extras))
+                new_br_arr = self.br_arr
+                half_slicex = [slice(None)]*(new_br_arr.ndim - 1)
+                for j, (k, b) in enumerate(extras):
+                    half_slicex[tar_axis - 1] = b
+                    new_br_arr[num_rows + j][tuple(half_slicex)] = \
+                        new_br_arr[k][tuple(half_slicex)]
+                    half_slicex[tar_axis - 1] = 1 - b
+                    new_br_arr[num_rows + j][tuple(half_slicex)] = 0
+                for k, b in row_to_first_b.items():
+                    half_slicex[tar_axis - 1] = 1 - b
+                    new_br_arr[k][tuple(half_slicex)] = 0
+                # move the kept rows over the rows of the parents that
+                # have no kept children
+                rows = sorted(row_to_first_b.keys()) + \
+                    list(range(num_rows, num_rows + len(extras)))
+                if len(rows) < len(new_br_arr):
+                    for j, row in enumerate(rows):
+                        if j != row:
+                            new_br_arr[j] = new_br_arr[row]
+                    new_br_arr = None
+                    self.resize_br_arr(len(rows))
+                    new_br_arr = self.br_arr
+            rows = [k for k, b in children]
+            self.br_trol_vals = self.br_trol_vals[rows]
+            self.br_trol_vals[:, tar_bit_pos] = [b for k, b in children]
+            self.br_arr = new_br_arr
+            self.br_keys = [self.get_br_key_with_new_link(
+                self.br_keys[k], tar_bit_pos, bool(b)) for k, b in children]
+            self.cur_st_vec_dict = new_st_vec_dict
+            self.refresh_cur_st_vec_dict()
+            self.refresh_evolving_br_mask()
+            return
         else:
             assert False, 'unsupported measurement kind'
+        self.drop_zero_brs(self.get_br_probs())
 
     def use_MP_Y(self, tar_bit_pos, trols, rad_angles):
         """
-        This method should not be called. If called, it explains why it
-        shouldn't be called.
+        Overrides the parent class use_ function. For each state of the
+        intrinsic controls of trols, the multiplexor applies the rotation
+        exp(1j*rads*sigy) = [[c, s], [-s, c]] to the target bit, where c
+        and s are the cosine and sine of the angle rads for that state.
+        Here all those rotations are applied at once, as a broadcast
+        element-wise update of the two target bit half-slices of the
+        subspace allowed by the T and F controls of trols. Hence,
+        there is no need to expand MP_Y lines with the MultiplexorExpander
+        class before simulating them.
 
         Parameters
         ----------
@@ -620,13 +1820,42 @@ class SEO_simulator(SEO_reader):
 
         Returns
         -------
+        None
 
         """
-        assert False, \
-            "This class cannot simulate a circuit containing " \
-            "raw multiplexors MP_Y. Work around: use first our" \
-            "MultiplexorExpander class to expand " \
-            "MP_Ys into simpler gates."
+        assert tar_bit_pos not in trols.bit_pos, \
+            "target bit cannot be a control bit"
+        slicex, free_bits = self.get_TF_slicex_and_free_bits(trols)
+        rads_arr = np.array(rad_angles)
+        cc = self.get_plexor_arr(trols, free_bits, np.cos(rads_arr))
+        ss = self.get_plexor_arr(trols, free_bits, np.sin(rads_arr))
+        if 'autograd.numpy' not in sys.modules:
+            # real dtype with same precision as self.dtype
+            real_ty = np.finfo(self.dtype).dtype
+            cc = cc.astype(real_ty, copy=False)
+            ss = ss.astype(real_ty, copy=False)
+        tar_axis = free_bits.index(tar_bit_pos) + \
+            len(slicex) - self.num_bits
+        ev_arr, rows = self.get_evolving_arr()
+        if ev_arr is None:
+            return
+        sub_arr = ev_arr[slicex]
+        if 'autograd.numpy' in sys.modules:
+            half_slicex = [slice(None)]*sub_arr.ndim
+            half_slicex[tar_axis] = slice(0, 1)
+            a0 = sub_arr[tuple(half_slicex)]
+            half_slicex[tar_axis] = slice(1, 2)
+            a1 = sub_arr[tuple(half_slicex)]
+            new_sub_arr = np.concatenate(
+                [cc*a0 + ss*a1, -ss*a0 + cc*a1], axis=tar_axis)
+            self.do_autograd_ruse(ev_arr, rows, slicex, new_sub_arr)
+            return
+
+        self.run_on_chunks(sub_arr, [tar_axis],
+            lambda chunk, chunk_num, cc1, ss1:
+            self.evolve_sub_arr_by_plexor_y(
+                chunk, tar_axis, cc1, ss1), (cc, ss))
+        self.put_evolving_arr(ev_arr, rows)
 
     def use_NOTA(self, bla_str):
         """
@@ -722,6 +1951,9 @@ class SEO_simulator(SEO_reader):
             self.cached_sts[line_num] = cp.deepcopy(st_vecs)
         else:
             assert False, "unsupported PRINT style"
+        if self.dtype != np.complex128:
+            print('norm drift (accumulated round-off)=',
+                  self.get_norm_drift())
         print("****************************ending PRINT output")
 
     def use_ROTA(self, axis,
@@ -903,4 +2135,85 @@ if __name__ == "__main__":
             # branches
             sim = SEO_simulator('io_folder/sim_test3', 4, verbose=True)
 
+        if test in [0, 4]:
+            # test DIAG simulated natively, without DiagUnitaryExpander
+            sim = SEO_simulator('io_folder/d_unitary_test_one_line', 6,
+                                verbose=True)
+
+        if test in [0, 5]:
+            # test MP_Y simulated natively, without MultiplexorExpander
+            sim = SEO_simulator('io_folder/plexor_test_one_line', 6,
+                                verbose=True)
+
+        if test in [0, 6]:
+            # test batch of initial state vectors evolved together
+            batch_st_vec = StateVec.get_random_st_vec(6, rand_seed=10,
+                                                      batch_size=4)
+            arr0 = cp.copy(batch_st_vec.arr[0])
+            sim = SEO_simulator('io_folder/sim_test1', 6,
+                                init_st_vec=batch_st_vec)
+            sim0 = SEO_simulator('io_folder/sim_test1', 6,
+                                 init_st_vec=StateVec(6, arr0))
+            err = np.linalg.norm(sim.cur_st_vec_dict['pure'].arr[0] -
+                                 sim0.cur_st_vec_dict['pure'].arr)
+            print('batch member 0 vs single error=', err)
+
+        if test in [0, 7]:
+            # test single precision simulation
+            sim = SEO_simulator('io_folder/sim_test1', 6,
+                                dtype=np.complex64)
+            sim0 = SEO_simulator('io_folder/sim_test1', 6)
+            err = np.linalg.norm(sim.cur_st_vec_dict['pure'].arr -
+                                 sim0.cur_st_vec_dict['pure'].arr)
+            print('complex64 vs complex128 error=', err)
+            print('complex64 norm drift=', sim.get_norm_drift())
+
+        if test == 8:
+            # benchmark scaling with number of threads. Not run with
+            # test = 0 because it takes a while.
+            import time
+            import os
+            # A 30 qubit state vector takes 16 GiB (complex128), and the
+            # tensordot kernel allocates twice as much again for its
+            # temporaries, so the default sizes stop at 24 qubits. Add
+            # larger ones to num_bits_list on a machine with enough memory.
+            num_bits_list = [20, 22, 24]
+            max_threads = os.cpu_count() or 1
+            num_threads_list = [1]
+            while num_threads_list[-1] < max_threads:
+                num_threads_list.append(min(2*num_threads_list[-1],
+                                            max_threads))
+            for num_bits in num_bits_list:
+                rand = np.random.RandomState(123)
+                line_list = []
+                for k in range(200):
+                    tar, trol = rand.choice(num_bits, 2, replace=False)
+                    kind = rand.randint(4)
+                    if kind == 0:
+                        line_list.append('HAD2\tAT\t' + str(tar))
+                    elif kind == 1:
+                        line_list.append('SIGX\tAT\t' + str(tar) +
+                                         '\tIF\t' + str(trol) + 'T')
+                    else:
+                        line_list.append('ROTY\t' +
+                                         '{:.5f}'.format(rand.rand()*360) +
+                                         '\tAT\t' + str(tar))
+                ckt = SEO_CompiledCkt(None, num_bits, line_list=line_list)
+                for inplace_kernel in [False, True]:
+                    arr0 = None
+                    for num_threads in num_threads_list:
+                        start = time.time()
+                        sim = SEO_simulator(None, num_bits, compiled_ckt=ckt,
+                                            inplace_kernel=inplace_kernel,
+                                            num_threads=num_threads)
+                        secs = time.time() - start
+                        arr = sim.cur_st_vec_dict['pure'].arr
+                        if arr0 is None:
+                            arr0 = arr
+                        print('num_bits=', num_bits,
+                              ', inplace_kernel=', inplace_kernel,
+                              ', num_threads=', num_threads,
+                              ', secs=', '{:.3f}'.format(secs),
+                              ', error=', np.linalg.norm(arr - arr0))
+
     main()
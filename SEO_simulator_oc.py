@@ -0,0 +1,454 @@
+from SEO_simulator import *
+
+
+class SEO_simulator_oc(SEO_simulator):
+    """
+    This class is an oc (out of core) child of class SEO_simulator. It is
+    meant to be used when the state vector is too big to fit in RAM,
+    in which case the state vector is stored on disk, in a StateVec whose
+    arr is an np.memmap (see StateVec.get_memmap_st_vec()). It also works
+    (but has no advantage) if the state vector is in RAM.
+
+    Instead of applying each gate to the whole state vector as soon as it
+    is read, this class puts the gate in a queue of pending gates
+    (self.pending_ops). The queue is emptied (see flush_pending_ops())
+    by a single pass over the state vector, one block at a time. A block
+    is the part of the state vector array obtained by fixing the values of
+    all but num_block_bits of the bits. The num_block_bits bits that are
+    not fixed are called the active bits of the pass. Each block is read
+    into RAM, all pending gates are applied to it, and then it is written
+    back to disk.
+
+    A gate can be applied block by block iff it does not mix different
+    blocks, i.e., iff its target bit(s) (and the intrinsic controls of DIAG
+    and MP_Y) are active bits. T and F controls need not be active: a gate
+    either acts on a whole block or doesn't act on it at all, depending on
+    the values of the fixed bits of the block. Gates are added to the
+    queue until a gate arrives that would bring the number of active bits
+    above num_block_bits. At that point, the queue is emptied and a new
+    one is started. Hence, the number of passes over the state vector is
+    usually much smaller than the number of gates. The active bits of a
+    pass are completed, up to num_block_bits, with the bits of highest
+    bit position (the ones with the smallest stride in arr), so that
+    each block is made of long contiguous runs of the file.
+
+    Only MEAS of kinds 0 and 1 are supported (kind 2 would double the
+    number of state vectors that must be stored). Batches of state vectors
+    and autograd are not supported. PRINT lines (and verbose=True) empty
+    the queue and then load the whole state vector into RAM, so they
+    should be avoided for very large numbers of qubits.
+
+    Attributes
+    ----------
+    num_block_bits : int
+        number of active bits per pass. A block has 2^num_block_bits
+        entries.
+    num_passes : int
+        number of passes over the state vector done so far
+    pending_active_bits : set[int]
+        bits that must be active bits for the pending gates
+    pending_ops : list[tuple[function, tuple, int]]
+        queue of pending gates. Each gate is stored as a tuple (fun, args,
+        trols_pos). fun(self, *args) applies the gate to
+        self.cur_st_vec_dict, after args[trols_pos] (the Controls of the
+        gate) has been replaced by its restriction to the current block.
+        fun is a function of class SEO_simulator or of this class,
+        so the tuple can be pickled.
+
+    """
+    # the state is not stored in self.br_arr, so loop bodies are
+    # never replaced by their matrix (see class SEO_simulator)
+    loop_mat_max_bits = 0
+
+    def __init__(self, file_prefix, num_bits, init_st_vec=None,
+                 num_block_bits=20, num_threads=1, **kwargs):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_prefix : str
+        num_bits : int
+        init_st_vec : StateVec
+            get this using StateVec.get_memmap_st_vec(). If None,
+            a ground state in RAM is used.
+        num_block_bits : int
+        num_threads : int
+            used to apply each gate to a block
+        kwargs : dict
+            key-word arguments of SEO_simulator
+
+        Returns
+        -------
+
+        """
+        assert 'autograd.numpy' not in sys.modules, \
+            "SEO_simulator_oc does not support autograd"
+        assert init_st_vec is None or \
+            init_st_vec.get_batch_size() is None, \
+            "SEO_simulator_oc does not support batches"
+        self.num_block_bits = min(num_block_bits, num_bits)
+        self.num_passes = 0
+        self.pending_active_bits = set()
+        self.pending_ops = []
+
+        SEO_simulator.__init__(self, file_prefix, num_bits, init_st_vec,
+                               num_threads=num_threads, **kwargs)
+
+        # the parent class has shut down its thread pool by now, so start
+        # another one for the last pass
+        if self.num_threads > 1:
+            self.thread_pool = ThreadPoolExecutor(
+                max_workers=self.num_threads)
+        try:
+            self.flush_pending_ops()
+        finally:
+            if self.thread_pool is not None:
+                self.thread_pool.shutdown()
+                self.thread_pool = None
+
+    def get_block_controls(self, controls, bit_to_val):
+        """
+        Returns the Controls `controls` restricted to a block in which each
+        bit of bit_to_val.keys() is fixed to the value bit_to_val[bit].
+        Returns None if the block does not satisfy the controls.
+
+        Parameters
+        ----------
+        controls : Controls
+        bit_to_val : dict[int, int]
+
+        Returns
+        -------
+        Controls | None
+
+        """
+        if not any(bit in bit_to_val for bit in controls.bit_pos):
+            return controls
+        trols = Controls(self.num_bits)
+        for bit, kind in controls.bit_pos_to_kind.items():
+            if bit in bit_to_val:
+                # intrinsic controls are always active bits
+                assert isinstance(kind, bool)
+                if bit_to_val[bit] != int(kind):
+                    return None
+            else:
+                trols.set_control(bit, kind)
+        trols.refresh_lists()
+        return trols
+
+    def add_pending_op(self, active_bits, fun, args, trols_pos):
+        """
+        Adds the gate (fun, args, trols_pos) to the queue self.pending_ops,
+        after emptying the queue if the gate cannot be applied in the same
+        pass as the pending gates.
+
+        Parameters
+        ----------
+        active_bits : list[int]
+            bits that must be active bits for this gate
+        fun : function
+        args : tuple
+        trols_pos : int
+
+        Returns
+        -------
+        None
+
+        """
+        active_bits = set(active_bits)
+        assert len(active_bits) <= self.num_block_bits, \
+            "num_block_bits is too small for this gate"
+        if len(self.pending_active_bits | active_bits) > \
+                self.num_block_bits:
+            self.flush_pending_ops()
+        self.pending_active_bits |= active_bits
+        self.pending_ops.append((fun, args, trols_pos))
+
+    def flush_pending_ops(self):
+        """
+        Empties the queue self.pending_ops by applying all its gates to the
+        state vector, in a single pass, one block at a time.
+
+        Returns
+        -------
+        None
+
+        """
+        if not self.pending_ops:
+            return
+        st_vec = self.cur_st_vec_dict['pure']
+        active_bits = set(self.pending_active_bits)
+        for bit in reversed(range(self.num_bits)):
+            if len(active_bits) >= self.num_block_bits:
+                break
+            active_bits.add(bit)
+        fixed_bits = [bit for bit in range(self.num_bits)
+                      if bit not in active_bits]
+        self.evolve_blocks(st_vec.arr, fixed_bits,
+                           list(it.product([0, 1], repeat=len(fixed_bits))))
+        if isinstance(st_vec.arr, np.memmap):
+            st_vec.arr.flush()
+        self.pending_active_bits = set()
+        self.pending_ops = []
+        self.num_passes += 1
+
+    def evolve_blocks(self, arr, fixed_bits, vals_list, copy_blocks=True):
+        """
+        Applies all the gates in self.pending_ops to some blocks of the
+        state vector array arr. The blocks are those in which the bits
+        fixed_bits are fixed to the values vals, for each vals in
+        vals_list.
+
+        Parameters
+        ----------
+        arr : np.ndarray
+        fixed_bits : list[int]
+        vals_list : list[tuple[int]]
+        copy_blocks : bool
+            True iff each block is copied into a contiguous array in RAM
+            before applying the gates to it, and copied back afterwards.
+            If False, the gates are applied to a view of the block.
+
+        Returns
+        -------
+        None
+
+        """
+        # the parent class methods are applied to a StateVec for the
+        # block. Its arr has length 1 along the fixed bits.
+        old_st_vec_dict = self.cur_st_vec_dict
+        blk_st_vec = StateVec(self.num_bits)
+        try:
+            for vals in vals_list:
+                slicex = [slice(None)]*self.num_bits
+                for bit, val in zip(fixed_bits, vals):
+                    slicex[bit] = slice(val, val + 1)
+                slicex = tuple(slicex)
+                if copy_blocks:
+                    blk_st_vec.arr = np.array(arr[slicex])
+                else:
+                    blk_st_vec.arr = arr[slicex]
+                self.set_cur_st_vec_dict({'pure': blk_st_vec})
+                bit_to_val = dict(zip(fixed_bits, vals))
+                for fun, args, trols_pos in self.pending_ops:
+                    trols = self.get_block_controls(args[trols_pos],
+                                                    bit_to_val)
+                    if trols is not None:
+                        fun(self, *(args[:trols_pos] + (trols,) +
+                                    args[trols_pos + 1:]))
+                if copy_blocks:
+                    arr[slicex] = blk_st_vec.arr
+        finally:
+            self.set_cur_st_vec_dict(old_st_vec_dict)
+
+    def evolve_by_controlled_bit_swap(self, bit1, bit2, controls):
+        """
+        Overrides the parent class method. Adds the swap to the queue of
+        pending gates.
+
+        Parameters
+        ----------
+        bit1 : int
+        bit2 : int
+        controls : Controls
+
+        Returns
+        -------
+        None
+
+        """
+        self.add_pending_op([bit1, bit2],
+            SEO_simulator.evolve_by_controlled_bit_swap,
+            (bit1, bit2, controls), 2)
+
+    def evolve_by_controlled_one_bit_gate(self,
+                tar_bit_pos, controls, one_bit_gate):
+        """
+        Overrides the parent class method. Adds the gate to the queue of
+        pending gates.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        controls : Controls
+        one_bit_gate : np.ndarray
+
+        Returns
+        -------
+        None
+
+        """
+        self.add_pending_op([tar_bit_pos],
+            SEO_simulator.evolve_by_controlled_one_bit_gate,
+            (tar_bit_pos, controls, one_bit_gate), 1)
+
+    def finalize_next_line(self):
+        """
+        Overrides the parent class method. If verbose, it empties the
+        queue of pending gates before printing the state.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.verbose:
+            self.flush_pending_ops()
+        SEO_simulator.finalize_next_line(self)
+
+    def project_block(self, tar_bit_pos, kind, controls):
+        """
+        Applies the projection of a MEAS of kind 0 or 1 to the block in
+        self.cur_st_vec_dict, and subtracts the probability it discards
+        from self.expected_tot_prob. controls is ignored (it is there so
+        that this method can be a pending gate).
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        kind : int
+        controls : Controls
+
+        Returns
+        -------
+        None
+
+        """
+        st_vec = self.cur_st_vec_dict['pure']
+        slicex = [slice(None)]*self.num_bits
+        slicex[tar_bit_pos] = 1 if kind == 0 else 0
+        x = st_vec.arr[tuple(slicex)]
+        self.expected_tot_prob -= np.sum(np.real(np.conj(x)*x))
+        st_vec.arr[tuple(slicex)] = 0
+
+    def use_DIAG(self, trols, rad_angles):
+        """
+        Overrides the parent class use_ function. Adds the DIAG to the
+        queue of pending gates.
+
+        Parameters
+        ----------
+        trols : Controls
+        rad_angles : list[float]
+
+        Returns
+        -------
+        None
+
+        """
+        MP_bpos = [bit for bit, kind in trols.bit_pos_to_kind.items()
+                   if not isinstance(kind, bool)]
+        self.add_pending_op(MP_bpos, SEO_simulator.use_DIAG,
+                            (trols, rad_angles), 0)
+
+    def use_MEAS(self, tar_bit_pos, kind):
+        """
+        Overrides the parent class use_ function. Adds the projection for a
+        MEAS of kind 0 or 1 to the queue of pending gates. Kind 2 is not
+        supported.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        kind : int
+
+        Returns
+        -------
+        None
+
+        """
+        assert kind in [0, 1], \
+            "SEO_simulator_oc only supports MEAS of kinds 0 and 1"
+        self.add_pending_op([tar_bit_pos], SEO_simulator_oc.project_block,
+                            (tar_bit_pos, kind, Controls(self.num_bits)), 2)
+
+    def use_MP_Y(self, tar_bit_pos, trols, rad_angles):
+        """
+        Overrides the parent class use_ function. Adds the MP_Y to the
+        queue of pending gates.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        trols : Controls
+        rad_angles : list[float]
+
+        Returns
+        -------
+        None
+
+        """
+        MP_bpos = [bit for bit, kind in trols.bit_pos_to_kind.items()
+                   if not isinstance(kind, bool)]
+        self.add_pending_op([tar_bit_pos] + MP_bpos, SEO_simulator.use_MP_Y,
+                            (tar_bit_pos, trols, rad_angles), 1)
+
+    def use_PRINT(self, style, line_num):
+        """
+        Overrides the parent class use_ function. Empties the queue of
+        pending gates before printing.
+
+        Parameters
+        ----------
+        style : str
+        line_num : int
+
+        Returns
+        -------
+        None
+
+        """
+        self.flush_pending_ops()
+        SEO_simulator.use_PRINT(self, style, line_num)
+
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    def main():
+        # compare with SEO_simulator, using blocks of 2^3 entries
+        for file_prefix, num_bits in [('io_folder/sim_test1', 6),
+                                      ('io_folder/sim_test2', 4),
+                                      ('io_folder/plexor_test_one_line', 6),
+                                      ('io_folder/d_unitary_test_one_line',
+                                       6)]:
+            file_name = file_prefix + '_st_vec.dat'
+            init_st_vec = StateVec.get_memmap_st_vec(num_bits, file_name)
+            sim = SEO_simulator_oc(file_prefix, num_bits, init_st_vec,
+                                   num_block_bits=3)
+            sim0 = SEO_simulator(file_prefix, num_bits)
+            err = np.linalg.norm(sim.cur_st_vec_dict['pure'].arr -
+                                 sim0.cur_st_vec_dict['pure'].arr)
+            print(file_prefix, ', num_ops=', sim.num_ops,
+                  ', num_passes=', sim.num_passes, ', error=', err)
+            del sim, init_st_vec
+            os.remove(file_name)
+
+        # random circuit on 22 qubits stored on disk, blocks of 2^16 entries
+        num_bits = 22
+        rand = np.random.RandomState(123)
+        line_list = []
+        for k in range(200):
+            tar, trol = rand.choice(num_bits, 2, replace=False)
+            line_list.append('ROTY\t' + '{:.5f}'.format(rand.rand()*360) +
+                             '\tAT\t' + str(tar) +
+                             '\tIF\t' + str(trol) + 'T')
+        ckt = SEO_CompiledCkt(None, num_bits, line_list=line_list)
+        file_name = 'io_folder/oc_test_st_vec.dat'
+        init_st_vec = StateVec.get_memmap_st_vec(num_bits, file_name)
+        start = time.time()
+        sim = SEO_simulator_oc(None, num_bits, init_st_vec,
+                               compiled_ckt=ckt, num_block_bits=16)
+        secs = time.time() - start
+        sim0 = SEO_simulator(None, num_bits, compiled_ckt=ckt)
+        err = np.linalg.norm(sim.cur_st_vec_dict['pure'].arr -
+                             sim0.cur_st_vec_dict['pure'].arr)
+        print('random ckt, num_ops=', sim.num_ops,
+              ', num_passes=', sim.num_passes,
+              ', secs=', '{:.3f}'.format(secs), ', error=', err)
+        del sim, init_st_vec
+        os.remove(file_name)
+
+    main()
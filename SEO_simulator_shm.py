@@ -0,0 +1,306 @@
+from SEO_simulator_oc import *
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import math
+
+# shared memory block and state vector array that it holds, as seen by a
+# worker process of SEO_simulator_shm. Set by init_shm_worker().
+worker_shm = None
+worker_arr = None
+
+
+def init_shm_worker(shm_name, shape, dtype):
+    """
+    Initializer of each worker process of the process pool of class
+    SEO_simulator_shm. It attaches the worker process to the shared
+    memory block with name shm_name, which holds a state vector array of
+    shape `shape` and dtype `dtype`.
+
+    Parameters
+    ----------
+    shm_name : str
+    shape : tuple[int]
+    dtype : np.dtype
+
+    Returns
+    -------
+    None
+
+    """
+    global worker_shm, worker_arr
+    worker_shm = shared_memory.SharedMemory(name=shm_name)
+    worker_arr = np.ndarray(shape, dtype=dtype, buffer=worker_shm.buf)
+
+
+def evolve_shm_blocks(worker_attrs, pending_ops, fixed_bits, vals_list):
+    """
+    Task run by a worker process of the process pool of class
+    SEO_simulator_shm. It applies the gates pending_ops to the blocks
+    (fixed_bits, vals_list) of the shared state vector array, in place.
+    Returns the change in the expected total probability (due to MEAS
+    projections).
+
+    Parameters
+    ----------
+    worker_attrs : dict[str, Any]
+        see SEO_simulator_shm.get_worker_attrs()
+    pending_ops : list[tuple[function, tuple, int]]
+    fixed_bits : list[int]
+    vals_list : list[tuple[int]]
+
+    Returns
+    -------
+    float
+
+    """
+    # a SEO_simulator_shm that has not read any file, only used to
+    # apply gates to blocks
+    sim = SEO_simulator_shm.__new__(SEO_simulator_shm)
+    sim.__dict__.update(worker_attrs)
+    sim.pending_ops = pending_ops
+    sim.evolve_blocks(worker_arr, fixed_bits, vals_list, copy_blocks=False)
+    return sim.expected_tot_prob
+
+
+class SEO_simulator_shm(SEO_simulator_oc):
+    """
+    This class is a shm (shared memory) child of class SEO_simulator_oc.
+    It evolves a state vector that fits in RAM, using a pool of num_procs
+    processes instead of the threads of a single process.
+
+    The state vector array is stored in a multiprocessing.shared_memory
+    block that all processes can read and write. As in the parent class,
+    gates are put in a queue of pending gates, and the queue is emptied by
+    a single pass over the state vector. The num_shard_bits bits that are
+    fixed during a pass (the shard bits) split the state vector into
+    2^num_shard_bits shards (blocks). The shards are divided among the
+    worker processes, and each worker applies all the pending gates to
+    its shards, in place, independently of the other workers. By default,
+    the shard bits are the top bits (the ones with the smallest bit
+    positions, i.e., the largest strides in arr). When a gate touches a
+    shard bit, the queue is emptied, and the next pass uses different
+    shard bits, chosen among the bits not touched by its gates. Thus,
+    the state vector is resharded (remapped) in place, without moving any
+    data. A gate that touches so many bits that no shard bits are left
+    is applied by the main process alone.
+
+    This is meant to use all the cores of a machine for large numbers of
+    qubits. For small numbers of qubits, the cost of the processes
+    exceeds the benefit.
+
+    Attributes
+    ----------
+    num_procs : int
+        number of worker processes
+    proc_pool : ProcessPoolExecutor | None
+        pool of worker processes used while the circuit is being
+        simulated. None after the simulation ends.
+    shm : shared_memory.SharedMemory | None
+        shared memory block holding the state vector array while the
+        circuit is being simulated. None after the simulation ends.
+
+    """
+
+    def __init__(self, file_prefix, num_bits, init_st_vec=None,
+                 num_procs=2, num_shard_bits=None, dtype=None, **kwargs):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_prefix : str
+        num_bits : int
+        init_st_vec : StateVec
+            get this using the functions StateVec.get_ground_st_vec() or
+            StateVec.get_standard_basis_st_vec(). Its arr is overwritten
+            by the final state vector.
+        num_procs : int
+        num_shard_bits : int | None
+            number of bits fixed in each pass. If None, the smallest number
+            such that there are at least num_procs shards is used.
+        dtype : np.dtype | None
+            see SEO_simulator
+        kwargs : dict
+            key-word arguments of SEO_simulator
+
+        Returns
+        -------
+
+        """
+        if StateVec.is_zero(init_st_vec):
+            init_st_vec = StateVec.get_ground_st_vec(
+                num_bits, np.complex128 if dtype is None else dtype)
+        elif dtype is not None and init_st_vec.arr.dtype != dtype:
+            init_st_vec.arr = init_st_vec.arr.astype(dtype)
+        if num_shard_bits is None:
+            num_shard_bits = math.ceil(math.log2(num_procs))
+        assert 0 <= num_shard_bits < num_bits
+        self.num_procs = num_procs
+        arr = init_st_vec.arr
+        self.shm = shared_memory.SharedMemory(create=True, size=arr.nbytes)
+        self.proc_pool = None
+        try:
+            shm_arr = np.ndarray(arr.shape, dtype=arr.dtype,
+                                 buffer=self.shm.buf)
+            shm_arr[...] = arr
+            self.proc_pool = ProcessPoolExecutor(
+                max_workers=num_procs, initializer=init_shm_worker,
+                initargs=(self.shm.name, arr.shape, arr.dtype))
+            SEO_simulator_oc.__init__(
+                self, file_prefix, num_bits, StateVec(num_bits, shm_arr),
+                num_block_bits=num_bits - num_shard_bits, **kwargs)
+            arr[...] = shm_arr
+        finally:
+            if self.proc_pool is not None:
+                self.proc_pool.shutdown()
+                self.proc_pool = None
+            # no views of the shared memory may remain when it is closed
+            shm_arr = None
+            self.set_cur_st_vec_dict({'pure': init_st_vec})
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def get_worker_attrs(self):
+        """
+        Returns the attributes of self that a worker process needs to
+        apply the pending gates to its blocks.
+
+        Returns
+        -------
+        dict[str, Any]
+
+        """
+        return {
+            'num_bits': self.num_bits,
+            'dtype': self.dtype,
+            'batch_size': None,
+            'inplace_kernel': self.inplace_kernel,
+            'scratch_bufs': [],
+            'num_threads': 1,
+            'thread_pool': None,
+            'proc_pool': None,
+            'measured_bits': list(self.measured_bits),
+            'mcase_trols': self.mcase_trols,
+            'cur_st_vec_dict': {},
+            # a worker returns the change in this
+            'expected_tot_prob': 0.0
+        }
+
+    def add_pending_op(self, active_bits, fun, args, trols_pos):
+        """
+        Overrides the parent class method. If the gate touches more than
+        num_block_bits bits, the queue is emptied and the gate is applied
+        by the main process to the whole state vector. Otherwise, it calls
+        the parent class method.
+
+        Parameters
+        ----------
+        active_bits : list[int]
+        fun : function
+        args : tuple
+        trols_pos : int
+
+        Returns
+        -------
+        None
+
+        """
+        if len(set(active_bits)) <= self.num_block_bits:
+            SEO_simulator_oc.add_pending_op(self, active_bits, fun, args,
+                                            trols_pos)
+            return
+        self.flush_pending_ops()
+        self.pending_ops = [(fun, args, trols_pos)]
+        SEO_simulator_oc.evolve_blocks(
+            self, self.cur_st_vec_dict['pure'].arr, [], [()],
+            copy_blocks=False)
+        self.pending_ops = []
+        self.num_passes += 1
+
+    def evolve_blocks(self, arr, fixed_bits, vals_list, copy_blocks=True):
+        """
+        Overrides the parent class method. Divides the blocks (shards) into
+        num_procs contiguous groups, and has each worker process apply the
+        pending gates to one group, in place. copy_blocks is ignored.
+
+        Inside a worker process (where self.proc_pool is None), it calls the
+        parent class method with copy_blocks=False.
+
+        Parameters
+        ----------
+        arr : np.ndarray
+        fixed_bits : list[int]
+        vals_list : list[tuple[int]]
+        copy_blocks : bool
+
+        Returns
+        -------
+        None
+
+        """
+        if self.proc_pool is None:
+            SEO_simulator_oc.evolve_blocks(self, arr, fixed_bits, vals_list,
+                                           copy_blocks=False)
+            return
+        worker_attrs = self.get_worker_attrs()
+        num_vals = len(vals_list)
+        futures = []
+        num_groups = min(self.num_procs, num_vals)
+        for k in range(num_groups):
+            beg = (k*num_vals)//num_groups
+            end = ((k + 1)*num_vals)//num_groups
+            futures.append(self.proc_pool.submit(
+                evolve_shm_blocks, worker_attrs, self.pending_ops,
+                fixed_bits, vals_list[beg:end]))
+        # result() raises here any exception raised by a worker
+        for future in futures:
+            self.expected_tot_prob += future.result()
+
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    def main():
+        # compare with SEO_simulator
+        for file_prefix, num_bits in [('io_folder/sim_test1', 6),
+                                      ('io_folder/sim_test2', 4),
+                                      ('io_folder/plexor_test_one_line', 6),
+                                      ('io_folder/d_unitary_test_one_line',
+                                       6)]:
+            sim = SEO_simulator_shm(file_prefix, num_bits, num_procs=4)
+            sim0 = SEO_simulator(file_prefix, num_bits)
+            err = np.linalg.norm(sim.cur_st_vec_dict['pure'].arr -
+                                 sim0.cur_st_vec_dict['pure'].arr)
+            print(file_prefix, ', num_ops=', sim.num_ops,
+                  ', num_passes=', sim.num_passes, ', error=', err)
+
+        # benchmark scaling with number of processes
+        num_bits = 20
+        rand = np.random.RandomState(123)
+        line_list = []
+        for k in range(200):
+            tar, trol = rand.choice(num_bits, 2, replace=False)
+            line_list.append('ROTY\t' + '{:.5f}'.format(rand.rand()*360) +
+                             '\tAT\t' + str(tar) +
+                             '\tIF\t' + str(trol) + 'T')
+        ckt = SEO_CompiledCkt(None, num_bits, line_list=line_list)
+        start = time.time()
+        sim0 = SEO_simulator(None, num_bits, compiled_ckt=ckt)
+        print('SEO_simulator, secs=', '{:.3f}'.format(time.time() - start))
+        max_procs = os.cpu_count() or 1
+        num_procs_list = [1]
+        while num_procs_list[-1] < max_procs:
+            num_procs_list.append(min(2*num_procs_list[-1], max_procs))
+        for num_procs in num_procs_list:
+            start = time.time()
+            sim = SEO_simulator_shm(None, num_bits, compiled_ckt=ckt,
+                                    num_procs=num_procs)
+            secs = time.time() - start
+            err = np.linalg.norm(sim.cur_st_vec_dict['pure'].arr -
+                                 sim0.cur_st_vec_dict['pure'].arr)
+            print('num_procs=', num_procs, ', num_passes=', sim.num_passes,
+                  ', secs=', '{:.3f}'.format(secs), ', error=', err)
+
+    main()
@@ -4,6 +4,7 @@ from OneBitGates import *
 import re
 import utilities_gen as ug
 from PlaceholderManager import *
+from SEO_CompiledCkt import *
 import sys
 if 'autograd.numpy' not in sys.modules:
     import numpy as np
@@ -68,10 +69,18 @@ class SEO_writer:
     If a vertical wire hasn't been measured as type 2 measurement,
     it is drawn in pic file as "|";  otherwise, it is drawn as ":".
 
+    The English file can also be written in the binary format of class
+    SEO_CompiledCkt (an .npz file) instead of as text, by setting
+    bin_eng=True in the constructor. In that case, self.english_out is a
+    SEO_CompiledCkt that compiles each line as it is written, and writes
+    the .npz file when it is closed. The Picture file is still a text file.
+
     Attributes
     ----------
+    bin_eng : bool
+        True iff the English file is being written in binary format
     emb : CktEmbedder
-    english_out : _io.TextIOWrapper
+    english_out : _io.TextIOWrapper | SEO_CompiledCkt
         file object for output text file that stores English description of
         circuit
     file_prefix : str
@@ -91,7 +100,7 @@ class SEO_writer:
     """
 
     def __init__(self, file_prefix, emb, ZL=True,
-                english_out=None, picture_out=None):
+                english_out=None, picture_out=None, bin_eng=False):
         """
         Constructor
 
@@ -102,6 +111,9 @@ class SEO_writer:
         ZL : bool
         english_out : _io.TextIOWrapper
         picture_out : _io.TextIOWrapper
+        bin_eng : bool
+            if True and english_out is None, the English file is written
+            in binary format (see class SEO_CompiledCkt) instead of as text
 
 
         Returns
@@ -113,9 +125,14 @@ class SEO_writer:
         self.emb = emb
         self.ZL = ZL
         self.measured_bits = []
+        self.bin_eng = bin_eng and english_out is None
 
         if english_out is None and file_prefix:
-            self.english_out = open(self.get_eng_file_path(), 'wt')
+            if self.bin_eng:
+                self.english_out = SEO_CompiledCkt(
+                    file_prefix, emb.num_bits_aft, line_list=[])
+            else:
+                self.english_out = open(self.get_eng_file_path(), 'wt')
         else:
             self.english_out = english_out
 
@@ -128,13 +145,17 @@ class SEO_writer:
 
     def get_eng_file_path(self):
         """
-        Returns path to English file
+        Returns path to English file (to its binary version if
+        self.bin_eng)
 
         Returns
         -------
         str
 
         """
+        if self.bin_eng:
+            return SEO_CompiledCkt.get_bin_file_path(
+                self.file_prefix, self.emb.num_bits_aft)
         return ug.get_eng_file_path(self.file_prefix, self.emb.num_bits_aft)
 
     def get_pic_file_path(self):
@@ -186,6 +207,9 @@ class SEO_writer:
         None
 
         """
+        if self.bin_eng:
+            print('\n'.join(self.english_out.get_eng_lines()))
+            return
         with open(self.get_eng_file_path()) as f:
             print(f.read())
 
@@ -0,0 +1,842 @@
+from SEO_simulator import *
+
+
+class StabilizerSimulator(SEO_simulator):
+    """
+    This class is a child of class SEO_simulator. It reads the same English
+    files, but it can only simulate Clifford circuits, and it does so
+    without storing a state vector. Instead, it stores the stabilizer
+    tableau of the state (Aaronson and Gottesman, "Improved Simulation of
+    Stabilizer Circuits", arXiv:quant-ph/0406196), which takes O(n^2) bits
+    of memory for n qubits. Each gate costs O(n) time and each MEAS O(n^2)
+    time, so circuits with thousands of qubits can be simulated.
+
+    The tableau has 2n+1 rows. Rows 0 to n-1 are the destabilizers, rows n
+    to 2n-1 the stabilizers, and row 2n is scratch space. Row k is the
+    Pauli string (-1)^r[k] prod_j X_j^x[k, j] Z_j^z[k, j], up to a phase
+    i^(x[k, j]*z[k, j]) for each qubit j, as in the paper. The stabilizers
+    generate the group of Pauli strings that leave the state unchanged.
+
+    A line is accepted iff its gate is a Clifford gate, up to a global
+    phase. That includes HAD2, SIGX, SIGY, SIGZ, PHAS, P0PH, P1PH, ROTX,
+    ROTY, ROTZ, ROTN and U_2_ lines without controls whose gate maps Pauli
+    matrices to Pauli matrices (e.g., rotations by multiples of 45
+    degrees), the same lines with one T or F control if their gate is a
+    Pauli matrix times a power of 1j (e.g., CNOT, CZ, controlled PHAS by
+    multiples of 90 degrees), SWAP lines without controls, and SWAY lines
+    that reduce to such gates. DIAG and MP_Y lines are not accepted. The
+    static method is_clifford_file() reads an English file without
+    simulating it, to find out whether this class can simulate it.
+
+    A MEAS of kind 2 does not create branches, as it does in
+    SEO_simulator. Instead, its outcome is chosen at random (with the
+    right probability) and recorded in self.meas_outcomes. Gates inside an
+    IF_M block are applied iff the recorded outcomes satisfy its
+    controls. Thus, the simulation follows a single trajectory of the
+    measured circuit. A MEAS of kind 0 (resp., 1) forces the outcome 0
+    (resp., 1), and multiplies self.expected_tot_prob by the probability of
+    that outcome. get_counts() samples the measurement of all qubits in the
+    final state.
+
+    Attributes
+    ----------
+    check_only : bool
+        True iff the lines are only checked for being Clifford, without
+        simulating them
+    is_clifford : bool
+        False iff a non Clifford line has been read (only used if
+        check_only=True. Otherwise, an error is raised)
+    mcase_is_on : bool
+        False iff inside an IF_M block whose controls are not satisfied by
+        self.meas_outcomes
+    meas_outcomes : dict[int, bool]
+        outcomes of the MEAS of kind 2 done so far
+    rng : np.random.Generator
+        random number generator of the outcomes of MEAS of kind 2
+    tab_r : np.ndarray | None
+        uint8 array of shape (2n+1,) with the phase bits of the tableau
+    tab_x : np.ndarray | None
+        bool array of shape (2n+1, n) with the X bits of the tableau
+    tab_z : np.ndarray | None
+        bool array of shape (2n+1, n) with the Z bits of the tableau
+
+    """
+    # the state is not stored in self.br_arr, so loop bodies are
+    # never replaced by their matrix (see class SEO_simulator)
+    loop_mat_max_bits = 0
+
+    # list of (word, gate) for the 24 one qubit Clifford gates (modulo a
+    # global phase), where gate is the product of the H and S gates in
+    # word (a str applied left to right). Filled by get_clifford_word().
+    clifford_words = []
+
+    def __init__(self, file_prefix, num_bits, init_spin_dirs=None,
+                 check_only=False, rand_seed=None, **kwargs):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_prefix : str
+        num_bits : int
+        init_spin_dirs : list[int] | None
+            initial standard basis state, as a list of 0's and 1's,
+            the value of qubit k being init_spin_dirs[k]. The ground state
+            is used if None.
+        check_only : bool
+        rand_seed : int
+            seed of the outcomes of MEAS of kind 2
+        kwargs : dict
+            key-word arguments of SEO_reader
+
+        Returns
+        -------
+
+        """
+        self.num_bits = num_bits
+        self.check_only = check_only
+        self.is_clifford = True
+        self.mcase_is_on = True
+        self.meas_outcomes = {}
+        self.expected_tot_prob = 1.0
+        self.tab_x = None
+        self.tab_z = None
+        self.tab_r = None
+        if not check_only:
+            eye = np.eye(num_bits, dtype=bool)
+            zero = np.zeros((num_bits, num_bits), dtype=bool)
+            row = np.zeros((1, num_bits), dtype=bool)
+            self.tab_x = np.concatenate([eye, zero, row])
+            self.tab_z = np.concatenate([zero, eye, row])
+            self.tab_r = np.zeros((2*num_bits + 1,), dtype=np.uint8)
+            if init_spin_dirs is not None:
+                for bit, val in enumerate(init_spin_dirs):
+                    if val:
+                        self.apply_clifford_ops([('X', bit)])
+        self.rng = StateVec.get_rng(rand_seed)
+        self.cached_sts = {}
+        # attributes of SEO_simulator that this class does not use
+        self.dtype = np.complex128
+        self.batch_size = None
+        self.cur_st_vec_dict = {}
+        self.inplace_kernel = False
+        self.num_threads = 1
+        self.thread_pool = None
+
+        SEO_reader.__init__(self, file_prefix, num_bits, **kwargs)
+
+    @staticmethod
+    def is_clifford_file(file_prefix, num_bits, **kwargs):
+        """
+        Returns True iff all the lines of the English file with file_prefix
+        and num_bits can be simulated by this class. The file is read,
+        but not simulated.
+
+        Parameters
+        ----------
+        file_prefix : str
+        num_bits : int
+        kwargs : dict
+            key-word arguments of SEO_reader
+
+        Returns
+        -------
+        bool
+
+        """
+        return StabilizerSimulator(file_prefix, num_bits, check_only=True,
+                                   **kwargs).is_clifford
+
+    @staticmethod
+    def equal_up_to_phase(gate1, gate2):
+        """
+        Returns True iff the 2 dim unitary matrices gate1 and gate2 are
+        equal up to a global phase.
+
+        Parameters
+        ----------
+        gate1 : np.ndarray
+        gate2 : np.ndarray
+
+        Returns
+        -------
+        bool
+
+        """
+        return abs(abs(np.trace(np.dot(np.conj(gate1).T, gate2))) - 2) \
+            < 1e-8
+
+    @staticmethod
+    def get_clifford_word(gate):
+        """
+        Returns a str of H's and S's such that gate equals the product of
+        those gates (applied left to right), up to a global phase. Returns
+        None if gate is not a Clifford gate.
+
+        Parameters
+        ----------
+        gate : np.ndarray
+
+        Returns
+        -------
+        str | None
+
+        """
+        words = StabilizerSimulator.clifford_words
+        if not words:
+            gens = {'H': OneBitGates.had2(),
+                    'S': np.array([[1, 0], [0, 1j]])}
+            # breadth first search, so shortest words are found
+            words.append(('', np.eye(2)))
+            beg = 0
+            while len(words) < 24:
+                end = len(words)
+                for word, mat in words[beg: end]:
+                    for name, gen in gens.items():
+                        new_mat = np.dot(gen, mat)
+                        if not any(StabilizerSimulator.equal_up_to_phase(
+                                new_mat, old_mat) for _, old_mat in words):
+                            words.append((word + name, new_mat))
+                beg = end
+        for word, mat in words:
+            if StabilizerSimulator.equal_up_to_phase(gate, mat):
+                return word
+        return None
+
+    @staticmethod
+    def get_pauli_and_phase(gate):
+        """
+        Returns (pauli, k) such that gate = 1j^k times pauli, where pauli
+        is one of 'I', 'X', 'Y', 'Z'. Returns None if there are no such
+        (pauli, k).
+
+        Parameters
+        ----------
+        gate : np.ndarray
+
+        Returns
+        -------
+        tuple[str, int] | None
+
+        """
+        paulis = {'I': np.eye(2), 'X': OneBitGates.sigx(),
+                  'Y': OneBitGates.sigy(), 'Z': OneBitGates.sigz()}
+        for pauli, mat in paulis.items():
+            fac = np.trace(np.dot(mat, gate))/2
+            if np.linalg.norm(gate - fac*mat) > 1e-8:
+                continue
+            k = int(np.round(np.angle(fac)/(np.pi/2))) % 4
+            if abs(fac - 1j**k) < 1e-8:
+                return pauli, k
+        return None
+
+    def note_non_clifford(self):
+        """
+        Records that the current line is not a Clifford gate, or raises an
+        error if self.check_only is False.
+
+        Returns
+        -------
+        None
+
+        """
+        self.is_clifford = False
+        assert self.check_only, "StabilizerSimulator can't simulate " \
+            "non Clifford line: " + str(self.split_line)
+
+    def rowsum(self, rows, i):
+        """
+        Replaces each row h in `rows` of the tableau by the product of row
+        i and row h, including the phase (rowsum(h, i) of the paper,
+        done for all h in rows at once).
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            int array of rows
+        i : int
+
+        Returns
+        -------
+        None
+
+        """
+        x1 = self.tab_x[i]
+        z1 = self.tab_z[i]
+        x2 = self.tab_x[rows].astype(np.int8)
+        z2 = self.tab_z[rows].astype(np.int8)
+        # g = exponent to which i is raised when the 2 Paulis of a qubit
+        # are multiplied
+        g = (x1 & z1)*(z2 - x2) + \
+            (x1 & ~z1)*(z2*(2*x2 - 1)) + \
+            (~x1 & z1)*(x2*(1 - 2*z2))
+        tot = 2*self.tab_r[rows].astype(np.int64) + 2*int(self.tab_r[i]) + \
+            np.sum(g, axis=1, dtype=np.int64)
+        self.tab_r[rows] = (tot % 4) // 2
+        self.tab_x[rows] ^= x1
+        self.tab_z[rows] ^= z1
+
+    def apply_clifford_ops(self, ops):
+        """
+        Applies to the tableau the list of elementary Clifford gates ops.
+        Each op is a tuple (name, bit) with name in 'H', 'S', 'X', 'Y',
+        'Z', or a tuple (name, bit1, bit2) with name 'CNOT' (bit1 is the
+        control) or 'SWAP'. Does nothing if self.check_only is True.
+
+        Parameters
+        ----------
+        ops : list[tuple]
+
+        Returns
+        -------
+        None
+
+        """
+        if self.check_only:
+            return
+        x, z, r = self.tab_x, self.tab_z, self.tab_r
+        for op in ops:
+            name = op[0]
+            if name == 'H':
+                a = op[1]
+                r ^= x[:, a] & z[:, a]
+                x[:, a], z[:, a] = z[:, a].copy(), x[:, a].copy()
+            elif name == 'S':
+                a = op[1]
+                r ^= x[:, a] & z[:, a]
+                z[:, a] ^= x[:, a]
+            elif name == 'X':
+                r ^= z[:, op[1]]
+            elif name == 'Y':
+                r ^= x[:, op[1]] ^ z[:, op[1]]
+            elif name == 'Z':
+                r ^= x[:, op[1]]
+            elif name == 'CNOT':
+                a, b = op[1], op[2]
+                r ^= x[:, a] & z[:, b] & ~(x[:, b] ^ z[:, a])
+                x[:, b] ^= x[:, a]
+                z[:, a] ^= z[:, b]
+            elif name == 'SWAP':
+                a, b = op[1], op[2]
+                x[:, [a, b]] = x[:, [b, a]]
+                z[:, [a, b]] = z[:, [b, a]]
+            else:
+                assert False, 'unsupported Clifford op'
+
+    def evolve_by_controlled_bit_swap(self, bit1, bit2, controls):
+        """
+        Overrides the parent class method. Only swaps without controls are
+        Clifford.
+
+        Parameters
+        ----------
+        bit1 : int
+        bit2 : int
+        controls : Controls
+
+        Returns
+        -------
+        None
+
+        """
+        if not self.mcase_is_on:
+            return
+        if controls.bit_pos_to_kind:
+            self.note_non_clifford()
+            return
+        self.apply_clifford_ops([('SWAP', bit1, bit2)])
+
+    def evolve_by_controlled_one_bit_gate(self,
+                tar_bit_pos, controls, one_bit_gate):
+        """
+        Overrides the parent class method. Decomposes the controlled gate
+        into elementary Clifford gates and applies them to the tableau.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        controls : Controls
+        one_bit_gate : np.ndarray
+
+        Returns
+        -------
+        None
+
+        """
+        if not self.mcase_is_on:
+            return
+        num_controls = len(controls.bit_pos_to_kind)
+        if num_controls == 0:
+            word = StabilizerSimulator.get_clifford_word(one_bit_gate)
+            if word is None:
+                self.note_non_clifford()
+                return
+            self.apply_clifford_ops([(name, tar_bit_pos) for name in word])
+            return
+        pauli_and_phase = StabilizerSimulator.get_pauli_and_phase(
+            one_bit_gate)
+        if pauli_and_phase == ('I', 0):
+            return
+        if num_controls > 1 or pauli_and_phase is None:
+            self.note_non_clifford()
+            return
+        pauli, k = pauli_and_phase
+        (trol, kind), = controls.bit_pos_to_kind.items()
+        tar = tar_bit_pos
+        core = {'I': [],
+                'X': [('CNOT', trol, tar)],
+                'Y': [('S', tar)]*3 + [('CNOT', trol, tar), ('S', tar)],
+                'Z': [('H', tar), ('CNOT', trol, tar), ('H', tar)]}[pauli]
+        # phase 1j^k when trol is 1
+        ops = core + [('S', trol)]*k
+        if not kind:
+            ops = [('X', trol)] + ops + [('X', trol)]
+        self.apply_clifford_ops(ops)
+
+    def use_DIAG(self, trols, rad_angles):
+        """
+        Overrides the parent class use_ function. Not supported.
+
+        Parameters
+        ----------
+        trols : Controls
+        rad_angles : list[float]
+
+        Returns
+        -------
+        None
+
+        """
+        if self.mcase_is_on:
+            self.note_non_clifford()
+
+    def use_MP_Y(self, tar_bit_pos, trols, rad_angles):
+        """
+        Overrides the parent class use_ function. Not supported.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        trols : Controls
+        rad_angles : list[float]
+
+        Returns
+        -------
+        None
+
+        """
+        if self.mcase_is_on:
+            self.note_non_clifford()
+
+    def use_IF_M_beg(self, controls):
+        """
+        Sets self.mcase_is_on according to whether self.meas_outcomes
+        satisfy the IF_M controls.
+
+        Parameters
+        ----------
+        controls : Controls
+
+        Returns
+        -------
+        None
+
+        """
+        self.mcase_is_on = self.check_only or all(
+            self.meas_outcomes[bit] == kind for bit, kind in
+            controls.bit_pos_to_kind.items())
+
+    def use_IF_M_end(self):
+        """
+        Sets self.mcase_is_on to True.
+
+        Returns
+        -------
+        None
+
+        """
+        self.mcase_is_on = True
+
+    def measure(self, tar_bit_pos, forced_val=None):
+        """
+        Measures qubit tar_bit_pos in the Z basis, updating the tableau.
+        Returns the outcome (a bool) and its probability (1 or 1/2). If the
+        outcome is random, it is forced_val if that is not None, or else
+        chosen at random.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        forced_val : bool | None
+
+        Returns
+        -------
+        bool, float
+
+        """
+        n = self.num_bits
+        a = tar_bit_pos
+        x, z, r = self.tab_x, self.tab_z, self.tab_r
+        stab_rows = np.flatnonzero(x[n: 2*n, a]) + n
+        if len(stab_rows) > 0:
+            # outcome is random
+            p = stab_rows[0]
+            rows = np.flatnonzero(x[:2*n, a])
+            rows = rows[rows != p]
+            if len(rows) > 0:
+                self.rowsum(rows, p)
+            x[p - n], z[p - n], r[p - n] = x[p], z[p], r[p]
+            x[p] = False
+            z[p] = False
+            z[p, a] = True
+            if forced_val is None:
+                forced_val = bool(self.rng.integers(2))
+            r[p] = int(forced_val)
+            return forced_val, 0.5
+        # outcome is determined. Multiply in scratch row the stabilizers
+        # that correspond to the destabilizers with an X at a
+        x[2*n] = False
+        z[2*n] = False
+        r[2*n] = 0
+        for i in np.flatnonzero(x[:n, a]):
+            self.rowsum(np.array([2*n]), i + n)
+        val = bool(r[2*n])
+        if forced_val is not None and forced_val != val:
+            return val, 0.0
+        return val, 1.0
+
+    def use_MEAS(self, tar_bit_pos, kind):
+        """
+        Overrides the parent class use_ function.
+
+        For kind 0 (resp., 1) measurements, it forces the outcome 0 (resp.,
+        1) and multiplies self.expected_tot_prob by its probability. For
+        kind 2 measurements, it chooses the outcome at random and records
+        it in self.meas_outcomes.
+
+        Parameters
+        ----------
+        tar_bit_pos : int
+        kind : int
+
+        Returns
+        -------
+        None
+
+        """
+        if self.check_only:
+            return
+        if kind in [0, 1]:
+            val, prob = self.measure(tar_bit_pos, forced_val=(kind == 1))
+            assert prob > 0, "MEAS of kind " + str(kind) + \
+                " projects the state to zero"
+            self.expected_tot_prob *= prob
+        elif kind == 2:
+            val, prob = self.measure(tar_bit_pos)
+            self.meas_outcomes[tar_bit_pos] = val
+        else:
+            assert False, 'unsupported measurement kind'
+
+    def get_stabilizer_strs(self):
+        """
+        Returns a list of the num_bits stabilizers of the state, as strings
+        such as '+XZIY', whose character k after the sign is the Pauli
+        matrix for qubit k.
+
+        Returns
+        -------
+        list[str]
+
+        """
+        n = self.num_bits
+        strs = []
+        for row in range(n, 2*n):
+            s = '-' if self.tab_r[row] else '+'
+            for xb, zb in zip(self.tab_x[row], self.tab_z[row]):
+                s += 'IXZY'[int(xb) + 2*int(zb)]
+            strs.append(s)
+        return strs
+
+    def get_affine_space(self):
+        """
+        The outcomes of measuring all qubits (in the Z basis) of a
+        stabilizer state are uniformly distributed over an affine subspace
+        of GF(2)^num_bits. This method returns a point x0 of that subspace
+        and a basis of its linear part, as bool arrays of shape (
+        num_bits,) and (dim, num_bits). Entry k of an outcome is the value
+        of qubit k.
+
+        The stabilizers are row reduced over their X bits, keeping track of
+        the phases. The stabilizers left with no X bits, (-1)^r Z^z,
+        give the linear equations z.x = r that the outcomes x satisfy.
+
+        Returns
+        -------
+        np.ndarray, np.ndarray
+
+        """
+        n = self.num_bits
+        old_tab = (self.tab_x.copy(), self.tab_z.copy(), self.tab_r.copy())
+        try:
+            x, z, r = self.tab_x, self.tab_z, self.tab_r
+            # stabilizer rows still unused as pivots
+            beg = n
+            for col in range(n):
+                rows = np.flatnonzero(x[beg: 2*n, col]) + beg
+                if len(rows) == 0:
+                    continue
+                p = rows[0]
+                for arr in [x, z, r]:
+                    arr[[beg, p]] = arr[[p, beg]]
+                rows = np.flatnonzero(x[n: 2*n, col]) + n
+                rows = rows[rows != beg]
+                if len(rows) > 0:
+                    self.rowsum(rows, beg)
+                beg += 1
+            # rows beg to 2n-1 have no X bits. Row reduce them over GF(2)
+            eqs = z[beg: 2*n].copy()
+            rhs = r[beg: 2*n].astype(bool)
+        finally:
+            self.tab_x, self.tab_z, self.tab_r = old_tab
+        pivots = []
+        row = 0
+        for col in range(n):
+            rows = np.flatnonzero(eqs[row:, col]) + row
+            if len(rows) == 0:
+                continue
+            p = rows[0]
+            eqs[[row, p]] = eqs[[p, row]]
+            rhs[[row, p]] = rhs[[p, row]]
+            others = np.flatnonzero(eqs[:, col])
+            others = others[others != row]
+            eqs[others] ^= eqs[row]
+            rhs[others] ^= rhs[row]
+            pivots.append(col)
+            row += 1
+        x0 = np.zeros((n,), dtype=bool)
+        x0[pivots] = rhs[:len(pivots)]
+        free_cols = [col for col in range(n) if col not in set(pivots)]
+        basis = np.zeros((len(free_cols), n), dtype=bool)
+        for k, col in enumerate(free_cols):
+            basis[k, col] = True
+            basis[k, pivots] = eqs[:len(pivots), col]
+        return x0, basis
+
+    def get_pd(self):
+        """
+        Returns the probability distribution of the measurement of all
+        qubits, as an array of shape (2^num_bits,) indexed in the ZL
+        convention, like StateVec.get_pd(). Only for small num_bits.
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        x0, basis = self.get_affine_space()
+        dim = len(basis)
+        # weight of qubit k in the ZL index
+        weights = 1 << np.arange(self.num_bits)
+        pd = np.zeros((1 << self.num_bits,))
+        for coefs in it.product([0, 1], repeat=dim):
+            outcome = x0 ^ (np.dot(np.array(coefs, dtype=int),
+                                   basis.astype(int)) % 2).astype(bool)
+            pd[np.dot(weights, outcome)] = 1/(1 << dim)
+        return pd
+
+    def get_bit_probs(self):
+        """
+        Returns a list whose jth item is, for the jth qubit, the pair (p,
+        1-p), where p is the probability that the jth qubit is 0,
+        like StateVec.get_bit_probs(), but for any num_bits. A qubit is
+        uniformly distributed iff some vector of the basis of the affine
+        subspace (see get_affine_space()) is nonzero for it. Otherwise,
+        it is fixed.
+
+        Returns
+        -------
+        list[tuple[float, float]]
+
+        """
+        x0, basis = self.get_affine_space()
+        probs = []
+        for bit in range(self.num_bits):
+            if np.any(basis[:, bit]):
+                p = .5
+            else:
+                p = 0. if x0[bit] else 1.
+            probs.append((p, 1-p))
+        return probs
+
+    def get_counts(self, num_shots, omit_zero_counts=True,
+                   use_bin_labels=True, rand_seed=None, use_int_keys=False):
+        """
+        Same as the method of the parent class, but the state names are
+        sorted and only those with nonzero counts are included (
+        omit_zero_counts must be True), because there are 2^num_bits
+        states. The outcomes are sampled from the affine subspace (see
+        get_affine_space()) in O(num_shots*num_bits*dim) time.
+
+        Parameters
+        ----------
+        num_shots : int
+        omit_zero_counts : bool
+        use_bin_labels : bool
+        rand_seed : int
+        use_int_keys : bool
+
+        Returns
+        -------
+        OrderedDict[str | int, int]
+
+        """
+        assert omit_zero_counts, "StabilizerSimulator.get_counts() " \
+            "only supports omit_zero_counts=True"
+        rng = StateVec.get_rng(rand_seed)
+        x0, basis = self.get_affine_space()
+        coefs = rng.integers(2, size=(num_shots, len(basis)))
+        outcomes = x0 ^ (np.dot(coefs, basis.astype(int)) % 2).astype(bool)
+        return StateVec.get_counts_from_bit_arr(outcomes, use_bin_labels,
+                                                use_int_keys)
+
+    def get_norm_drift(self):
+        """
+        Returns 0. The tableau has no round-off error.
+
+        Returns
+        -------
+        float
+
+        """
+        return 0.0
+
+    def describe_st_vec_dict(self, **kwargs):
+        """
+        This class has no state vector dictionary. Prints the stabilizers
+        instead.
+
+        Parameters
+        ----------
+        kwargs : dict
+
+        Returns
+        -------
+        None
+
+        """
+        print('stabilizers=', self.get_stabilizer_strs())
+        print('kind 2 MEAS outcomes=', self.meas_outcomes)
+
+    def finalize_next_line(self):
+        """
+        Prints running documentary at the end of the reading of each line.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.verbose:
+            print('\n')
+            print(self.split_line)
+            print('line number = ', self.line_count)
+            print('operation = ', self.num_ops)
+            if not self.check_only:
+                self.describe_st_vec_dict()
+
+    def use_PRINT(self, style, line_num):
+        """
+        Prints to screen the stabilizers. For style "ALL", it also stores
+        them in self.cached_sts[line_num].
+
+        Parameters
+        ----------
+        style : str
+            style in which to print
+        line_num : int
+            line number in eng & pic files in which PRINT command appears
+
+        Returns
+        -------
+        None
+
+        """
+        if self.check_only:
+            return
+        print("\n*************************beginning PRINT output")
+        print("PRINT line number=" + str(line_num))
+        self.describe_st_vec_dict()
+        if style == "ALL":
+            self.cached_sts[line_num] = self.get_stabilizer_strs()
+        elif style != "V1":
+            assert False, "unsupported PRINT style"
+        print("****************************ending PRINT output")
+
+
+if __name__ == "__main__":
+    import time
+
+    def get_random_clifford_line_list(num_bits, num_gates, rand):
+        line_list = []
+        for k in range(num_gates):
+            tar, trol = rand.choice(num_bits, 2, replace=False)
+            kind = rand.randint(6)
+            if kind == 0:
+                line_list.append('HAD2\tAT\t' + str(tar))
+            elif kind == 1:
+                line_list.append('SIGX\tAT\t' + str(tar) +
+                                 '\tIF\t' + str(trol) + 'T')
+            elif kind == 2:
+                line_list.append('SIGZ\tAT\t' + str(tar) +
+                                 '\tIF\t' + str(trol) + 'F')
+            elif kind == 3:
+                line_list.append('PHAS\t90.0\tAT\t' + str(tar) +
+                                 '\tIF\t' + str(trol) + 'T')
+            elif kind == 4:
+                line_list.append('ROTY\t45.0\tAT\t' + str(tar))
+            else:
+                line_list.append('P1PH\t270.0\tAT\t' + str(tar))
+        return line_list
+
+    def main():
+        # compare with SEO_simulator
+        rand = np.random.RandomState(1234)
+        num_bits = 6
+        for trial in range(5):
+            ckt = SEO_CompiledCkt(None, num_bits,
+                line_list=get_random_clifford_line_list(num_bits, 60, rand))
+            sim = StabilizerSimulator(None, num_bits, compiled_ckt=ckt)
+            sim0 = SEO_simulator(None, num_bits, compiled_ckt=ckt)
+            err = np.linalg.norm(sim.get_pd() -
+                                 sim0.cur_st_vec_dict['pure'].get_pd())
+            print('pd error=', err, ', stabilizers=',
+                  sim.get_stabilizer_strs())
+
+        # detect whether English files are Clifford
+        for file_prefix, num_bits in [('io_folder/sim_test1', 6),
+                                      ('io_folder/teleportation-with-ifs',
+                                       3)]:
+            print(file_prefix, ', is Clifford=',
+                  StabilizerSimulator.is_clifford_file(file_prefix,
+                                                       num_bits))
+
+        # GHZ state on many qubits
+        num_bits = 1000
+        line_list = ['HAD2\tAT\t0']
+        for k in range(1, num_bits):
+            line_list.append('SIGX\tAT\t' + str(k) + '\tIF\t' +
+                             str(k - 1) + 'T')
+        line_list += get_random_clifford_line_list(num_bits, 1000, rand)
+        ckt = SEO_CompiledCkt(None, num_bits, line_list=line_list)
+        start = time.time()
+        sim = StabilizerSimulator(None, num_bits, compiled_ckt=ckt)
+        secs = time.time() - start
+        start = time.time()
+        counts = sim.get_counts(1000, rand_seed=5)
+        secs_counts = time.time() - start
+        print('num_bits=', num_bits, ', num_ops=', sim.num_ops,
+              ', secs=', '{:.3f}'.format(secs),
+              ', get_counts secs=', '{:.3f}'.format(secs_counts),
+              ', num distinct outcomes=', len(counts))
+
+    main()
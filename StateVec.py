@@ -24,11 +24,31 @@ class StateVec:
 
     IMPORTANT: See docstring of method get_traditional_st_vec() for
     explanation of qubit ordering conventions and shape of self.arr
+
+    A StateVec can also hold a batch (stack) of state vectors, in which
+    case self.arr has shape [batch_size] + [2]*num_bits. Axis 0 is then
+    the batch axis and axis k+1 corresponds to qubit k. SEO_simulator
+    evolves all the state vectors of a batch together. Only some methods
+    of this class (for example, get_traditional_st_vec(),
+    get_total_prob(), get_batch_size()) support batches.
     
+    By default, self.arr has dtype np.complex128. The methods that create
+    a StateVec have a `dtype` argument that can be set to np.complex64 (
+    single precision) to halve the memory used by self.arr. SEO_simulator
+    preserves the dtype of its initial state vector.
+
+    self.arr can also be an np.memmap, a numpy array backed by a file on
+    disk instead of by RAM (see get_memmap_st_vec()). This allows state
+    vectors that are too big to fit in RAM. Such a state vector should be
+    evolved with SEO_simulator_oc, which reads and writes it block by
+    block. get_total_prob() also works block by block for an np.memmap,
+    but most other methods of this class load the whole array into RAM.
+
     Attributes
     ----------
     arr : np.ndarray
-         a complex array of shape [2]*num_bits
+         a complex array of shape [2]*num_bits, or [batch_size] + [
+         2]*num_bits for a batch of state vectors
     num_bits : int
 
     """
@@ -48,7 +68,22 @@ class StateVec:
         self.num_bits = num_bits
         self.arr = arr
         if arr is not None:
-            assert self.arr.shape == tuple([2]*self.num_bits)
+            assert self.arr.shape[-num_bits:] == tuple([2]*self.num_bits)\
+                and self.arr.ndim in [num_bits, num_bits + 1]
+
+    def get_batch_size(self):
+        """
+        Returns the number of state vectors in the batch self.arr, or None
+        if self.arr is a single state vector (or None).
+
+        Returns
+        -------
+        int | None
+
+        """
+        if self.arr is None or self.arr.ndim == self.num_bits:
+            return None
+        return self.arr.shape[0]
 
     @staticmethod
     def is_zero(st_vec):
@@ -79,7 +114,7 @@ class StateVec:
         return str(self.arr)
 
     @staticmethod
-    def get_ground_st_vec(num_bits):
+    def get_ground_st_vec(num_bits, dtype=np.complex128):
         """
         Returns StateVec for the ground state |0>|0>|0>...|0>, where |0> = [
         1,0]^t and |1> = [0,1]^t, t = transpose
@@ -87,13 +122,15 @@ class StateVec:
         Parameters
         ----------
         num_bits : int
+        dtype : np.dtype
+            np.complex128 or np.complex64
 
         Returns
         -------
         StateVec
 
         """
-        ty = np.complex128
+        ty = dtype
         assert num_bits > 0
         arr = np.zeros([1 << num_bits], dtype=ty)
         arr[0] = 1
@@ -101,15 +138,54 @@ class StateVec:
         return StateVec(num_bits, arr)
 
     @staticmethod
-    def get_random_st_vec(num_bits, rand_seed=None):
+    def get_memmap_st_vec(num_bits, file_name, dtype=np.complex128,
+                          mode='w+'):
+        """
+        Returns a StateVec whose arr is an np.memmap of shape [2]*num_bits
+        backed by the file file_name. If mode='w+', the file is created (
+        or overwritten) and the state is set to the ground state |0>|0>|0>
+        ...|0>. If mode='r+', the state stored in an existing file is used.
+
+        Parameters
+        ----------
+        num_bits : int
+        file_name : str
+        dtype : np.dtype
+            np.complex128 or np.complex64
+        mode : str
+            either 'w+' or 'r+'
+
+        Returns
+        -------
+        StateVec
+
+        """
+        assert num_bits > 0
+        assert mode in ['w+', 'r+']
+        arr = np.memmap(file_name, dtype=dtype, mode=mode,
+                        shape=tuple([2]*num_bits))
+        if mode == 'w+':
+            # a new memmap file is filled with zeros
+            arr[(0,)*num_bits] = 1
+        return StateVec(num_bits, arr)
+
+    @staticmethod
+    def get_random_st_vec(num_bits, rand_seed=None, batch_size=None,
+                          dtype=np.complex128):
         """
         Returns StateVec for random state \sum_b^n A(b^n)|b^n>, b^n \in {0,
         1}^n, where n=num_bits and \sum_b^n |A( b^n)|^2 = 1
 
+        If batch_size is not None, returns a batch of batch_size such
+        random states, each normalized separately.
+
         Parameters
         ----------
         num_bits : int
         rand_seed : int
+        batch_size : int | None
+        dtype : np.dtype
+            np.complex128 or np.complex64
 
         Returns
         -------
@@ -118,6 +194,10 @@ class StateVec:
         """
         if rand_seed:
             np.random.seed(rand_seed)
+        if batch_size is not None:
+            arr = np.stack([StateVec.get_random_st_vec(num_bits).arr
+                            for k in range(batch_size)])
+            return StateVec(num_bits, arr.astype(dtype, copy=False))
         # returns array of random numbers in [0, 1] interval
         mat_phi = 2*np.pi*np.random.random(1 << num_bits)
         mat_r = np.random.random(1 << num_bits)
@@ -125,10 +205,11 @@ class StateVec:
         magnitude = np.linalg.norm(arr)
         arr /= magnitude
         arr = arr.reshape([2]*num_bits)
-        return StateVec(num_bits, arr)
+        return StateVec(num_bits, arr.astype(dtype, copy=False))
 
     @staticmethod
-    def get_standard_basis_st_vec(spin_dir_list, ZL=True):
+    def get_standard_basis_st_vec(spin_dir_list, ZL=True,
+                                  dtype=np.complex128):
         """
         If ZL = True, returns StateVec for state ...|s2>|s1>|s0>,
         where spin_dir_list=[...,s2, s1, s0], s_j \in {0, 1} for all j,
@@ -141,6 +222,8 @@ class StateVec:
         ZL : bool
             True(False) if last(first) entry of spin_dir_list refers to
             qubit 0
+        dtype : np.dtype
+            np.complex128 or np.complex64
 
         Returns
         -------
@@ -148,7 +231,7 @@ class StateVec:
 
         """
         num_bits = len(spin_dir_list)
-        arr = np.zeros([1 << num_bits], dtype=np.complex128)
+        arr = np.zeros([1 << num_bits], dtype=dtype)
         arr = arr.reshape([2]*num_bits)
         if ZL:
             spin_dir_list = reversed(spin_dir_list)
@@ -158,6 +241,33 @@ class StateVec:
         arr[tuple(spin_dir_list)] = 1
         return StateVec(num_bits, arr)
 
+    @staticmethod
+    def get_standard_basis_batch_st_vec(num_bits, dtype=np.complex128):
+        """
+        Returns a batch of all 2^num_bits standard basis states. Batch
+        member s is the basis state whose traditional state vector (see
+        get_traditional_st_vec()) is 1 at row s and 0 elsewhere. Hence,
+        if a batch state vector is evolved by a circuit, the s'th row of
+        its traditional view is the s'th column of the circuit's matrix.
+
+        Parameters
+        ----------
+        num_bits : int
+        dtype : np.dtype
+            np.complex128 or np.complex64
+
+        Returns
+        -------
+        StateVec
+
+        """
+        dim = 1 << num_bits
+        arr = np.eye(dim, dtype=dtype).reshape([dim] + [2]*num_bits)
+        # reverse qubit axes to go from ZL to ZF convention
+        perm = [0] + list(reversed(range(1, num_bits + 1)))
+        arr = np.ascontiguousarray(np.transpose(arr, perm))
+        return StateVec(num_bits, arr)
+
     def get_traditional_st_vec(self):
         """
 
@@ -184,6 +294,9 @@ class StateVec:
         >>> int(x, 2)
         3
 
+        For a batch of state vectors, returns an array of shape (
+        batch_size, 1 << num_bits) whose rows are the traditional views.
+
         Parameters
         ----------
 
@@ -192,6 +305,10 @@ class StateVec:
         np.array
 
         """
+        if self.get_batch_size() is not None:
+            perm = [0] + list(reversed(range(1, self.num_bits + 1)))
+            return np.transpose(self.arr, perm).reshape(
+                (self.arr.shape[0], 1 << self.num_bits))
         perm = list(reversed(range(self.num_bits)))
         return np.transpose(self.arr, perm).flatten()
 
@@ -202,6 +319,9 @@ class StateVec:
         Returns a density matrix (indexed in ZL convention) constructed from
         st_vec_dict which is a dict from strings to StateVec.
 
+        The density matrix has 4^num_bits entries. If only its diagonal is
+        needed, use get_st_vec_dict_pd() instead.
+
         The rows and columns are always labelled 0, 1, 2, .. or binary
         representation thereof, regardless of whether ZL or ZF convention.
         To switch between bin to dec representations of labels,
@@ -271,6 +391,143 @@ class StateVec:
         dm = dm.reshape((dim, dim))
         return dm
 
+    def get_reduced_den_mat(self, kept_bits):
+        """
+        Returns the reduced density matrix of the qubits in kept_bits,
+        i.e., the partial trace of |self><self| over all the other qubits,
+        divided by its trace. This is the same as StateVec.get_partial_tr(
+        ) of StateVec.get_den_mat() of self, but the full density matrix is
+        never built. Instead, self.arr is contracted with its complex
+        conjugate over the traced axes in a single np.tensordot(),
+        so the memory used is O(4^k) for k=len(kept_bits) instead of O(
+        4^num_bits).
+
+        Parameters
+        ----------
+        kept_bits : list[int] | set[int]
+
+        Returns
+        -------
+        np.ndarray
+            shape=(dim, dim) where dim=2^len(kept_bits), indexed in ZL
+            convention (the largest kept bit first), like the output of
+            get_partial_tr().
+
+        """
+        return StateVec.get_st_vec_dict_reduced_den_mat(
+            self.num_bits, {'pure': self}, kept_bits)
+
+    @staticmethod
+    def get_st_vec_dict_reduced_den_mat(num_bits, st_vec_dict, kept_bits):
+        """
+        Returns the reduced density matrix of the qubits in kept_bits for
+        the density matrix of st_vec_dict. This is the same as
+        get_partial_tr() of get_den_mat(num_bits, st_vec_dict),
+        but calculated branch by branch as in get_reduced_den_mat(),
+        without building the full density matrix.
+
+        Parameters
+        ----------
+        num_bits : int
+        st_vec_dict : dict[str, StateVec]
+        kept_bits : list[int] | set[int]
+
+        Returns
+        -------
+        np.ndarray
+            shape=(dim, dim) where dim=2^len(kept_bits), indexed in ZL
+            convention
+
+        """
+        kept_bits = sorted(kept_bits)
+        assert set(kept_bits) <= set(range(num_bits))
+        traced_bits = [bit for bit in range(num_bits)
+                       if bit not in kept_bits]
+        num_kept = len(kept_bits)
+        dim = 1 << num_kept
+        den_mat = np.zeros((dim, dim), dtype=complex)
+        for br_key in st_vec_dict:
+            if StateVec.is_zero(st_vec_dict[br_key]):
+                continue
+            arr = st_vec_dict[br_key].arr
+            # axes of dm: kept bits of ket, then kept bits of bra,
+            # in increasing order
+            dm = np.tensordot(arr, np.conj(arr), (traced_bits, traced_bits))
+            # ZF to ZL
+            perm = list(reversed(range(num_kept))) + \
+                list(reversed(range(num_kept, 2*num_kept)))
+            den_mat += np.transpose(dm, perm).reshape((dim, dim))
+        tr = np.trace(den_mat)
+        assert abs(tr) > 1e-6
+        return den_mat/tr
+
+    def get_schmidt_probs(self, bits):
+        """
+        Returns the squares of the Schmidt coefficients of self (divided by
+        their sum) for the bipartition of the qubits into bits and the
+        rest, in decreasing order. These are the nonzero eigenvalues of
+        the reduced density matrix of either part. Let M be self.arr
+        reshaped into a matrix whose rows are indexed by the states of the
+        smaller part and whose columns are indexed by the states of the
+        larger part. They are calculated as the eigenvalues of M M^dag,
+        which is faster than the SVD of M.
+
+        Parameters
+        ----------
+        bits : list[int] | set[int]
+
+        Returns
+        -------
+        np.ndarray
+            shape=(min(2^len(bits), 2^(num_bits - len(bits))),)
+
+        """
+        bits = sorted(bits)
+        assert set(bits) <= set(range(self.num_bits))
+        rest = [bit for bit in range(self.num_bits) if bit not in bits]
+        if len(bits) > len(rest):
+            bits, rest = rest, bits
+        mat = np.transpose(self.arr, bits + rest).reshape(
+            (1 << len(bits), 1 << len(rest)))
+        probs = np.linalg.eigvalsh(np.dot(mat, np.conj(mat.T)))[::-1]
+        probs = np.maximum(probs, 0)
+        return probs/np.sum(probs)
+
+    def get_bipartition_entropy(self, bits):
+        """
+        Returns the entanglement entropy (using natural log) of self for
+        the bipartition of the qubits into bits and the rest. This is the
+        same as get_entropy() of get_reduced_den_mat(bits), but it is
+        calculated from the Schmidt spectrum (see get_schmidt_probs()),
+        without any density matrix.
+
+        Parameters
+        ----------
+        bits : list[int] | set[int]
+
+        Returns
+        -------
+        float
+
+        """
+        probs = self.get_schmidt_probs(bits)
+        probs = probs[probs > 1e-14]
+        return float(-np.sum(probs*np.log(probs)))
+
+    def get_cut_entropies(self):
+        """
+        Returns a list whose kth item is get_bipartition_entropy() for
+        the cut between qubits 0, 1, ..., k and qubits k+1, ...,
+        num_bits-1, for k in range(num_bits - 1).
+
+        Returns
+        -------
+        list[float]
+
+        """
+        return [self.get_bipartition_entropy(range(k + 1))
+                for k in range(self.num_bits - 1)]
+
     @staticmethod
     def get_impurity(den_mat):
         """
@@ -343,6 +600,36 @@ class StateVec:
         """
         return np.real(np.diag(den_mat))
 
+    @staticmethod
+    def get_st_vec_dict_pd(num_bits, st_vec_dict):
+        """
+        Returns the same probability distribution (indexed in ZL
+        convention) as get_den_mat_pd(get_den_mat(num_bits, st_vec_dict)),
+        but without building the 2^num_bits x 2^num_bits density matrix.
+        The diagonal of the density matrix is just the sum of the pd's of
+        the branches of st_vec_dict, normalized to 1.
+
+        Parameters
+        ----------
+        num_bits : int
+        st_vec_dict : dict[str, StateVec]
+
+        Returns
+        -------
+        np.ndarray
+            probability distribution of shape (2^num_bits,) indexed in ZL
+            convention
+
+        """
+        pd = np.zeros((1 << num_bits,), dtype=np.float64)
+        for br_key in st_vec_dict:
+            if StateVec.is_zero(st_vec_dict[br_key]):
+                continue
+            pd += st_vec_dict[br_key].get_pd()
+        tot_prob = np.sum(pd)
+        assert tot_prob > 1e-6
+        return pd/tot_prob
+
     def get_pd(self):
         """
         Returns copy of self.get_traditional_st_vec() with amplitudes
@@ -387,6 +674,43 @@ class StateVec:
         """
         return np.sum(np.real(np.conj(self.arr) * real_arr * self.arr))
 
+    def get_mean_value_of_pauli_str(self, term):
+        """
+        Returns the mean value <self|P|self> of the Pauli string P given by
+        `term`, a tuple of tuples of the form (bit_pos, action),
+        where action is 'X', 'Y' or 'Z' (this is the format of the keys of
+        the attribute `terms` of class QubitOperator of OpenFermion). The
+        identity acts on the bits not in term.
+
+        P|self> is calculated directly from self.arr, without a
+        measurement coda and without evolving with SEO_simulator: an X
+        flips the axis of its bit, a Z multiplies it by (1, -1) and a Y
+        does both and multiplies by i.
+
+        Parameters
+        ----------
+        term : tuple[tuple[int, str]]
+
+        Returns
+        -------
+        float
+
+        """
+        pauli_arr = self.arr
+        for bit_pos, action in term:
+            shape = [1]*self.num_bits
+            shape[bit_pos] = 2
+            if action == 'X':
+                pauli_arr = np.flip(pauli_arr, axis=bit_pos)
+            elif action == 'Y':
+                pauli_arr = np.flip(pauli_arr, axis=bit_pos) * \
+                    np.array([-1j, 1j]).reshape(shape)
+            elif action == 'Z':
+                pauli_arr = pauli_arr * np.array([1., -1.]).reshape(shape)
+            else:
+                assert False, 'unsupported Pauli matrix ' + str(action)
+        return np.sum(np.real(np.conj(self.arr) * pauli_arr))
+
     def get_total_prob(self):
         """
         Returns total probability of self.
@@ -399,10 +723,41 @@ class StateVec:
         float
 
         """
-        return np.sum(np.real(np.conj(self.arr)*self.arr))
+        if isinstance(self.arr, np.memmap):
+            # add blocks of 2^20 entries so as not to load whole file
+            flat_arr = self.arr.reshape(-1)
+            blk_len = 1 << 20
+            tot_prob = 0.0
+            for beg in range(0, flat_arr.size, blk_len):
+                x = flat_arr[beg: beg + blk_len]
+                tot_prob += np.sum(np.real(np.conj(x)*x), dtype=np.float64)
+            return tot_prob
+        # accumulate in double precision even if self.arr is complex64
+        return np.sum(np.real(np.conj(self.arr)*self.arr), dtype=np.float64)
+
+    @staticmethod
+    def get_rng(rand_seed=None):
+        """
+        Returns a new random number generator (an np.random.Generator)
+        for a single call of a sampling method. Sampling neither uses nor
+        changes the global state of np.random. If rand_seed is None, the
+        generator is seeded with fresh entropy from the OS, so sampling is
+        reproducible only if a rand_seed (0 included) is given.
+
+        Parameters
+        ----------
+        rand_seed : int | None
+
+        Returns
+        -------
+        np.random.Generator
+
+        """
+        return np.random.default_rng(rand_seed)
 
     @staticmethod
-    def get_observations_vec(num_bits, pd, num_shots, rand_seed=None):
+    def get_observations_vec(num_bits, pd, num_shots, rand_seed=None,
+                             rng=None):
         """
         vec = vector
 
@@ -420,7 +775,11 @@ class StateVec:
         num_shots,) with the result of doing num_shots repetitions of what
         was done for num_shots=1.
 
-        Does not assume that pd is normalized to 1.
+        Does not assume that pd is normalized to 1. pd may be single
+        precision (e.g., the output of get_pd() for a complex64 state
+        vector). Its cumulative sum is taken in double precision, and each
+        shot is a binary search of that cumulative sum, so the time is
+        O(2^num_bits + num_shots*num_bits).
 
         Parameters
         ----------
@@ -430,6 +789,9 @@ class StateVec:
             be indexed in ZL convention
         num_shots : int
         rand_seed : int
+            ignored if rng is not None
+        rng : np.random.Generator | None
+            random number generator. If None, get_rng(rand_seed) is used.
 
         Returns
         -------
@@ -437,19 +799,55 @@ class StateVec:
             shape (num_shots,)
 
         """
-        if rand_seed:
-            np.random.seed(rand_seed)
+        if rng is None:
+            rng = StateVec.get_rng(rand_seed)
         len_pd = 1 << num_bits
         assert pd.shape == (len_pd,)
-        tot_prob = np.sum(pd)
-        p = pd
-        if abs(tot_prob-1) > 1e-5:
-            p = pd/tot_prob
-        return np.random.choice(np.arange(0, len_pd), size=num_shots, p=p)
+        cum_pd = np.cumsum(pd, dtype=np.float64)
+        obs_vec = np.searchsorted(cum_pd, rng.random(num_shots)*cum_pd[-1],
+                                  side='right')
+        # guard against round-off at the top end
+        return np.minimum(obs_vec, len_pd - 1)
+
+    @staticmethod
+    def get_counts_dict(num_bits, states, counts, use_bin_labels=True,
+                        use_int_keys=False):
+        """
+        Returns an OrderedDict state_name_to_count that maps the name of
+        states[k] to counts[k], for all k. states are ints in ZL
+        convention. If use_int_keys=True, the names are the ints
+        themselves. Otherwise, they are as in get_counts_from_obs_vec().
+
+        Parameters
+        ----------
+        num_bits : int
+        states : np.ndarray | list[int]
+        counts : np.ndarray | list[int]
+        use_bin_labels : bool
+        use_int_keys : bool
+
+        Returns
+        -------
+        OrderedDict[str | int, int]
+
+        """
+        # tolist() gives python ints, which are faster to format
+        states = np.asarray(states).tolist()
+        counts = np.asarray(counts).tolist()
+        if use_int_keys:
+            return OrderedDict(zip(states, counts))
+        if use_bin_labels:
+            # same as np.binary_repr(s, width=num_bits) + 'ZL'
+            key_format = '{:0' + str(num_bits) + 'b}ZL'
+        else:
+            key_format = '{:d}'
+        return OrderedDict((key_format.format(s), s_count)
+                           for s, s_count in zip(states, counts))
 
     @staticmethod
     def get_counts_from_obs_vec(num_bits, obs_vec,
-                    use_bin_labels=True, omit_zero_counts=True):
+                    use_bin_labels=True, omit_zero_counts=True,
+                    use_int_keys=False):
         """
         This method takes as input an observations vector obs_vec such as
         returned by another method in this class, namely
@@ -458,7 +856,12 @@ class StateVec:
         times they occur in obs_vec. If use_bin_labels=True, state names are
         a string composed of a binary number that is num_bits long, followed
         by 'ZL' because ZL convention is assumed. If use_bin_labels=False,
-        state names are '0', '1', '2', etc.
+        state names are '0', '1', '2', etc. If use_int_keys=True,
+        state names are the ints 0, 1, 2, etc.
+
+        If omit_zero_counts=True, only the observed states are counted (
+        with np.unique()), in O(num_shots*log(num_shots)) time. Otherwise,
+        all 2^num_bits states are counted with np.bincount().
 
         Parameters
         ----------
@@ -466,25 +869,56 @@ class StateVec:
         obs_vec : np.ndarray
         use_bin_labels : bool
         omit_zero_counts : bool
+        use_int_keys : bool
+
+        Returns
+        -------
+        OrderedDict[str | int, int]
+
+        """
+        obs_vec = np.asarray(obs_vec, dtype=np.int64)
+        if omit_zero_counts:
+            states, counts = np.unique(obs_vec, return_counts=True)
+        else:
+            counts = np.bincount(obs_vec, minlength=1 << num_bits)
+            states = range(1 << num_bits)
+        return StateVec.get_counts_dict(num_bits, states, counts,
+                                        use_bin_labels, use_int_keys)
+
+    @staticmethod
+    def get_counts_from_bit_arr(bit_arr, use_bin_labels=True,
+                                use_int_keys=False):
+        """
+        Same as get_counts_from_obs_vec(), with omit_zero_counts=True,
+        but the observations are given as the rows of a bool array bit_arr
+        of shape (num_shots, num_bits), with column k holding the
+        measurement of qubit k. This is used for numbers of qubits too
+        large for the observations to be stored as int64.
+
+        Parameters
+        ----------
+        bit_arr : np.ndarray
+        use_bin_labels : bool
+        use_int_keys : bool
 
         Returns
         -------
-        OrderedDict[str, int]
+        OrderedDict[str | int, int]
 
         """
-        obs_list = list(obs_vec)
-        num_states = 1 << num_bits
+        # ZL convention, so qubit 0 is last
+        outcomes, counts = np.unique(bit_arr[:, ::-1], axis=0,
+                                     return_counts=True)
         state_name_to_count = OrderedDict()
-        for s in range(num_states):
-            s_count = obs_list.count(s)
-            if use_bin_labels:
-                # this returns string
-                key = np.binary_repr(s, width=num_bits)
+        for outcome, count in zip(outcomes, counts):
+            key = ''.join('1' if val else '0' for val in outcome)
+            if use_int_keys:
+                key = int(key, 2)
+            elif use_bin_labels:
                 key += 'ZL'
             else:
-                key = str(s)
-            if s_count > 0 or not omit_zero_counts:
-                state_name_to_count[key] = s_count
+                key = str(int(key, 2))
+            state_name_to_count[key] = int(count)
         return state_name_to_count
 
     @staticmethod
@@ -500,7 +934,7 @@ class StateVec:
         Parameters
         ----------
         num_bits : int
-        state_name_to_count : OrderedDict[str, int]
+        state_name_to_count : OrderedDict[str | int, int]
 
         Returns
         -------
@@ -511,8 +945,11 @@ class StateVec:
         emp_pd = np.zeros(shape=(1 << num_bits,), dtype=float)
         tot_counts = 0
         for st_name, count in state_name_to_count.items():
-            # state name ends in ZL so trim last two chars
-            pos = int(st_name[:-2], 2)
+            if isinstance(st_name, int):
+                pos = st_name
+            else:
+                # state name ends in ZL so trim last two chars
+                pos = int(st_name[:-2], 2)
             emp_pd[pos] = count
             tot_counts += count
         return emp_pd/tot_counts
@@ -703,6 +1140,14 @@ class StateVec:
         if self.arr is None:
             print("zero state vector")
             return
+        batch_size = self.get_batch_size()
+        if batch_size is not None:
+            # describe each state vector of batch separately
+            for k in range(batch_size):
+                print("---------batch member= " + str(k))
+                StateVec(self.num_bits, self.arr[k]).describe_self(
+                    print_st_vec, do_pp, omit_zero_amps, show_probs, ZL)
+            return
         if print_st_vec:
             print('state vector:')
             if do_pp:
@@ -774,10 +1219,15 @@ if __name__ == "__main__":
         print("den_mat\n", den_mat)
         print('trace_02 den_mat\n',
               StateVec.get_partial_tr(num_bits, den_mat, {0, 2}))
+        print('reduced den_mat of bit 1 without den_mat\n',
+              StateVec.get_st_vec_dict_reduced_den_mat(
+                  num_bits, st_vec_dict, [1]))
         print("impurity=", StateVec.get_impurity(den_mat))
         print("entropy=", StateVec.get_entropy(den_mat))
         den_mat_pd = StateVec.get_den_mat_pd(den_mat)
         print('den_mat_pd=', den_mat_pd)
+        print('same pd without den_mat=',
+              StateVec.get_st_vec_dict_pd(num_bits, st_vec_dict))
 
         st_vec_pd = st_vec0.get_pd()
         bit_probs_vec = StateVec.get_bit_probs(num_bits, st_vec_pd)
@@ -48,6 +48,9 @@ class MeanHamil:
         "one-shot" experiments.
     simulator_name : str | None
         name of the simulator.
+    term_groups : list[list[tuple]]
+        partition of the terms of hamil (the keys of hamil.terms) into
+        groups of qubit-wise commuting terms. See get_qwc_term_groups().
 
     """
     def __init__(self, file_prefix, num_bits, hamil,
@@ -82,6 +85,7 @@ class MeanHamil:
             self.init_st_vec = StateVec.get_ground_st_vec(self.num_bits)
         self.simulator_name = simulator_name
         self.num_samples = num_samples
+        self.term_groups = MeanHamil.get_qwc_term_groups(hamil)
 
     @staticmethod
     def check_hamil_is_herm(hamil):
@@ -106,6 +110,71 @@ class MeanHamil:
                     'BosonOperator constructor, ' +\
                     'the coefficient of every term must be real.'
 
+    @staticmethod
+    def get_qwc_term_groups(hamil):
+        """
+        Partitions the terms of the Hamiltonian hamil into groups of
+        qubit-wise commuting (QWC) terms. Two terms (Pauli strings) are QWC
+        if, for every qubit on which both act, they act with the same
+        Pauli matrix. All the terms of a group can be measured with the
+        same measurement coda (see get_group_xy_str()), so, when the mean
+        value is estimated by sampling, a single batch of shots suffices
+        for each group instead of one for each term.
+
+        The partition is found by greedy graph coloring: terms are
+        visited in order of decreasing number of Pauli matrices, and each
+        term is added to the first group with which it is QWC, or to a new
+        group if there is none.
+
+        Parameters
+        ----------
+        hamil : QubitOperator
+
+        Returns
+        -------
+        list[list[tuple]]
+
+        """
+        terms = sorted(hamil.terms.keys(), key=lambda term: -len(term))
+        groups = []
+        # bit_pos_to_action of each group
+        group_actions = []
+        for term in terms:
+            for group, actions in zip(groups, group_actions):
+                if all([actions.get(bit_pos, action) == action
+                        for bit_pos, action in term]):
+                    group.append(term)
+                    actions.update(dict(term))
+                    break
+            else:
+                groups.append([term])
+                group_actions.append(dict(term))
+        return groups
+
+    @staticmethod
+    def get_group_xy_str(group):
+        """
+        Returns the dictionary bit_pos_to_xy_str that specifies the
+        measurement coda shared by all the terms of `group`, a list of
+        qubit-wise commuting terms. It maps each qubit on which some term
+        of the group acts with an 'X' or 'Y' to that Pauli matrix.
+
+        Parameters
+        ----------
+        group : list[tuple]
+
+        Returns
+        -------
+        dict[int, str]
+
+        """
+        bit_pos_to_xy_str = {}
+        for term in group:
+            for bit_pos, action in term:
+                if action != 'Z':
+                    bit_pos_to_xy_str[bit_pos] = action
+        return bit_pos_to_xy_str
+
     def get_real_vec(self, term):
         """
         Internal method that returns a numpy array, of shape [2]*num_bits,
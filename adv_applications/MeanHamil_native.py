@@ -10,11 +10,32 @@ class MeanHamil_native(MeanHamil):
     simulators, such as `SEO_simulator`. That is why we call this class 
     native. 
 
+    If num_samples is zero, the English file (the ansatz) is simulated
+    only once per call to get_mean_val(), and the mean value of each term
+    of the Hamiltonian is calculated directly from that single final
+    state vector, with StateVec.get_mean_value_of_pauli_str(). No
+    measurement codas are needed.
+
+    If num_samples > 0, the terms of the Hamiltonian are partitioned into
+    groups of qubit-wise commuting terms (see self.term_groups), which can
+    share a measurement coda and a batch of num_samples shots. The
+    circuit for each group (the English file followed by the measurement
+    coda for that group) is written and compiled (see class
+    SEO_CompiledCkt) only once, the first time get_mean_val() is called.
+    Thereafter, each call to get_mean_val() only binds the new values of
+    the placeholder variables to the compiled circuits and simulates
+    them. No files are written, read or parsed.
+
     Attributes
     ----------
+    compiled_ckt : SEO_CompiledCkt | None
+        the compiled English file, without a measurement coda. Used when
+        num_samples is zero.
     list_of_supported_sims : list[str]
         list of the names of simulators supported by this class.
         self.simulator_name must be in this list.
+    group_compiled_ckts : list[SEO_CompiledCkt]
+        the compiled circuit for each group of self.term_groups
 
     """
 
@@ -37,81 +58,128 @@ class MeanHamil_native(MeanHamil):
         # can add to list of supported simulators in future
         self.list_of_supported_sims = ['SEO_simulator']
         assert self.simulator_name in self.list_of_supported_sims
+        self.group_compiled_ckts = []
+        self.compiled_ckt = None
 
-    def get_mean_val(self, var_num_to_rads):
+    def compile_group_ckts(self):
         """
-        This method predicts the mean value of the Hamiltonian hamil using
-        only Qubiter simulators and no data
-
-        Parameters
-        ----------
-        var_num_to_rads : dict[int, float]
+        This method is called by get_mean_val() the first time it is
+        called, if num_samples > 0. It fills the list
+        self.group_compiled_ckts.
 
         Returns
         -------
-        float
+        None
 
         """
         # give it name unlikely to exist already
         fin_file_prefix = self.file_prefix + '99345125047'
 
-        # hamil loop
-        mean_val = 0
-        for term, coef in self.hamil.terms.items():
-            # we have checked before that coef is real
-            coef = complex(coef).real
-
-            # add measurement coda for this term of hamil
+        for group in self.term_groups:
+            # add measurement coda for this group of terms of hamil
             wr = CodaSEO_writer(self.file_prefix,
                                 fin_file_prefix, self.num_bits)
-            bit_pos_to_xy_str =\
-                {bit: action for bit, action in term if action != 'Z'}
+            bit_pos_to_xy_str = MeanHamil.get_group_xy_str(group)
             wr.write_xy_measurements(bit_pos_to_xy_str)
             wr.close_files()
-
-            # run simulation. get fin state vec
-            vman = PlaceholderManager(
-                var_num_to_rads=var_num_to_rads,
-                fun_name_to_fun=self.fun_name_to_fun)
-            # simulator will change init_st_vec so use
-            # fresh copy of it each time
-            init_st_vec = cp.deepcopy(self.init_st_vec)
-            if self.simulator_name == 'SEO_simulator':
-                sim = SEO_simulator(fin_file_prefix, self.num_bits,
-                                    init_st_vec, vars_manager=vman)
-            else:
-                assert False, 'unsupported native simulator'
-            fin_st_vec = sim.cur_st_vec_dict['pure']
-            # print('inside pred hamil in/out stvec',
-            # self.init_st_vec, fin_st_vec)
-
-            # get effective state vec
-            if self.num_samples:
-                # if num_samples !=0, then
-                # sample qubiter-generated empirical prob dist
-                pd = fin_st_vec.get_pd()
-                obs_vec = StateVec.get_observations_vec(self.num_bits,
-                        pd, self.num_samples)
-                counts_dict = StateVec.get_counts_from_obs_vec(self.num_bits,
-                                                               obs_vec)
-                emp_pd = StateVec.get_empirical_pd_from_counts(self.num_bits,
-                                                               counts_dict)
-                # print('mmmmmmmm,,,', np.linalg.norm(pd-emp_pd))
-                emp_st_vec = StateVec.get_emp_state_vec_from_emp_pd(
-                        self.num_bits, emp_pd)
-                effective_st_vec = emp_st_vec
-            else:  # num_samples = 0
-                effective_st_vec = fin_st_vec
-
-            # add contribution to mean
-            real_arr = self.get_real_vec(term)
-            mean_val += coef*effective_st_vec.\
-                    get_mean_value_of_real_diag_mat(real_arr)
+            self.group_compiled_ckts.append(
+                SEO_CompiledCkt(fin_file_prefix, self.num_bits))
 
         # create this coda writer in order to delete final files
         wr1 = CodaSEO_writer(self.file_prefix, fin_file_prefix, self.num_bits)
         wr1.delete_fin_files()
 
+    def get_fin_st_vec(self, compiled_ckt, var_num_to_rads):
+        """
+        Simulates compiled_ckt, with the placeholder variables bound to
+        var_num_to_rads, starting from self.init_st_vec, and returns the
+        final state vector.
+
+        Parameters
+        ----------
+        compiled_ckt : SEO_CompiledCkt
+        var_num_to_rads : dict[int, float]
+
+        Returns
+        -------
+        StateVec
+
+        """
+        bound_ckt = compiled_ckt.bind_vars(
+            var_num_to_rads, self.fun_name_to_fun)
+        vman = PlaceholderManager(
+            var_num_to_rads=var_num_to_rads,
+            fun_name_to_fun=self.fun_name_to_fun)
+        # simulator will change init_st_vec so use
+        # fresh copy of it each time
+        init_st_vec = cp.deepcopy(self.init_st_vec)
+        if self.simulator_name == 'SEO_simulator':
+            sim = SEO_simulator(self.file_prefix, self.num_bits,
+                                init_st_vec, vars_manager=vman,
+                                compiled_ckt=bound_ckt)
+        else:
+            assert False, 'unsupported native simulator'
+        return sim.cur_st_vec_dict['pure']
+
+    def get_mean_val(self, var_num_to_rads):
+        """
+        This method predicts the mean value of the Hamiltonian hamil using
+        only Qubiter simulators and no data
+
+        Parameters
+        ----------
+        var_num_to_rads : dict[int, float]
+
+        Returns
+        -------
+        float
+
+        """
+        if not self.num_samples:
+            # simulate the ansatz once, and get the mean value of each
+            # term from the same final state vector
+            if self.compiled_ckt is None:
+                self.compiled_ckt = SEO_CompiledCkt(self.file_prefix,
+                                                    self.num_bits)
+            fin_st_vec = self.get_fin_st_vec(self.compiled_ckt,
+                                             var_num_to_rads)
+            mean_val = 0
+            for term, coef in self.hamil.terms.items():
+                # we have checked before that coef is real
+                coef = complex(coef).real
+                mean_val += coef*fin_st_vec.get_mean_value_of_pauli_str(term)
+            return mean_val
+
+        if not self.group_compiled_ckts:
+            self.compile_group_ckts()
+
+        # loop over groups of qubit-wise commuting terms of hamil
+        mean_val = 0
+        for group, compiled_ckt in zip(self.term_groups,
+                                       self.group_compiled_ckts):
+            # run simulation. get fin state vec
+            fin_st_vec = self.get_fin_st_vec(compiled_ckt, var_num_to_rads)
+
+            # get effective state vec by sampling
+            # qubiter-generated empirical prob dist
+            pd = fin_st_vec.get_pd()
+            obs_vec = StateVec.get_observations_vec(self.num_bits,
+                    pd, self.num_samples)
+            counts_dict = StateVec.get_counts_from_obs_vec(self.num_bits,
+                                                           obs_vec)
+            emp_pd = StateVec.get_empirical_pd_from_counts(self.num_bits,
+                                                           counts_dict)
+            effective_st_vec = StateVec.get_emp_state_vec_from_emp_pd(
+                    self.num_bits, emp_pd)
+
+            # add contribution to mean of each term of group
+            for term in group:
+                # we have checked before that coef is real
+                coef = complex(self.hamil.terms[term]).real
+                real_arr = self.get_real_vec(term)
+                mean_val += coef*effective_st_vec.\
+                        get_mean_value_of_real_diag_mat(real_arr)
+
         return mean_val
 
 if __name__ == "__main__":
@@ -27,14 +27,14 @@ class MeanHamil_rigetti(MeanHamil):
     Attributes
     ----------
     do_resets : bool
+    group_execs : list
+        the executable for each group of qubit-wise commuting terms in
+        self.term_groups. An executable is the output of PyQuil's
+        compile() method.
     pg : Program
         object of PyQuil class `Program`
     qc : QuantumComputer
         returned by PyQuil method get_qc()
-    term_to_exec : dict[]
-        maps a term to an executable. QubitOperator from OpenFermion has
-        attribute `terms` which is a dict from a term to a coefficient. An
-        executable is the output of PyQuil's compile() method.
     translation_line_list : list[str]
         a list of lines of PyQuil code generated by the translator. The
         lines all start with "pg +="
@@ -50,10 +50,12 @@ class MeanHamil_rigetti(MeanHamil):
 
         Do in constructor as much hamil indep stuff as possible so don't
         have to redo it with every call to cost fun. Also,
-        when self.num_samples !=0,  we store a dict called term_to_exec
-        mapping an executable (output of Rigetti compile() function) to a
-        term,  for each term in the hamiltonian hamil. When num_samples=0,
-        term_to_exec={}
+        when self.num_samples !=0,  we store a list called group_execs
+        with an executable (output of Rigetti compile() function) for each
+        group of qubit-wise commuting terms in the hamiltonian hamil (see
+        self.term_groups). The terms of a group share the same
+        measurement coda, so they can be evaluated from the same shots.
+        When num_samples=0, group_execs=[]
 
         Parameters
         ----------
@@ -87,6 +89,7 @@ class MeanHamil_rigetti(MeanHamil):
 
         pg = Program()
         self.pg = pg
+        self.group_execs = []
         if self.num_samples:
 
             # pg prelude
@@ -111,9 +114,8 @@ class MeanHamil_rigetti(MeanHamil):
 
             len_pg_in = len(pg)
 
-            # hamil loop to store executables for each term in hamil
-            self.term_to_exec = {}
-            for term, coef in self.hamil.terms.items():
+            # loop to store executables for each group of terms in hamil
+            for group in self.term_groups:
 
                 # reset pg to initial length.
                 # Temporary work-around to bug
@@ -124,8 +126,7 @@ class MeanHamil_rigetti(MeanHamil):
                 self.pg = pg
 
                 # add xy measurements coda to pg
-                bit_pos_to_xy_str =\
-                    {bit: action for bit, action in term if action != 'Z'}
+                bit_pos_to_xy_str = MeanHamil.get_group_xy_str(group)
                 MeanHamil_rigetti.add_xy_meas_coda_to_program(
                     pg, bit_pos_to_xy_str)
 
@@ -137,7 +138,7 @@ class MeanHamil_rigetti(MeanHamil):
 
                 executable = self.qc.compile(pg)
                 # print(",,,...", executable)
-                self.term_to_exec[term] = executable
+                self.group_execs.append(executable)
 
     @staticmethod
     def add_xy_meas_coda_to_program(prog, bit_pos_to_xy_str):
@@ -183,18 +184,15 @@ class MeanHamil_rigetti(MeanHamil):
         float
 
         """
-        # hamil loop
+        # loop over groups of qubit-wise commuting terms of hamil
         mean_val = 0
-        for term, coef in self.hamil.terms.items():
-            # we have checked before that coef is real
-            coef = complex(coef).real
-
+        for group_num, group in enumerate(self.term_groups):
             vprefix = self.translator.vprefix
             var_name_to_rads = {vprefix + str(vnum): [rads]
                 for vnum, rads in var_num_to_rads.items()}
             if self.num_samples:
                 # send and receive from cloud, get obs_vec
-                bitstrings = self.qc.run(self.term_to_exec[term],
+                bitstrings = self.qc.run(self.group_execs[group_num],
                                          memory_map=var_name_to_rads)
                 obs_vec = RigettiTools.obs_vec_from_bitstrings(
                         bitstrings, self.num_bits, bs_is_array=True)
@@ -219,8 +217,7 @@ class MeanHamil_rigetti(MeanHamil):
                     line = line.strip('\n')
                     if line:
                         exec(line)
-                bit_pos_to_xy_str =\
-                    {bit: action for bit, action in term if action != 'Z'}
+                bit_pos_to_xy_str = MeanHamil.get_group_xy_str(group)
                 MeanHamil_rigetti.add_xy_meas_coda_to_program(
                     pg, bit_pos_to_xy_str)
                 st_vec_arr = sim.wavefunction(pg).amplitudes
@@ -229,10 +226,13 @@ class MeanHamil_rigetti(MeanHamil):
                 st_vec_arr = np.transpose(st_vec_arr, perm)
                 effective_st_vec = StateVec(self.num_bits, st_vec_arr)
 
-            # add contribution to mean
-            real_arr = self.get_real_vec(term)
-            mean_val += coef*effective_st_vec.\
-                    get_mean_value_of_real_diag_mat(real_arr)
+            # add contribution to mean of each term of group
+            for term in group:
+                # we have checked before that coef is real
+                coef = complex(self.hamil.terms[term]).real
+                real_arr = self.get_real_vec(term)
+                mean_val += coef*effective_st_vec.\
+                        get_mean_value_of_real_diag_mat(real_arr)
 
         return mean_val
 